@@ -0,0 +1,110 @@
+"""
+Bytes on the wire and client time of large responses for each content coding and
+JSON decoder, against a MockServer replaying compressed fixtures, plus the decode
+time of each body on its own.
+"""
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from bench_parse import generate_vms
+from harness import client, measure, served
+
+from tensordock.testing import _compressors, _fixture_key, generate_hostnodes, generate_summary
+from tensordock.transport import JSON_DECODERS, json_decoder
+
+SIZES = {'quick': (2000,), 'default': (2000, 20000), 'large': (2000, 20000, 100000)}
+PERIOD = '2024-01'
+
+# payload name: (fixture method, path, params, call made by the client)
+PAYLOADS = {
+    'hostnodes': ('GET', 'client/deploy/hostnodes', {'minGPUCount': '0'},
+                  lambda api: api.virtual_machines.get_available_hostnodes()),
+    'vms': ('POST', 'client/list', {}, lambda api: api.virtual_machines.list_vms()),
+    'summary': ('POST', 'billing/summary', {'period': PERIOD}, lambda api: api.billing.get_monthly_summary(PERIOD)),
+}
+
+
+def _bodies(size):
+    return {
+        'hostnodes': {'success': True, 'hostnodes': generate_hostnodes(size)},
+        'vms': generate_vms(size),
+        'summary': generate_summary(PERIOD, transactions=size),
+    }
+
+
+def write_fixtures(path, bodies):
+    """
+    Write a replay fixture file serving `bodies` (payload name to JSON text).
+    """
+    with open(path, 'w') as f:
+        for name, (method, endpoint, params, _) in PAYLOADS.items():
+            f.write(json.dumps({'key': _fixture_key(method, endpoint, params), 'status': 200,
+                                'body': bodies[name]}) + '\n')
+
+
+def client_codings():
+    """
+    Content codings both the installed requests/urllib3 and the mock server support.
+    """
+    from urllib3.util.request import ACCEPT_ENCODING
+    return [coding for coding in _compressors() if coding in ACCEPT_ENCODING.split(',') and coding != 'deflate']
+
+
+def decoders():
+    available = []
+    for name in JSON_DECODERS:
+        try:
+            json_decoder(name)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def _measure(api, call, repeat):
+    """
+    Time `call(api)`. Returns (wall time stats, median CPU seconds, bytes on the wire, decoded bytes).
+    """
+    sizes = []
+    cpu = []
+    api.add_hook('after_request', lambda metrics: sizes.append((metrics.transfer_size, metrics.response_size)))
+
+    def timed():
+        started = time.process_time()
+        call(api)
+        cpu.append(time.process_time() - started)
+
+    call(api)  # warm the connection
+    timing = measure(timed, repeat=repeat)
+    transfer, response = sizes[-1]
+    return timing, statistics.median(cpu), response if transfer is None else transfer, response
+
+
+def run(results, profile='default'):
+    codings = ['identity'] + client_codings()
+    names = decoders()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES[profile]:
+            bodies = {name: json.dumps(body) for name, body in _bodies(size).items()}
+            repeat = 5 if size <= 20000 else 3
+            for payload, body in bodies.items():
+                body = body.encode()
+                for name in names:
+                    decode = json_decoder(name)
+                    results.add(f'decode.{payload}', {'size': size, 'decoder': name, 'mode': 'body'},
+                                time=measure(lambda: decode(body), repeat=repeat))
+
+            path = os.path.join(directory, f'fixtures-{size}.jsonl')
+            write_fixtures(path, bodies)
+            with served(replay=path, compression=True, api_key=None) as url:
+                for payload, (_, _, _, call) in PAYLOADS.items():
+                    for coding in codings:
+                        for name in names:
+                            with client(url, compression=coding, decoder=name, retry=False) as api:
+                                timing, cpu, transfer, response = _measure(api, call, repeat)
+                            params = {'size': size, 'decoder': name, 'mode': 'call', 'encoding': coding}
+                            results.add(f'decode.{payload}', params,
+                                        time=timing, cpu=cpu, transfer_bytes=transfer, response_bytes=response)
@@ -0,0 +1,61 @@
+"""
+Throughput of concurrent VM operations at varying concurrency, sync and async.
+"""
+import asyncio
+import time
+
+from harness import async_client, client, deploy_fleet, served
+
+CONCURRENCY = {'quick': (1, 8, 32), 'default': (1, 4, 16, 64, 128), 'large': (1, 4, 16, 64, 128, 256)}
+FLEET = {'quick': 64, 'default': 256, 'large': 512}
+LATENCY = 0.01
+
+
+def _timed(call):
+    start = time.perf_counter()
+    results = call()
+    elapsed = time.perf_counter() - start
+    failed = sum(isinstance(result, Exception) for result in results.values())
+    return elapsed, failed
+
+
+async def _timed_async(call):
+    start = time.perf_counter()
+    results = await call()
+    elapsed = time.perf_counter() - start
+    failed = sum(isinstance(result, Exception) for result in results.values())
+    return elapsed, failed
+
+
+def _add(results, operation, client_type, concurrency, servers, elapsed, failed):
+    results.add('fanout', {'operation': operation, 'client': client_type, 'concurrency': concurrency,
+                           'fleet': len(servers), 'latency': LATENCY},
+                time={'median': elapsed}, throughput=len(servers) / elapsed, failed=failed)
+
+
+async def _run_async(results, url, servers, levels):
+    for concurrency in levels:
+        async with async_client(url, retry=False, max_concurrency=concurrency) as api:
+            vms = api.virtual_machines
+            for operation, call in (('get_details_many', lambda: vms.get_details_many(servers, concurrency)),
+                                    ('start_many', lambda: vms.start_many(servers, concurrency))):
+                elapsed, failed = await _timed_async(call)
+                _add(results, operation, 'async', concurrency, servers, elapsed, failed)
+
+
+def run(results, profile='default'):
+    levels = CONCURRENCY[profile]
+    with served(hostnodes=100, latency=LATENCY) as url:
+        setup = client(url, retry=False)
+        servers = deploy_fleet(setup, FLEET[profile], setup.virtual_machines.get_available_hostnodes()['hostnodes'])
+        setup.close()
+
+        for concurrency in levels:
+            with client(url, retry=False, pool_maxsize=concurrency) as api:
+                vms = api.virtual_machines
+                for operation, call in (('get_details_many', lambda: vms.get_details_many(servers, concurrency)),
+                                        ('start_many', lambda: vms.start_many(servers, concurrency))):
+                    elapsed, failed = _timed(call)
+                    _add(results, operation, 'sync', concurrency, servers, elapsed, failed)
+
+        asyncio.run(_run_async(results, url, servers, levels))
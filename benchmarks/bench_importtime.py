@@ -0,0 +1,152 @@
+"""
+Cold-start import cost of the SDK, from `python -X importtime`.
+
+Each scenario runs in a fresh interpreter and is charged for every module it
+imports beyond a bare interpreter start. Besides timing, each scenario lists
+modules it must not import, so a change that makes `import tensordock` pull
+in requests, aiohttp or the endpoint modules again fails the check even on a
+fast machine. Run it directly to check without writing a result file:
+
+    python benchmarks/bench_importtime.py              # exits 1 on a forbidden import
+    python benchmarks/bench_importtime.py --budget 20  # also fail above 20 ms for `import tensordock`
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from harness import ROOT
+
+REPEAT = {'quick': 3, 'default': 10, 'large': 30}
+
+ENDPOINT_MODULES = (
+    'tensordock.endpoints.authorization',
+    'tensordock.endpoints.virtual_machines',
+    'tensordock.endpoints.containers',
+    'tensordock.endpoints.billing',
+)
+
+# name: (statement, modules the statement must not import)
+SCENARIOS = {
+    'package': (
+        "import tensordock",
+        ('requests', 'aiohttp', 'asyncio', 'tensordock.api', 'tensordock.endpoints'),
+    ),
+    'client': (
+        "import tensordock; tensordock.TensorDockAPI('key', 'token')",
+        ('requests', 'aiohttp', 'asyncio', 'tensordock.endpoints'),
+    ),
+    'endpoint': (
+        "import tensordock; tensordock.TensorDockAPI('key', 'token').billing",
+        ('requests', 'aiohttp', 'asyncio') + tuple(name for name in ENDPOINT_MODULES if not name.endswith('billing')),
+    ),
+    'session': (
+        "import tensordock; tensordock.TensorDockAPI('key', 'token').session",
+        ('aiohttp', 'asyncio', 'tensordock.endpoints'),
+    ),
+    'async_client': (
+        "import tensordock; tensordock.AsyncTensorDockAPI('key', 'token')",
+        ('requests', 'tensordock.endpoints'),
+    ),
+}
+
+
+def importtime(statement):
+    """
+    Run `statement` in a fresh interpreter under `-X importtime`.
+
+    Returns:
+        dict: Module name to (cumulative import time in microseconds, whether it was
+        imported at the top level rather than by another module).
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.rstrip()[1:]
+        modules[name.lstrip()] = (int(cumulative), not name.startswith(' '))
+    return modules
+
+
+def cost(statement, startup):
+    """
+    Return (seconds, imported module names) for `statement`, excluding modules a bare
+    interpreter already imports.
+    """
+    modules = importtime(statement)
+    imported = set(modules) - startup
+    seconds = sum(cumulative for name, (cumulative, top) in modules.items() if top and name not in startup) / 1e6
+    return seconds, imported
+
+
+def forbidden_imports(imported, forbidden):
+    """
+    Return the entries of `forbidden` that were imported, themselves or through a submodule.
+    """
+    return sorted(module for module in forbidden
+                  if any(name == module or name.startswith(module + '.') for name in imported))
+
+
+def _startup():
+    return set(importtime('pass'))
+
+
+def check(repeat=REPEAT['default']):
+    """
+    Measure every scenario.
+
+    Returns:
+        dict: Scenario name to (time stats, forbidden modules it imported).
+    """
+    startup = _startup()
+    report = {}
+    for name, (statement, forbidden) in SCENARIOS.items():
+        samples = []
+        violations = set()
+        for _ in range(repeat):
+            seconds, imported = cost(statement, startup)
+            samples.append(seconds)
+            violations.update(forbidden_imports(imported, forbidden))
+        report[name] = ({
+            'min': min(samples),
+            'median': statistics.median(samples),
+            'mean': statistics.fmean(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'repeat': repeat,
+            'number': 1,
+        }, sorted(violations))
+    return report
+
+
+def run(results, profile='default'):
+    for name, (stats, violations) in check(REPEAT[profile]).items():
+        results.add('importtime', {'scenario': name}, time=stats, forbidden_imports=violations)
+        if violations:
+            print(f"    {name} imported {', '.join(violations)}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the SDK's import-time cost and lazy imports.")
+    parser.add_argument('--repeat', type=int, default=REPEAT['default'], help="Interpreter runs per scenario.")
+    parser.add_argument('--budget', type=float,
+                        help="Fail if the median `import tensordock` takes longer than this many milliseconds.")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, (stats, violations) in check(args.repeat).items():
+        status = f"imports {', '.join(violations)}" if violations else 'ok'
+        print(f"{name:<14} median {stats['median'] * 1e3:8.3f} ms  {status}")
+        failed = failed or bool(violations)
+        if name == 'package' and args.budget is not None and stats['median'] * 1e3 > args.budget:
+            print(f"{name}: over the {args.budget} ms budget")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
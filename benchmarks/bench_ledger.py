@@ -0,0 +1,35 @@
+"""
+BillingLedger construction and aggregation versus a naive Decimal loop.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from harness import measure
+
+from tensordock.ledger import EXPENSES, BillingLedger, period_range
+from tensordock.testing import generate_summary
+
+# (months of history, transactions per transaction list per month)
+SIZES = {'quick': ((12, 500),), 'default': ((12, 500), (60, 2000)), 'large': ((12, 500), (60, 2000), (120, 5000))}
+
+
+def naive_cost_by_vm(summaries):
+    totals = defaultdict(Decimal)
+    for summary in summaries.values():
+        for kind in EXPENSES:
+            for row in summary['transactions'].get(kind) or ():
+                totals[row.get('virtual_machine_id')] += Decimal(str(row['total_amount']))
+    return totals
+
+
+def run(results, profile='default'):
+    for months, transactions in SIZES[profile]:
+        summaries = {period: generate_summary(period, transactions=transactions)
+                     for period in period_range('2015-01', '2099-12')[:months]}
+        params = {'months': months, 'transactions': months * transactions * 4}
+        results.add('ledger.build', params, time=measure(lambda: BillingLedger(summaries), repeat=3))
+        ledger = BillingLedger(summaries)
+        results.add('ledger.cost_by_vm', dict(params, mode='ledger'), time=measure(ledger.cost_by_vm, repeat=5))
+        results.add('ledger.cost_by_vm', dict(params, mode='naive'),
+                    time=measure(lambda: naive_cost_by_vm(summaries), repeat=3))
+        results.add('ledger.running_balance', params, time=measure(ledger.running_balance, repeat=5))
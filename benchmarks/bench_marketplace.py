@@ -0,0 +1,47 @@
+"""
+HostnodeIndex build and top-k search versus naive dict iteration.
+"""
+import heapq
+
+from harness import measure
+
+from tensordock.marketplace import HostnodeIndex
+from tensordock.testing import generate_hostnodes
+
+SIZES = {'quick': (10000,), 'default': (10000, 100000), 'large': (10000, 100000, 250000)}
+SPEC = {'gpu_model': 'rtxa6000-pcie-48gb', 'gpu_count': 1, 'vcpus': 4, 'ram': 16, 'storage': 100,
+        'countries': ['United States', 'Canada'], 'min_uptime': 0.95}
+
+
+def naive_cheapest(hostnodes, gpu_model, gpu_count, vcpus, ram, storage, countries, min_uptime, k=10):
+    """
+    The same search as `HostnodeIndex.cheapest`, as a loop over the response dicts.
+    """
+    offers = []
+    for hostnode_id, hostnode in hostnodes.items():
+        status, specs = hostnode['status'], hostnode['specs']
+        if not (status['listed'] and status['online']) or (status['uptime'] or 0) < min_uptime:
+            continue
+        if hostnode['location']['country'] not in countries:
+            continue
+        if specs['cpu']['amount'] < vcpus or specs['ram']['amount'] < ram or specs['storage']['amount'] < storage:
+            continue
+        gpu = specs['gpu'].get(gpu_model)
+        if gpu is None or gpu['amount'] < gpu_count:
+            continue
+        price = (gpu['price'] * gpu_count + specs['cpu']['price'] * vcpus + specs['ram']['price'] * ram
+                 + specs['storage']['price'] * storage)
+        offers.append((price, hostnode_id))
+    return heapq.nsmallest(k, offers)
+
+
+def run(results, profile='default'):
+    for size in SIZES[profile]:
+        hostnodes = generate_hostnodes(size)
+        params = {'size': size}
+        results.add('marketplace.build', params, time=measure(lambda: HostnodeIndex(hostnodes), repeat=3))
+        index = HostnodeIndex(hostnodes)
+        results.add('marketplace.cheapest', dict(params, mode='index'),
+                    time=measure(lambda: index.cheapest(k=10, **SPEC), repeat=10))
+        results.add('marketplace.cheapest', dict(params, mode='naive'),
+                    time=measure(lambda: naive_cheapest(hostnodes, k=10, **SPEC), repeat=5))
@@ -0,0 +1,90 @@
+"""
+Parse time and memory of `list_vms` and `get_available_hostnodes` versus payload size,
+for plain dicts, typed models and streamed responses.
+"""
+import json
+import random
+import uuid
+
+from harness import client, measure, peak_memory, retained_memory, served
+
+from tensordock.models import parse_hostnodes, parse_vms
+from tensordock.testing import generate_hostnodes
+from tensordock.transport import parse_response
+
+SIZES = {'quick': (1000,), 'default': (1000, 10000, 50000), 'large': (1000, 10000, 50000, 250000)}
+STREAM_SIZES = {'quick': (5000,), 'default': (20000, 100000), 'large': (20000, 100000, 300000)}
+
+
+def generate_vms(count, seed=0):
+    """
+    A synthetic `list_vms` response with `count` VMs.
+    """
+    rng = random.Random(seed)
+    vms = {}
+    for i in range(count):
+        vms[str(uuid.UUID(int=rng.getrandbits(128), version=4))] = {
+            'cost': round(rng.uniform(0.1, 5), 3),
+            'hostnode': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'location': 'Winnipeg, Manitoba, Canada',
+            'name': f"vm-{i}",
+            'operating_system': 'Ubuntu 22.04 LTS',
+            'port_forwards': {str(rng.randrange(20000, 60000)): 22, str(rng.randrange(20000, 60000)): 8888},
+            'specs': {'gpu': {'amount': rng.choice((1, 2, 4)), 'type': 'rtxa6000-pcie-48gb'},
+                      'ram': rng.choice((16, 32, 64)), 'storage': 100, 'vcpus': rng.choice((4, 8, 16))},
+            'status': rng.choice(('Running', 'Stopped')),
+            'timestamp_creation': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        }
+    return {'success': True, 'virtualmachines': vms}
+
+
+def _typed_walk(models, attribute):
+    total = 0
+    for model in models.values():
+        if getattr(model, attribute) is not None:
+            total += 1
+    return total
+
+
+def _parse(results, name, path, body, wrap, attribute):
+    size = {'size': len(wrap(parse_response(path, 200, body)))}
+    params = dict(size, payload_bytes=len(body))
+
+    timing = measure(lambda: parse_response(path, 200, body), repeat=5)
+    _, peak = peak_memory(lambda: parse_response(path, 200, body))
+    retained = retained_memory(lambda: parse_response(path, 200, body))
+    results.add(f'parse.{name}', dict(params, mode='dict'), time=timing, peak_memory=peak, retained_memory=retained)
+
+    timing = measure(lambda: wrap(parse_response(path, 200, body)), repeat=5)
+    _, peak = peak_memory(lambda: wrap(parse_response(path, 200, body)))
+    retained = retained_memory(lambda: wrap(parse_response(path, 200, body)))
+    results.add(f'parse.{name}', dict(params, mode='typed'), time=timing, peak_memory=peak, retained_memory=retained)
+
+    timing = measure(lambda: _typed_walk(wrap(parse_response(path, 200, body)), attribute), repeat=5)
+    results.add(f'parse.{name}', dict(params, mode='typed_walk'), time=timing)
+
+
+def _drain(iterator):
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def run(results, profile='default'):
+    for size in SIZES[profile]:
+        body = json.dumps({'hostnodes': generate_hostnodes(size), 'success': True}).encode()
+        _parse(results, 'hostnodes', 'client/deploy/hostnodes', body, parse_hostnodes, 'uptime')
+        body = json.dumps(generate_vms(size)).encode()
+        _parse(results, 'list_vms', 'client/list', body, parse_vms, 'status')
+
+    for size in STREAM_SIZES[profile]:
+        with served(hostnodes=size) as url:
+            api = client(url, retry=False, read_timeout=600)
+            vms = api.virtual_machines
+            for mode, call in (('full', lambda: len(vms.get_available_hostnodes()['hostnodes'])),
+                               ('stream', lambda: _drain(vms.get_available_hostnodes(stream=True)))):
+                timing = measure(call, repeat=3)
+                _, peak = peak_memory(call)
+                results.add('fetch.hostnodes', {'size': size, 'mode': mode}, time=timing, peak_memory=peak)
+            api.close()
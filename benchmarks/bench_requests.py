@@ -0,0 +1,61 @@
+"""
+Per-call overhead of every endpoint path, and pooled versus per-call connections.
+"""
+import requests
+
+from harness import client, deploy_fleet, measure, served
+
+from tensordock.transport import build_request, parse_response
+
+CALLS = {'quick': 50, 'default': 300, 'large': 1000}
+
+
+def _calls(api, server, hostnode_id):
+    vms = api.virtual_machines
+    return {
+        'auth/test': api.authorization.test_authorization,
+        'auth/list': api.authorization.list_authorizations,
+        'client/list': vms.list_vms,
+        'client/get/single': lambda: vms.get_vm_details(server),
+        'client/start/single': lambda: vms.start_vm(server),
+        'client/stop/single': lambda: vms.stop_vm(server),
+        'client/deploy/hostnodes': vms.get_available_hostnodes,
+        'client/deploy/hostnodes/{hostnode_uuid}': lambda: vms.get_hostnode_details(hostnode_id),
+        'client/spot/validate/new': lambda: vms.validate_spot_price_new(
+            hostnode=hostnode_id, gpu_count=0, vcpus=1, ram=1, storage=10, price=10),
+        'client/spot/validate/existing': lambda: vms.validate_spot_price_existing(server, 10),
+        'client/container/{container_id}/replicas': lambda: api.containers.get_container_replicas('bench'),
+        'billing/balance': api.billing.get_balance,
+        'billing/revenue': api.billing.get_revenue,
+        'billing/summary': lambda: api.billing.get_monthly_summary('2024-01'),
+    }
+
+
+def _unpooled(api, path):
+    """
+    The pre-pooling request path: a fresh connection for every call.
+    """
+    def call():
+        method, url, body, headers = build_request(api, path, None, 'post')
+        response = requests.request(method, url, data=body, headers=headers, timeout=api.timeout)
+        return parse_response(path, response.status_code, response.content, response.headers)
+    return call
+
+
+def run(results, profile='default'):
+    number = CALLS[profile]
+    with served(hostnodes=20) as url:
+        api = client(url, retry=False)
+        hostnodes = api.virtual_machines.get_available_hostnodes()['hostnodes']
+        server = deploy_fleet(api, 1, hostnodes)[0]
+        api.containers.deploy_container(project_id='bench', replicas=3, image_name='nginx')
+        hostnode_id = next(iter(hostnodes))
+
+        for path, call in _calls(api, server, hostnode_id).items():
+            timing = measure(call, repeat=5, number=number)
+            results.add('request.path', {'path': path}, time=timing, throughput=1 / timing['median'])
+
+        for pooled, call in ((True, api.authorization.test_authorization), (False, _unpooled(api, 'auth/test'))):
+            timing = measure(call, repeat=5, number=number)
+            results.add('request.pooling', {'pooled': pooled}, time=timing, throughput=1 / timing['median'])
+        api.close()
@@ -0,0 +1,67 @@
+"""
+Tail latency of idempotent calls with and without hedging, against a MockServer
+where a few responses straggle, and how fast calls fail while the upstream is
+down with and without a circuit breaker.
+"""
+import statistics
+import time
+
+from harness import client, served
+
+from tensordock.resilience import CircuitBreaker, HedgingPolicy
+
+CALLS = {'quick': 100, 'default': 400, 'large': 2000}
+LATENCY = 0.005
+JITTER = 0.005
+SLOW_RATE = 0.03
+SLOW_LATENCY = 0.2
+
+
+def _quantile(ordered, quantile):
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def latencies(call, number):
+    """
+    Time `number` sequential calls. Returns (per-call time stats, p95, p99).
+    """
+    samples = []
+    for _ in range(number):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    ordered = sorted(samples)
+    stats = {
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered),
+        'repeat': number,
+        'number': 1,
+    }
+    return stats, _quantile(ordered, 0.95), _quantile(ordered, 0.99)
+
+
+def run(results, profile='default'):
+    number = CALLS[profile]
+    with served(latency=LATENCY, jitter=JITTER, slow_rate=SLOW_RATE, slow_latency=SLOW_LATENCY) as url:
+        for name, hedging in (('off', None), ('p95', HedgingPolicy()), ('p90', HedgingPolicy(quantile=0.9))):
+            with client(url, retry=False, hedging=hedging) as api:
+                sent = []
+                api.add_hook('after_request', lambda metrics: sent.append(metrics.attempts))
+                api.billing.get_balance()  # warm the connection
+                stats, p95, p99 = latencies(api.billing.get_balance, number)
+                hedges = api.resilience_stats()['hedging'].get('billing/balance', {})
+                results.add('tail.hedging', {'hedging': name}, time=stats, p95=p95, p99=p99,
+                            requests_per_call=sum(sent[1:]) / number, hedge_win_rate=hedges.get('win_rate'))
+
+    with served(latency=LATENCY, error_rate=1.0) as url:
+        for name, breaker in (('off', None), ('on', CircuitBreaker(reset_timeout=60))):
+            with client(url, retry=False, circuit_breaker=breaker) as api:
+                def call():
+                    try:
+                        api.billing.get_balance()
+                    except Exception:
+                        pass
+                stats, p95, p99 = latencies(call, number)
+                results.add('tail.circuit_breaker', {'circuit_breaker': name}, time=stats, p95=p95, p99=p99)
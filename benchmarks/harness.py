@@ -0,0 +1,291 @@
+"""
+Timing, memory and result-file helpers shared by the benchmark modules.
+
+Run as a script, this module starts a MockServer and prints its URL, which is
+how `served()` keeps server-side work out of the client's measurements.
+"""
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class Results:
+    """
+    Collects benchmark results and writes them as one JSON document.
+
+    Each result is keyed by its benchmark name plus its parameters, so two
+    result files can be compared entry by entry with `compare`.
+    """
+    def __init__(self):
+        self.results = []
+
+    def add(self, benchmark, params=None, **metrics):
+        entry = {'benchmark': benchmark, 'params': params or {}}
+        entry.update(metrics)
+        self.results.append(entry)
+        print(f"  {_key(entry):<60} {_summary(entry)}", flush=True)
+        return entry
+
+    def document(self):
+        return {'meta': environment(), 'results': self.results}
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.document(), f, indent=2, sort_keys=True)
+
+
+def environment():
+    """
+    Describe the code and machine a result file was produced on.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'version': _version(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def _version():
+    try:
+        with open(os.path.join(ROOT, 'setup.py')) as f:
+            match = re.search(r'version="([^"]+)"', f.read())
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+
+def _key(entry):
+    params = ','.join(f"{name}={value}" for name, value in sorted(entry['params'].items()))
+    return f"{entry['benchmark']}[{params}]" if params else entry['benchmark']
+
+
+def _summary(entry):
+    parts = []
+    if 'time' in entry:
+        parts.append(f"median {entry['time']['median'] * 1e3:.3f} ms")
+    if 'p99' in entry:
+        parts.append(f"p99 {entry['p99'] * 1e3:.3f} ms")
+    if 'cpu' in entry:
+        parts.append(f"cpu {entry['cpu'] * 1e3:.3f} ms")
+    if 'transfer_bytes' in entry:
+        parts.append(f"{entry['transfer_bytes'] / 2 ** 10:.0f} KiB on the wire")
+    if 'throughput' in entry:
+        parts.append(f"{entry['throughput']:.0f} ops/s")
+    if 'peak_memory' in entry:
+        parts.append(f"peak {entry['peak_memory'] / 2 ** 20:.1f} MiB")
+    if 'retained_memory' in entry:
+        parts.append(f"retained {entry['retained_memory'] / 2 ** 20:.1f} MiB")
+    return ', '.join(parts)
+
+
+def measure(func, repeat=5, number=1, setup=None):
+    """
+    Time `func` with the garbage collector paused.
+
+    Args:
+        func (callable): Called `number` times per repeat.
+        repeat (int, optional): Number of timed repeats. Defaults to 5.
+        number (int, optional): Calls per repeat. Defaults to 1.
+        setup (callable, optional): Called, untimed, before every repeat.
+
+    Returns:
+        dict: min, median, mean and stdev of the seconds per call.
+    """
+    samples = []
+    enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - start) / number)
+            if enabled:
+                gc.enable()
+    finally:
+        if enabled:
+            gc.enable()
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def peak_memory(func):
+    """
+    Run `func` once under tracemalloc.
+
+    Returns:
+        tuple: (result of func, peak bytes allocated during the call).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def retained_memory(func):
+    """
+    Run `func` once under tracemalloc.
+
+    Returns:
+        int: Bytes still allocated once the call has returned, i.e. held by its result.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return retained
+
+
+@contextmanager
+def served(**options):
+    """
+    Run a MockServer in a child process and yield its base URL.
+
+    Args:
+        **options: Keyword arguments for MockServer; they must be JSON serializable.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), json.dumps(options)],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        url = process.stdout.readline().strip()
+        if not url:
+            raise RuntimeError("Mock server failed to start")
+        yield url
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def client(url, **kwargs):
+    """
+    Return a TensorDockAPI for a served MockServer.
+    """
+    from tensordock import TensorDockAPI
+    api = TensorDockAPI('mock-key', 'mock-token', **kwargs)
+    api.base_url = url
+    return api
+
+
+def async_client(url, **kwargs):
+    """
+    Return an AsyncTensorDockAPI for a served MockServer.
+    """
+    from tensordock import AsyncTensorDockAPI
+    api = AsyncTensorDockAPI('mock-key', 'mock-token', **kwargs)
+    api.base_url = url
+    return api
+
+
+def deploy_fleet(api, count, hostnodes):
+    """
+    Deploy `count` CPU-only VMs across `hostnodes` and return their UUIDs.
+    """
+    servers = []
+    for hostnode_id, hostnode in hostnodes.items():
+        specs = hostnode['specs']
+        free = list(hostnode['networking']['ports'])
+        free = free[:min(len(free), specs['cpu']['amount'], specs['ram']['amount'], specs['storage']['amount'] // 10)]
+        while free and len(servers) < count:
+            response = api.virtual_machines.deploy_vm(
+                name=f"bench-{len(servers)}", gpu_count=0, vcpus=1, ram=1, storage=10, hostnode=hostnode_id,
+                external_ports=f"{{{free.pop()}}}", internal_ports='{22}', operating_system='Ubuntu 22.04 LTS',
+                password='bench',
+            )
+            servers.append(response['server'])
+        if len(servers) >= count:
+            break
+    return servers
+
+
+def compare(baseline, current, threshold=1.2):
+    """
+    Compare two result documents.
+
+    Args:
+        baseline (dict): The earlier result document.
+        current (dict): The new result document.
+        threshold (float, optional): Ratio of median times (or inverse ratio of throughputs)
+            above which an entry counts as a regression. Defaults to 1.2.
+
+    Returns:
+        list: (key, metric, baseline value, current value, ratio, regressed) tuples for every
+        entry present in both documents.
+    """
+    previous = {_key(entry): entry for entry in baseline['results']}
+    rows = []
+    for entry in current['results']:
+        before = previous.get(_key(entry))
+        if before is None:
+            continue
+        if 'time' in entry and 'time' in before:
+            old, new = before['time']['median'], entry['time']['median']
+            ratio = new / old if old else float('inf')
+            rows.append((_key(entry), 'median_time', old, new, ratio, ratio > threshold))
+        if 'throughput' in entry and 'throughput' in before:
+            old, new = before['throughput'], entry['throughput']
+            ratio = old / new if new else float('inf')
+            rows.append((_key(entry), 'throughput', old, new, ratio, ratio > threshold))
+        if 'peak_memory' in entry and 'peak_memory' in before:
+            old, new = before['peak_memory'], entry['peak_memory']
+            ratio = new / old if old else float('inf')
+            rows.append((_key(entry), 'peak_memory', old, new, ratio, ratio > threshold))
+    return rows
+
+
+def _serve(options):
+    from tensordock.testing import MockServer
+    server = MockServer(**options).start()
+    print(server.url, flush=True)
+    sys.stdin.read()
+    server.stop()
+
+
+if __name__ == '__main__':
+    _serve(json.loads(sys.argv[1]))
@@ -0,0 +1,66 @@
+"""
+Run the benchmark suite and write the results as JSON.
+
+    python benchmarks/run.py                       # every benchmark, default sizes
+    python benchmarks/run.py requests fanout --quick
+    python benchmarks/run.py --compare benchmarks/results/0.1.13.json
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+from harness import ROOT, Results, compare, environment
+
+BENCHMARKS = ('requests', 'parse', 'fanout', 'marketplace', 'ledger', 'decode', 'tail', 'importtime')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the TensorDock SDK against a local mock server.")
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                        help=f"Benchmarks to run ({', '.join(BENCHMARKS)}). Defaults to all.")
+    sizes = parser.add_mutually_exclusive_group()
+    sizes.add_argument('--quick', dest='profile', action='store_const', const='quick',
+                       help="Small payloads and few concurrency levels.")
+    sizes.add_argument('--large', dest='profile', action='store_const', const='large',
+                       help="Add multi-hundred-MB payloads and higher concurrency.")
+    parser.add_argument('--output', help="Result file. Defaults to benchmarks/results/<version>-<timestamp>.json.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compare against an earlier result file.")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Slowdown ratio reported as a regression. Defaults to 1.2.")
+    args = parser.parse_args(argv)
+    profile = args.profile or 'default'
+    unknown = sorted(set(args.benchmarks) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = Results()
+    for name in args.benchmarks or BENCHMARKS:
+        print(f"{name}:", flush=True)
+        importlib.import_module(f'bench_{name}').run(results, profile)
+
+    output = args.output
+    if output is None:
+        meta = environment()
+        output = os.path.join(ROOT, 'benchmarks', 'results',
+                              f"{meta['version']}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    results.write(output)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, results.document(), args.threshold)
+        regressions = [row for row in rows if row[-1]]
+        for key, metric, old, new, ratio, regressed in rows:
+            flag = 'REGRESSION' if regressed else ''
+            print(f"  {key:<60} {metric:<12} {old:>12.6g} -> {new:<12.6g} x{ratio:.2f} {flag}")
+        print(f"{len(regressions)} regression(s) out of {len(rows)} comparisons")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,17 @@ setup(
     install_requires=[
         "requests",
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "marketplace": ["numpy"],
+        "billing": ["numpy"],
+        "speedups": ["orjson", "brotli", "backports.zstd; python_version < '3.14'"],
+    },
+    entry_points={
+        "console_scripts": [
+            "tensordock=tensordock.cli:main",
+        ],
+    },
     author="Ryan Huang",
     author_email="ryan@stdint.com",
     description="A Python SDK for TensorDock API",
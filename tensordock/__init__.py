@@ -1,18 +1,24 @@
-from .api import TensorDockAPI
+from importlib import import_module
 
-# tensordock/api.py
-from .endpoints.authorization import Authorization
-from .endpoints.virtual_machines import VirtualMachines
-from .endpoints.containers import Containers
-from .endpoints.billing import Billing
+from .exceptions import TensorDockAPIException
 
-class TensorDockAPI:
-    def __init__(self, api_key, api_token):
-        self.api_key = api_key
-        self.api_token = api_token
-        self.base_url = "https://marketplace.tensordock.com/api/v0"
+__all__ = ['TensorDockAPI', 'AsyncTensorDockAPI', 'TensorDockAPIException']
 
-        self.authorization = Authorization(self)
-        self.virtual_machines = VirtualMachines(self)
-        self.containers = Containers(self)
-        self.billing = Billing(self)
+# The clients are imported on first access, so `import tensordock` does not
+# pull in requests, aiohttp or the endpoint modules.
+_LAZY = {
+    'TensorDockAPI': '.api',
+    'AsyncTensorDockAPI': '.async_api',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
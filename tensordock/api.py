@@ -1,16 +1,468 @@
-from .endpoints.authorization import Authorization
-from .endpoints.virtual_machines import VirtualMachines
-from .endpoints.containers import Containers
-from .endpoints.billing import Billing
+import threading
+import time
+from importlib import import_module
 
-class TensorDockAPI:
-    def __init__(self, api_key, api_token):
+from .batch import DEFAULT_MAX_WORKERS
+from .metrics import RequestMetrics
+from .resilience import check_deadline, deadline, remaining, CircuitBreaker, HedgingPolicy
+from .retry import RetryPolicy
+from .exceptions import TensorDockTimeoutError
+from .transport import (
+    build_request,
+    connect_time,
+    create_session,
+    json_decoder,
+    parse_response,
+    request_headers,
+    transfer_size,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+)
+
+class _EndpointGroup:
+    """
+    Endpoint group attribute that imports its module and creates the group on
+    first access, then caches it on the client so later lookups are plain
+    attribute reads.
+    """
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self.attr = None
+
+    def __set_name__(self, owner, attr):
+        self.attr = attr
+
+    def __get__(self, api, owner=None):
+        if api is None:
+            return self
+        group = getattr(import_module(self.module, __package__), self.name)(api)
+        api.__dict__[self.attr] = group
+        return group
+
+
+class BaseTensorDockAPI:
+    """
+    Configuration and endpoint groups shared by the sync and async clients.
+    Subclasses implement `_request` on top of their HTTP transport.
+    """
+    transient_errors = ()
+    status_poller_class = None
+
+    authorization = _EndpointGroup('.endpoints.authorization', 'Authorization')
+    virtual_machines = _EndpointGroup('.endpoints.virtual_machines', 'VirtualMachines')
+    containers = _EndpointGroup('.endpoints.containers', 'Containers')
+    billing = _EndpointGroup('.endpoints.billing', 'Billing')
+
+    def __init__(self, api_key, api_token, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, cache=None, retry=True, rate_limiter=None, metrics=None,
+                 snapshots=None, compression=True, decoder='auto', deadline=None, hedging=None, circuit_breaker=None):
         self.api_key = api_key
         self.api_token = api_token
         self.base_url = "https://marketplace.tensordock.com/api/v0"
+        self.timeout = (connect_timeout, read_timeout)
+        self.headers = request_headers(compression)
+        self.decoder = decoder
+        self._decode = None
+        if cache is True:
+            from .cache import ResponseCache
+            cache = ResponseCache()
+        self.cache = cache or None
+        self.retry = RetryPolicy() if retry is True else retry or None
+        self.rate_limiter = rate_limiter
+        self.deadline = deadline
+        self.hedging = HedgingPolicy() if hedging is True else hedging or None
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is True else circuit_breaker or None
+        self.snapshots = snapshots
+        self.hooks = {'before_request': [], 'after_request': []}
+        self._status_poller = None
+        if metrics is not None:
+            self.add_hook('after_request', metrics.record)
+        if snapshots is not None and self.cache is not None:
+            snapshots.warm(self.cache)
+
+    @property
+    def decode(self):
+        """
+        callable: The JSON decoder for response bodies. It is resolved from `decoder` on first use,
+        so the JSON library is only imported once a response arrives.
+        """
+        if self._decode is None:
+            self._decode = json_decoder(self.decoder)
+        return self._decode
+
+    @property
+    def status_poller(self):
+        """
+        The shared poller behind `wait_for_vm_status` and `wait_for_replicas`.
+        Set its `interval` attribute to change how often it polls.
+        """
+        if self._status_poller is None:
+            self._status_poller = self.status_poller_class(self)
+        return self._status_poller
+
+    def add_hook(self, event, hook):
+        """
+        Register a hook on the request pipeline.
+
+        Args:
+            event (str): "before_request" hooks are called as `hook(path, data, method)` before
+                every call; "after_request" hooks are called as `hook(metrics)` with the call's
+                RequestMetrics once it has finished or failed.
+            hook (callable): The hook to call.
+        """
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event, hook):
+        self.hooks[event].remove(hook)
+
+    def _start_call(self, path, data, method):
+        for hook in self.hooks['before_request']:
+            hook(path, data, method)
+        return RequestMetrics(path, method), time.perf_counter()
+
+    def _finish_call(self, metrics, started, error=None):
+        metrics.total = time.perf_counter() - started
+        metrics.retries = max(0, metrics.attempts - 1)
+        if error is not None:
+            metrics.error = type(error).__name__
+            metrics.status_code = getattr(error, 'status_code', metrics.status_code)
+        for hook in self.hooks['after_request']:
+            hook(metrics)
+
+    def _request(self, path, data=None, method='post', parse=None):
+        raise NotImplementedError
+
+    def _send(self, path, data=None, method='post', metrics=None):
+        raise NotImplementedError
+
+    def _stream(self, path, data=None, method='post', items=(), parse=None):
+        raise NotImplementedError
+
+    def _retry_delay(self, path, method, attempt, error):
+        if self.retry is None:
+            return None
+        delay = self.retry.delay_for(path, method, attempt, error, self.transient_errors)
+        left = remaining()
+        if delay is not None and left is not None and delay >= left:
+            return None
+        return delay
+
+    def _admit(self, path):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.allow(path)
+
+    def _release(self, path):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release(path)
+
+    def _record_outcome(self, path, error=None):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(path, error, self.transient_errors)
+
+    def _attempt_timeout(self, left):
+        """
+        Internal method to cap the connect and read timeouts at the time left before the deadline.
+        """
+        if left is None:
+            return self.timeout
+        return tuple(left if value is None else min(value, left) for value in self.timeout)
+
+    def _settle(self, path, metrics, attempts, winner=None):
+        """
+        Internal method to fold the attempts of a hedged or deadline-bound call into
+        its metrics and the hedge stats. `attempts` is a list of (future, RequestMetrics)
+        in the order they were sent; `winner` is the index of the attempt that answered.
+        """
+        if metrics is not None:
+            for _, scratch in attempts:
+                metrics.attempts += scratch.attempts
+            if winner is not None:
+                won = attempts[winner][1]
+                metrics.status_code = won.status_code
+                metrics.connect = won.connect
+                metrics.ttfb = won.ttfb
+                metrics.response_size = won.response_size
+                metrics.transfer_size = won.transfer_size
+        if self.hedging is not None and len(attempts) > 1:
+            self.hedging.record(path, won=winner == 1)
+
+    def resilience_stats(self):
+        """
+        Circuit breaker and hedging stats of this client.
+
+        Returns:
+            dict: `circuit_breaker` maps each endpoint group to its circuit's state and counts, and
+            `hedging` maps each route to its hedge counts and win rate (see `CircuitBreaker.stats`
+            and `HedgingPolicy.stats`). Either is empty when the feature is disabled.
+        """
+        return {
+            'circuit_breaker': self.circuit_breaker.stats() if self.circuit_breaker is not None else {},
+            'hedging': self.hedging.stats() if self.hedging is not None else {},
+        }
+
+    def _run_many(self, func, items, max_workers):
+        raise NotImplementedError
+
+class TensorDockAPI(BaseTensorDockAPI):
+    """
+    Synchronous client built on a pooled requests Session.
+
+    `requests` is only imported once the session is first needed, and each
+    endpoint group's module once the group is first accessed, so importing
+    the package and creating a client stay cheap.
+    """
+    @property
+    def transient_errors(self):
+        import requests
+        return (requests.ConnectionError, requests.Timeout)
+
+    @property
+    def status_poller_class(self):
+        from .waiters import StatusPoller
+        return StatusPoller
+
+    def __init__(self, api_key, api_token, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, session=None, cache=None, retry=True, rate_limiter=None,
+                 metrics=None, snapshots=None, compression=True, decoder='auto', deadline=None, hedging=None,
+                 circuit_breaker=None):
+        super().__init__(api_key, api_token, connect_timeout, read_timeout, cache, retry, rate_limiter, metrics,
+                         snapshots, compression, decoder, deadline, hedging, circuit_breaker)
+        self._session = session
+        self._pool = (pool_connections, pool_maxsize)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        requests.Session: The pooled session, created on first use.
+        """
+        if self._session is None:
+            self._session = create_session(*self._pool)
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def _request(self, path, data=None, method='post', parse=None):
+        """
+        Internal method to make an API call: runs the hooks, serves the call from
+        the response cache when enabled, and records its metrics.
+        """
+        metrics, started = self._start_call(path, data, method)
+        try:
+            with deadline(self.deadline):
+                if self.cache is not None:
+                    result = self.cache.fetch(path, data, lambda: self._send(path, data, method, metrics), metrics)
+                else:
+                    result = self._send(path, data, method, metrics)
+            if parse is not None:
+                result = parse(result)
+        except Exception as error:
+            self._finish_call(metrics, started, error)
+            raise
+        self._finish_call(metrics, started)
+        return result
+
+    def _send(self, path, data=None, method='post', metrics=None):
+        """
+        Internal method to send an API call, waiting for the rate limiter and
+        retrying transient failures according to the retry policy. Calls fail
+        fast while the circuit breaker holds their endpoint group open, and
+        retries that would end past the deadline are not made. Successful
+        responses are written to the snapshot store when one is attached.
+        """
+        attempt = 0
+        while True:
+            self._admit(path)
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(path)
+                left = check_deadline(path)
+            except BaseException:
+                # Nothing was sent, so the circuit breaker has no outcome to record.
+                self._release(path)
+                raise
+            try:
+                result = self._attempt(path, data, method, metrics, left)
+            except Exception as error:
+                self._record_outcome(path, error)
+                delay = self._retry_delay(path, method, attempt, error)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._release(path)
+                raise
+            else:
+                self._record_outcome(path)
+                if self.snapshots is not None and self.snapshots.records(path):
+                    self.snapshots.record(path, data, result)
+                return result
+            time.sleep(delay)
+            attempt += 1
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(2 * self._pool[1], thread_name_prefix='tensordock-attempt')
+            return self._executor
+
+    def _attempt(self, path, data=None, method='post', metrics=None, left=None):
+        """
+        Internal method to make one attempt of a call. Without a deadline or a hedge it
+        is sent directly. Otherwise it runs on the client's worker pool, so waiting for
+        it stops at the deadline, and if the hedging policy asks for it a duplicate is
+        sent once the first has been outstanding for the hedge delay; the first
+        successful response wins. `left` is the time before the deadline, or None.
+        """
+        hedge = self.hedging.hedge_after(path, method) if self.hedging is not None else None
+        if left is None and hedge is None:
+            return self._observed(path, data, method, metrics)
+        from concurrent.futures import wait, FIRST_COMPLETED
+        ends = None if left is None else time.monotonic() + left
+        timeout = self._attempt_timeout(left)
+        executor = self._get_executor()
+        attempts = []
+
+        def submit():
+            scratch = RequestMetrics(path, method)
+            attempts.append((executor.submit(self._observed, path, data, method, scratch, timeout), scratch))
+
+        submit()
+        if hedge is not None and (ends is None or hedge < left):
+            done, _ = wait([attempts[0][0]], hedge)
+            if not done:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(path)
+                submit()
+
+        pending = {future for future, _ in attempts}
+        error = None
+        while pending:
+            done, pending = wait(pending, None if ends is None else max(0.0, ends - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for index, (future, _) in enumerate(attempts):
+                if future not in done:
+                    continue
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    self._settle(path, metrics, attempts, index)
+                    return future.result()
+                error = error or future.exception()
+        for future in pending:
+            future.cancel()
+        self._settle(path, metrics, attempts)
+        if error is not None and not pending:
+            raise error
+        raise TensorDockTimeoutError(f"Deadline exceeded calling {path}")
+
+    def _observed(self, path, data=None, method='post', metrics=None, timeout=None):
+        """
+        Internal method to send an API call, feeding its latency to the hedging policy.
+        """
+        if self.hedging is None:
+            return self._send_once(path, data, method, metrics, timeout)
+        sent = time.perf_counter()
+        result = self._send_once(path, data, method, metrics, timeout)
+        self.hedging.observe(path, time.perf_counter() - sent)
+        return result
+
+    @staticmethod
+    def _time_response(metrics, response):
+        """
+        Internal method to split a response's elapsed time into connection setup and
+        time to first byte. Connection setup is only measured on sessions built by
+        `create_session`; on a custom session `connect` stays None and `ttfb` includes it.
+        """
+        metrics.connect = connect_time()
+        elapsed = response.elapsed.total_seconds()
+        metrics.ttfb = elapsed if metrics.connect is None else max(0.0, elapsed - metrics.connect)
+
+    def _send_once(self, path, data=None, method='post', metrics=None, timeout=None):
+        """
+        Internal method to send an API call through the pooled session.
+        """
+        method, url, body, headers = build_request(self, path, data, method)
+        if metrics is not None:
+            metrics.attempts += 1
+        connect_time()
+        response = self.session.request(method, url, data=body, headers=headers, timeout=timeout or self.timeout)
+        if metrics is not None:
+            metrics.status_code = response.status_code
+            self._time_response(metrics, response)
+            metrics.response_size = len(response.content)
+            metrics.transfer_size = transfer_size(response.headers)
+        return parse_response(path, response.status_code, response.content, response.headers, self.decode)
+
+    def _stream(self, path, data=None, method='post', items=(), parse=None):
+        """
+        Internal method to make an API call whose response is parsed incrementally,
+        yielding the entries of the container at `items` as they arrive. Streamed
+        calls bypass the response cache and are neither retried nor hedged; an
+        enclosing deadline only caps their connect and read timeouts.
+        """
+        from .streaming import count_bytes, iter_json_items, STREAM_CHUNK_SIZE
+        metrics, started = self._start_call(path, data, method)
+        error = None
+        admitted = completed = False
+        try:
+            timeout = self._attempt_timeout(check_deadline(path))
+            self._admit(path)
+            admitted = True
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(path)
+            method, url, body, headers = build_request(self, path, data, method)
+            metrics.attempts += 1
+            connect_time()
+            with self.session.request(method, url, data=body, headers=headers, timeout=timeout,
+                                      stream=True) as response:
+                metrics.status_code = response.status_code
+                self._time_response(metrics, response)
+                metrics.transfer_size = transfer_size(response.headers)
+                if response.status_code != 200:
+                    parse_response(path, response.status_code, response.content, response.headers)
+                chunks = count_bytes(response.iter_content(STREAM_CHUNK_SIZE), metrics)
+                for item in iter_json_items(chunks, items):
+                    yield parse(item) if parse is not None else item
+            completed = True
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            if admitted and (error is not None or completed):
+                self._record_outcome(path, error)
+            elif admitted:
+                self._release(path)
+            self._finish_call(metrics, started, error)
+
+    def _run_many(self, func, items, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Internal method to fan calls out over a bounded thread pool.
+        """
+        from .batch import run_many
+        return run_many(func, items, max_workers)
+
+    def close(self):
+        """
+        Close the pooled connections held by this client.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._session is not None:
+            self._session.close()
 
-        self.authorization = Authorization(self)
-        self.virtual_machines = VirtualMachines(self)
-        self.containers = Containers(self)
-        self.billing = Billing(self)
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,289 @@
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from .api import BaseTensorDockAPI
+from .batch import run_many_async, DEFAULT_MAX_WORKERS
+from .exceptions import TensorDockTimeoutError
+from .metrics import RequestMetrics
+from .resilience import check_deadline, deadline
+from .streaming import acount_bytes, aiter_json_items, STREAM_CHUNK_SIZE
+from .waiters import AsyncStatusPoller
+from .transport import (
+    build_request,
+    parse_response,
+    transfer_size,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+)
+
+DEFAULT_ASYNC_POOL_MAXSIZE = 100
+DEFAULT_MAX_CONCURRENCY = 100
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+
+
+def _connect_timing_trace():
+    """
+    aiohttp trace config recording the time spent opening new connections
+    into the RequestMetrics passed as `trace_request_ctx`.
+    """
+    config = aiohttp.TraceConfig()
+
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx.connect = time.perf_counter() - context.connect_started
+
+    config.on_connection_create_start.append(on_connection_create_start)
+    config.on_connection_create_end.append(on_connection_create_end)
+    return config
+
+class AsyncTensorDockAPI(BaseTensorDockAPI):
+    """
+    asyncio client for the TensorDock API.
+
+    Exposes the same endpoint groups as TensorDockAPI (`authorization`,
+    `virtual_machines`, `containers`, `billing`); every endpoint method returns
+    an awaitable instead of the response. Requires aiohttp.
+    """
+    transient_errors = (
+        (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) if aiohttp else ()
+    )
+    status_poller_class = AsyncStatusPoller
+
+    def __init__(self, api_key, api_token, pool_maxsize=DEFAULT_ASYNC_POOL_MAXSIZE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                 session=None, cache=None, retry=True, rate_limiter=None, metrics=None, snapshots=None,
+                 compression=True, decoder='auto', deadline=None, hedging=None, circuit_breaker=None):
+        if aiohttp is None:
+            raise ImportError("AsyncTensorDockAPI requires aiohttp: pip install tensordock[async]")
+        super().__init__(api_key, api_token, connect_timeout, read_timeout, cache, retry, rate_limiter, metrics,
+                         snapshots, compression, decoder, deadline, hedging, circuit_breaker)
+        self.pool_maxsize = pool_maxsize
+        self.max_concurrency = max_concurrency
+        self.keepalive_timeout = keepalive_timeout
+        self.session = session
+        self._semaphore = None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize, keepalive_timeout=self.keepalive_timeout)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1])
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                                 trace_configs=[_connect_timing_trace()])
+        return self.session
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _request(self, path, data=None, method='post', parse=None):
+        """
+        Internal method to make an API call: runs the hooks, serves the call from
+        the response cache when enabled, and records its metrics.
+        """
+        metrics, started = self._start_call(path, data, method)
+        try:
+            with deadline(self.deadline):
+                if self.cache is not None:
+                    result = await self.cache.fetch_async(path, data,
+                                                          lambda: self._send(path, data, method, metrics), metrics)
+                else:
+                    result = await self._send(path, data, method, metrics)
+            if parse is not None:
+                result = parse(result)
+        except Exception as error:
+            self._finish_call(metrics, started, error)
+            raise
+        self._finish_call(metrics, started)
+        return result
+
+    async def _send(self, path, data=None, method='post', metrics=None):
+        """
+        Internal method to send an API call, waiting for the rate limiter and
+        retrying transient failures according to the retry policy. Calls fail
+        fast while the circuit breaker holds their endpoint group open, and
+        retries that would end past the deadline are not made. Successful
+        responses are queued for the snapshot store when one is attached.
+        """
+        attempt = 0
+        while True:
+            self._admit(path)
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async(path)
+                left = check_deadline(path)
+            except BaseException:
+                # Nothing was sent, so the circuit breaker has no outcome to record.
+                self._release(path)
+                raise
+            try:
+                result = await self._attempt(path, data, method, metrics, left)
+            except Exception as error:
+                self._record_outcome(path, error)
+                delay = self._retry_delay(path, method, attempt, error)
+                if delay is None:
+                    raise
+            except BaseException:
+                self._release(path)
+                raise
+            else:
+                self._record_outcome(path)
+                if self.snapshots is not None and self.snapshots.records(path):
+                    self.snapshots.record(path, data, result)
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _attempt(self, path, data=None, method='post', metrics=None, left=None):
+        """
+        Internal method to make one attempt of a call. Without a deadline or a hedge it
+        is awaited directly. Otherwise it runs as a task that is cancelled at the
+        deadline, and if the hedging policy asks for it a duplicate task is started
+        once the first has been outstanding for the hedge delay; the first successful
+        response wins and the other task is cancelled. `left` is the time before the
+        deadline, or None.
+        """
+        hedge = self.hedging.hedge_after(path, method) if self.hedging is not None else None
+        if left is None and hedge is None:
+            return await self._observed(path, data, method, metrics)
+        loop = asyncio.get_running_loop()
+        ends = None if left is None else loop.time() + left
+        attempts = []
+
+        def submit():
+            scratch = RequestMetrics(path, method)
+            attempts.append((asyncio.ensure_future(self._observed(path, data, method, scratch)), scratch))
+
+        submit()
+        pending = {attempts[0][0]}
+        error = None
+        try:
+            if hedge is not None and (ends is None or hedge < left):
+                done, _ = await asyncio.wait(pending, timeout=hedge)
+                if not done:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire_async(path)
+                    submit()
+                    pending.add(attempts[1][0])
+
+            while pending:
+                timeout = None if ends is None else max(0.0, ends - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for index, (task, _) in enumerate(attempts):
+                    if task not in done:
+                        continue
+                    if task.exception() is None:
+                        self._settle(path, metrics, attempts, index)
+                        return task.result()
+                    error = error or task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        self._settle(path, metrics, attempts)
+        if error is not None and not pending:
+            raise error
+        raise TensorDockTimeoutError(f"Deadline exceeded calling {path}")
+
+    async def _observed(self, path, data=None, method='post', metrics=None):
+        """
+        Internal method to send an API call, feeding its latency to the hedging policy.
+        """
+        if self.hedging is None:
+            return await self._send_once(path, data, method, metrics)
+        sent = time.perf_counter()
+        result = await self._send_once(path, data, method, metrics)
+        self.hedging.observe(path, time.perf_counter() - sent)
+        return result
+
+    async def _send_once(self, path, data=None, method='post', metrics=None):
+        """
+        Internal method to send an API call through the pooled aiohttp session.
+        At most `max_concurrency` calls are in flight at once.
+        """
+        method, url, body, headers = build_request(self, path, data, method)
+        async with self._get_semaphore():
+            if metrics is not None:
+                metrics.attempts += 1
+            sent = time.perf_counter()
+            async with self._get_session().request(method, url, data=body, headers=headers,
+                                                   trace_request_ctx=metrics) as response:
+                if metrics is not None:
+                    metrics.ttfb = time.perf_counter() - sent
+                content = await response.read()
+        if metrics is not None:
+            metrics.status_code = response.status
+            metrics.response_size = len(content)
+            metrics.transfer_size = transfer_size(response.headers)
+        return parse_response(path, response.status, content, response.headers, self.decode)
+
+    async def _stream(self, path, data=None, method='post', items=(), parse=None):
+        """
+        Internal method to make an API call whose response is parsed incrementally,
+        yielding the entries of the container at `items` as they arrive. Streamed
+        calls bypass the response cache and are neither retried nor hedged; an
+        enclosing deadline only caps their connect and read timeouts.
+        """
+        metrics, started = self._start_call(path, data, method)
+        error = None
+        admitted = completed = False
+        try:
+            connect_timeout, read_timeout = self._attempt_timeout(check_deadline(path))
+            self._admit(path)
+            admitted = True
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(path)
+            method, url, body, headers = build_request(self, path, data, method)
+            async with self._get_semaphore():
+                metrics.attempts += 1
+                sent = time.perf_counter()
+                timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+                async with self._get_session().request(method, url, data=body, headers=headers, timeout=timeout,
+                                                       trace_request_ctx=metrics) as response:
+                    metrics.ttfb = time.perf_counter() - sent
+                    metrics.status_code = response.status
+                    metrics.transfer_size = transfer_size(response.headers)
+                    if response.status != 200:
+                        parse_response(path, response.status, await response.read(), response.headers)
+                    chunks = acount_bytes(response.content.iter_chunked(STREAM_CHUNK_SIZE), metrics)
+                    async for item in aiter_json_items(chunks, items):
+                        yield parse(item) if parse is not None else item
+            completed = True
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            if admitted and (error is not None or completed):
+                self._record_outcome(path, error)
+            elif admitted:
+                self._release(path)
+            self._finish_call(metrics, started, error)
+
+    def _run_many(self, func, items, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Internal method to fan calls out as coroutines on the running loop.
+        """
+        return run_many_async(func, items, max_workers)
+
+    async def close(self):
+        """
+        Close the pooled connections held by this client.
+        """
+        if self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,337 @@
+import asyncio
+import inspect
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+from .batch import run_many, run_many_async, DEFAULT_MAX_WORKERS
+
+DEFAULT_SCALE_INTERVAL = 15.0
+DEFAULT_COOLDOWN = 30.0
+DEFAULT_SCALE_DOWN_WINDOW = 300.0
+DEFAULT_SETTLE_TIMEOUT = 300.0
+
+ScaleEvent = namedtuple('ScaleEvent', ['container_id', 'observed', 'desired', 'delta', 'error'])
+ScaleEvent.__doc__ = """
+The outcome of reconciling one container in one autoscaler tick.
+
+Attributes:
+    container_id (str): ID of the container.
+    observed (int): Number of replicas `get_container_replicas` returned, or None if the call failed.
+    desired (int): Replica count the autoscaler is converging to after policy limits, or None.
+    delta (int): Replicas added (positive) or removed (negative) by this tick's `scale_container`
+        call; 0 if no call was made.
+    error (Exception): The exception raised by this tick's calls, or None.
+"""
+
+
+class ScalingPolicy:
+    """
+    Limits and damping applied to the replica count a metric asks for.
+
+    The cost ceiling takes precedence over `min_replicas`: the budget is a hard
+    limit, so when the per-replica rate rises until `max_cost_hourly` no longer
+    covers `min_replicas` replicas, the count is capped below `min_replicas`
+    rather than overspending. The scale-down window and cooldown do not delay a
+    scale-down the ceiling forces. A policy whose `max_vm_rate_hourly` already
+    makes the two conflict is rejected with ValueError.
+    """
+    def __init__(self, min_replicas=1, max_replicas=10, max_vm_rate_hourly=None, max_cost_hourly=None,
+                 cooldown=DEFAULT_COOLDOWN, scale_down_window=DEFAULT_SCALE_DOWN_WINDOW,
+                 settle_timeout=DEFAULT_SETTLE_TIMEOUT):
+        """
+        Args:
+            min_replicas (int, optional): Never scale below this. Defaults to 1.
+            max_replicas (int, optional): Never scale above this. Defaults to 10.
+            max_vm_rate_hourly (float, optional): The container's `max_vm_rate_hourly`, used as the
+                cost of every replica when checking `max_cost_hourly`.
+            max_cost_hourly (float, optional): Ceiling on the container's total hourly cost. Replicas are
+                costed at `max_vm_rate_hourly` or, if higher, the highest observed `rate_hourly`.
+            cooldown (float, optional): Minimum seconds between scale calls. Defaults to 30.
+            scale_down_window (float, optional): Scale down only to the highest count the metric asked
+                for over this many seconds, so short dips do not remove replicas. Defaults to 300.
+            settle_timeout (float, optional): Seconds to wait for the observed count to reach the last
+                target before trusting the observed count again. Defaults to 300.
+        """
+        if (max_cost_hourly is not None and max_vm_rate_hourly
+                and min_replicas * max_vm_rate_hourly > max_cost_hourly + 1e-9):
+            raise ValueError(f"max_cost_hourly {max_cost_hourly} cannot cover min_replicas {min_replicas} "
+                             f"at max_vm_rate_hourly {max_vm_rate_hourly}")
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.max_vm_rate_hourly = max_vm_rate_hourly
+        self.max_cost_hourly = max_cost_hourly
+        self.cooldown = cooldown
+        self.scale_down_window = scale_down_window
+        self.settle_timeout = settle_timeout
+
+    def limit(self, desired, replicas):
+        """
+        Clamp a desired replica count to the policy's bounds, then to its cost ceiling,
+        which wins over `min_replicas`.
+        """
+        count = min(self.max_replicas, max(self.min_replicas, desired))
+        if self.max_cost_hourly is not None:
+            rate = max([self.max_vm_rate_hourly or 0.0] + [replica.get('rate_hourly') or 0.0 for replica in replicas])
+            if rate > 0:
+                count = min(count, int(math.floor(self.max_cost_hourly / rate + 1e-9)))
+        return count
+
+
+class _Container:
+    __slots__ = ('metric', 'policy', 'target', 'target_at', 'scaled_at', 'recommendations')
+
+    def __init__(self, metric, policy):
+        self.metric = metric
+        self.policy = policy
+        self.target = None
+        self.target_at = 0.0
+        self.scaled_at = None
+        self.recommendations = deque()
+
+
+class ContainerAutoscaler:
+    """
+    Reconciles the replica count of many containers against a metric.
+
+    `scale_container` takes a relative delta, so scaling from a stale count
+    over- or under-shoots. The autoscaler instead remembers the absolute
+    target of its last scale call and computes every delta against that
+    target until `get_container_replicas` shows it was reached, so repeated
+    ticks never stack deltas. Each tick fetches every container's replicas
+    concurrently, asks each container's metric callback for a desired count,
+    applies the policy (bounds, cost ceiling, scale-down window, cooldown),
+    then issues all needed `scale_container` calls as one concurrent batch.
+    Scale-ups apply immediately; scale-downs wait until the metric has stayed
+    low for the whole window. One background thread (or asyncio task) serves
+    every container.
+
+    Example:
+        def desired(container_id, replicas):
+            return math.ceil(queue_depth(container_id) / 50)
+
+        with ContainerAutoscaler(api, interval=15) as autoscaler:
+            autoscaler.add(container_id, desired, max_replicas=20, max_vm_rate_hourly=0.5,
+                           max_cost_hourly=8)
+            ...
+
+    With AsyncTensorDockAPI, use `async with`; metric callbacks may then be coroutines.
+    """
+    def __init__(self, api, interval=DEFAULT_SCALE_INTERVAL, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            api (TensorDockAPI or AsyncTensorDockAPI): Client to observe and scale with.
+            interval (float, optional): Seconds between ticks of the background loop. Defaults to 15.
+            max_workers (int, optional): Maximum concurrent API calls per tick. Defaults to 10.
+        """
+        self.api = api
+        self.interval = interval
+        self.max_workers = max_workers
+        self.last_events = []
+        self.last_error = None
+        self._containers = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._task = None
+
+    def add(self, container_id, metric, policy=None, **kwargs):
+        """
+        Start autoscaling a container.
+
+        Args:
+            container_id (str): ID of the container.
+            metric (callable): Called as `metric(container_id, replicas)` with the observed `result`
+                list of `get_container_replicas`; returns the desired number of replicas.
+            policy (ScalingPolicy, optional): Limits to apply. Keyword arguments build one if omitted.
+            **kwargs: Arguments for ScalingPolicy.
+        """
+        with self._lock:
+            self._containers[container_id] = _Container(metric, policy or ScalingPolicy(**kwargs))
+
+    def remove(self, container_id):
+        """
+        Stop autoscaling a container. Its replicas are left as they are.
+        """
+        with self._lock:
+            self._containers.pop(container_id, None)
+
+    def target(self, container_id):
+        """
+        The replica count the last scale call aimed for, or None once it was observed.
+        """
+        state = self._containers.get(container_id)
+        return None if state is None else state.target
+
+    # Reconciliation
+
+    def _plan(self, state, response, desired, now):
+        """
+        Decide the delta for one container. Returns (desired, delta).
+        """
+        policy = state.policy
+        replicas = response.get('result') or []
+        observed = len(replicas)
+        if state.target is not None and (observed == state.target or now - state.target_at > policy.settle_timeout):
+            state.target = None
+        current = observed if state.target is None else state.target
+
+        desired = policy.limit(int(math.ceil(desired)), replicas)
+        window = state.recommendations
+        window.append((now, desired))
+        while window and now - window[0][0] > policy.scale_down_window:
+            window.popleft()
+        over_budget = False
+        if desired < current:
+            damped = min(current, max(value for _, value in window))
+            # The window holds counts limited at earlier rates; the budget is a hard limit, so cap them
+            # at the current cost ceiling, and let a scale-down it forces skip the window and cooldown.
+            desired = min(damped, policy.limit(damped, replicas))
+            over_budget = policy.limit(current, replicas) < current
+
+        delta = desired - current
+        if delta and not over_budget and state.scaled_at is not None and now - state.scaled_at < policy.cooldown:
+            delta = 0
+        return desired, delta
+
+    def _decide(self, containers, responses, desired):
+        now = time.monotonic()
+        return {
+            container_id: self._plan(containers[container_id], response, desired[container_id], now)
+            for container_id, response in responses.items() if not isinstance(response, Exception)
+        }
+
+    def _finish(self, containers, responses, plans, results):
+        now = time.monotonic()
+        events = []
+        for container_id, response in responses.items():
+            if isinstance(response, Exception):
+                events.append(ScaleEvent(container_id, None, None, 0, response))
+                continue
+            target, delta = plans[container_id]
+            error = results.get((container_id, delta)) if delta else None
+            if isinstance(error, Exception):
+                delta = 0
+            else:
+                error = None
+                if delta:
+                    state = containers[container_id]
+                    state.target, state.target_at, state.scaled_at = target, now, now
+            events.append(ScaleEvent(container_id, len(response.get('result') or []), target, delta, error))
+        self.last_events = events
+        return events
+
+    def _scale(self, change):
+        container_id, delta = change
+        return self.api.containers.scale_container(container_id, delta)
+
+    @staticmethod
+    def _changes(plans):
+        return [(container_id, delta) for container_id, (_, delta) in plans.items() if delta]
+
+    def _observe(self, containers, responses):
+        """
+        Yield (container_id, metric result) for every container whose replicas were fetched;
+        a metric that raises marks the container as failed.
+        """
+        for container_id, response in list(responses.items()):
+            if isinstance(response, Exception):
+                continue
+            try:
+                yield container_id, containers[container_id].metric(container_id, response.get('result') or [])
+            except Exception as error:
+                responses[container_id] = error
+
+    def tick(self):
+        """
+        Reconcile every container once.
+
+        Returns:
+            list: A ScaleEvent per container.
+        """
+        with self._lock:
+            containers = dict(self._containers)
+        responses = run_many(self.api.containers.get_container_replicas, containers, self.max_workers)
+        desired = dict(self._observe(containers, responses))
+        plans = self._decide(containers, responses, desired)
+        results = run_many(self._scale, self._changes(plans), self.max_workers)
+        return self._finish(containers, responses, plans, results)
+
+    async def tick_async(self):
+        """
+        Coroutine counterpart of `tick` for AsyncTensorDockAPI.
+        """
+        with self._lock:
+            containers = dict(self._containers)
+        responses = await run_many_async(self.api.containers.get_container_replicas, containers, self.max_workers)
+        desired = {}
+        for container_id, value in self._observe(containers, responses):
+            try:
+                desired[container_id] = await value if inspect.isawaitable(value) else value
+            except Exception as error:
+                responses[container_id] = error
+        plans = self._decide(containers, responses, desired)
+        results = await run_many_async(self._scale, self._changes(plans), self.max_workers)
+        return self._finish(containers, responses, plans, results)
+
+    # Background loop
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.tick()
+            except Exception as error:
+                self.last_error = error
+            self._stopped.wait(self.interval)
+
+    async def _run_async(self):
+        while not self._stopped.is_set():
+            try:
+                await self.tick_async()
+            except Exception as error:
+                self.last_error = error
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        Start ticking on a background thread. Returns the autoscaler.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='tensordock-autoscaler', daemon=True)
+            self._thread.start()
+        return self
+
+    async def start_async(self):
+        """
+        Start ticking in a task on the running event loop. Returns the autoscaler.
+        """
+        if self._task is None or self._task.done():
+            self._stopped.clear()
+            self._task = asyncio.ensure_future(self._run_async())
+        return self
+
+    def stop(self):
+        """
+        Stop the background thread or task after its current tick.
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def __aenter__(self):
+        return await self.start_async()
+
+    async def __aexit__(self, *exc_info):
+        self.stop()
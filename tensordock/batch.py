@@ -0,0 +1,58 @@
+DEFAULT_MAX_WORKERS = 10
+
+
+def run_many(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Call `func(item)` for every item through a bounded thread pool.
+
+    Args:
+        func (callable): Function to call with each item.
+        items (iterable): Items to process. Duplicates are processed once.
+        max_workers (int, optional): Maximum number of concurrent calls. Defaults to 10.
+
+    Returns:
+        dict: A mapping of each item to its result, or to the exception it raised.
+        One failing item never prevents the others from completing.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    items = list(dict.fromkeys(items))
+    if not items:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {item: executor.submit(func, item) for item in items}
+
+    results = {}
+    for item, future in futures.items():
+        error = future.exception()
+        results[item] = error if error is not None else future.result()
+    return results
+
+
+async def run_many_async(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Await `func(item)` for every item with at most `max_workers` in flight.
+
+    Args:
+        func (callable): Coroutine function to call with each item.
+        items (iterable): Items to process. Duplicates are processed once.
+        max_workers (int, optional): Maximum number of concurrent calls. Defaults to 10.
+
+    Returns:
+        dict: A mapping of each item to its result, or to the exception it raised.
+    """
+    import asyncio
+
+    items = list(dict.fromkeys(items))
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(item):
+        async with semaphore:
+            try:
+                return await func(item)
+            except Exception as error:
+                return error
+
+    results = await asyncio.gather(*(run(item) for item in items))
+    return dict(zip(items, results))
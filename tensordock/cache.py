@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import parse_qsl, urlencode
+
+FOREVER = math.inf
+
+DEFAULT_TTLS = {
+    'client/deploy/hostnodes': 30,
+    'client/list': 10,
+    'client/get/single': 10,
+    'auth/list': 300,
+    'billing/summary': 300,
+}
+
+DEFAULT_MAXSIZE = 1024
+
+# Mutating calls and the cached reads they make stale. A read listed with a
+# parameter name is only invalidated for the VM the mutation targeted.
+INVALIDATES = {
+    'client/start/single': (('client/list', None), ('client/get/single', 'server')),
+    'client/stop/single': (('client/list', None), ('client/get/single', 'server')),
+    'client/delete/single': (('client/list', None), ('client/get/single', 'server')),
+    'client/modify/single': (('client/list', None), ('client/get/single', 'server_id')),
+    'client/deploy/single': (('client/list', None), ('client/deploy/hostnodes', None)),
+}
+
+
+def _matches(path, prefix):
+    return path == prefix or path.startswith(prefix + '/')
+
+
+def _current_period():
+    now = time.gmtime()
+    return f"{now.tm_year:04d}-{now.tm_mon:02d}"
+
+
+def _mark_hit(metrics):
+    if metrics is not None:
+        metrics.cache_hit = True
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache for read-only API responses.
+
+    Each cacheable endpoint has its own TTL. Concurrent identical calls share
+    a single in-flight request, and mutating VM calls evict the cached
+    `list_vms`/`get_vm_details` entries they make stale. Monthly summaries
+    for closed billing periods never change, so they are kept indefinitely
+    and, when `disk_path` is set, persisted across processes.
+
+    Cached responses are shared between callers and must be treated as
+    read-only.
+
+    Example:
+        api = TensorDockAPI(api_key, api_token, cache=ResponseCache(ttls={'client/list': 5}))
+    """
+    def __init__(self, ttls=None, maxsize=DEFAULT_MAXSIZE, disk_path=None):
+        """
+        Args:
+            ttls (dict, optional): Endpoint path (e.g. "client/list") to TTL in seconds, merged
+                over DEFAULT_TTLS. A TTL of None disables caching for that endpoint.
+            maxsize (int, optional): Maximum number of cached responses. Defaults to 1024.
+            disk_path (str, optional): Directory to persist closed billing periods in.
+        """
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.maxsize = maxsize
+        self.disk_path = disk_path
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_async = {}
+        self._generation = 0
+
+    def ttl_for(self, path, data=None):
+        """
+        Return the TTL in seconds for a call, FOREVER for immutable responses,
+        or None if the call is not cacheable.
+        """
+        if path == 'billing/summary' and self.ttls.get(path) is not None:
+            if (data or {}).get('period', '9999-99') < _current_period():
+                return FOREVER
+        for prefix, ttl in self.ttls.items():
+            if _matches(path, prefix):
+                return ttl
+        return None
+
+    @staticmethod
+    def key_for(path, data=None):
+        return (path, urlencode(sorted((data or {}).items()), doseq=True))
+
+    def get(self, key):
+        """
+        Return the cached response for `key`, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+        value = self._load(key)
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+                self._store(key, value, FOREVER)
+            else:
+                self.misses += 1
+        return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._store(key, value, ttl)
+        if ttl == FOREVER:
+            self._dump(key, value)
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, path=None, **params):
+        """
+        Evict cached responses.
+
+        Args:
+            path (str, optional): Only evict responses for this endpoint path (and its sub-paths).
+                Evicts everything if omitted.
+            **params: Only evict responses whose call included these parameters.
+        """
+        match = urlencode(sorted(params.items()))
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                key_path, key_params = key
+                if path is not None and not _matches(key_path, path):
+                    continue
+                if match and match not in key_params.split('&'):
+                    continue
+                del self._entries[key]
+
+    def invalidate_for(self, path, data=None):
+        """
+        Evict the cached reads made stale by a mutating call.
+        """
+        for read_path, param in INVALIDATES.get(path, ()):
+            if param is None:
+                self.invalidate(read_path)
+            elif (data or {}).get(param) is not None:
+                self.invalidate(read_path, server=data[param])
+
+    def clear(self):
+        self.invalidate()
+
+    def _disk_file(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_path, f"{digest}.json")
+
+    def _load(self, key):
+        if not self.disk_path or self.ttl_for(key[0], dict(parse_qsl(key[1]))) != FOREVER:
+            return None
+        try:
+            with open(self._disk_file(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _dump(self, key, value):
+        if not self.disk_path:
+            return
+        fd, temp = tempfile.mkstemp(dir=self.disk_path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f)
+        os.replace(temp, self._disk_file(key))
+
+    def fetch(self, path, data, send, metrics=None):
+        """
+        Serve a call from the cache, or perform it with `send()` while sharing
+        the in-flight request with identical concurrent calls.
+
+        Args:
+            path (str): Endpoint path of the call.
+            data (dict): Parameters of the call.
+            send (callable): Performs the call when it cannot be served from the cache.
+            metrics (RequestMetrics, optional): Marked as a cache hit when the call is
+                answered by the cache or by a shared in-flight request.
+        """
+        ttl = self.ttl_for(path, data)
+        if ttl is None:
+            try:
+                return send()
+            finally:
+                self.invalidate_for(path, data)
+
+        key = self.key_for(path, data)
+        value = self.get(key)
+        if value is not None:
+            _mark_hit(metrics)
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            generation = self._generation
+        if not owner:
+            _mark_hit(metrics)
+            return future.result()
+
+        try:
+            value = send()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        if generation == self._generation:
+            self.set(key, value, ttl)
+        return value
+
+    async def fetch_async(self, path, data, send, metrics=None):
+        """
+        Coroutine counterpart of `fetch`; `send()` returns an awaitable.
+        """
+        ttl = self.ttl_for(path, data)
+        if ttl is None:
+            try:
+                return await send()
+            finally:
+                self.invalidate_for(path, data)
+
+        key = self.key_for(path, data)
+        value = self.get(key)
+        if value is not None:
+            _mark_hit(metrics)
+            return value
+
+        future = self._inflight_async.get(key)
+        if future is not None:
+            _mark_hit(metrics)
+            return await asyncio.shield(future)
+
+        future = self._inflight_async[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        try:
+            value = await send()
+        except Exception as error:
+            future.set_exception(error)
+            # Mark the exception as retrieved when no other caller was waiting on it.
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._inflight_async[key]
+        if generation == self._generation:
+            self.set(key, value, ttl)
+        return value
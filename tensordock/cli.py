@@ -0,0 +1,397 @@
+"""
+The `tensordock` command-line tool.
+
+Only the standard library is imported up front; the client, and modules
+needing numpy, are imported inside the handler of the subcommand that uses them.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+
+ENV_API_KEY = 'TENSORDOCK_API_KEY'
+ENV_API_TOKEN = 'TENSORDOCK_API_TOKEN'
+ENV_BASE_URL = 'TENSORDOCK_BASE_URL'
+
+OUTPUT_FORMATS = ('table', 'json', 'csv')
+VM_COLUMNS = ('id', 'name', 'status', 'gpu_model', 'gpu_count', 'vcpus', 'ram', 'storage', 'cost', 'hostnode')
+RESULT_COLUMNS = ('id', 'name', 'ok', 'error')
+
+
+class CLIError(Exception):
+    """
+    A usage or configuration error reported without a traceback.
+    """
+
+
+# Output
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return str(value)
+
+
+def _columns(rows, columns):
+    if columns is not None:
+        return list(columns)
+    found = {}
+    for row in rows:
+        found.update(dict.fromkeys(row))
+    return list(found)
+
+
+def write_rows(rows, output='table', columns=None, stream=None):
+    """
+    Write a list of flat dicts as an aligned table, JSON or CSV.
+    """
+    stream = stream or sys.stdout
+    if output == 'json':
+        json.dump(rows, stream, indent=2, default=str)
+        stream.write('\n')
+        return
+    columns = _columns(rows, columns)
+    if not columns:
+        # No rows and no fixed columns: there is not even a header to write.
+        return
+    if output == 'csv':
+        import csv
+        writer = csv.DictWriter(stream, columns, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows({column: _cell(row.get(column)) for column in columns} for row in rows)
+        return
+    cells = [[_cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(line[i]) for line in cells]) for i, column in enumerate(columns)]
+    stream.write('  '.join(column.upper().ljust(width) for column, width in zip(columns, widths)).rstrip() + '\n')
+    for line in cells:
+        stream.write('  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() + '\n')
+
+
+def _vm_row(server, vm):
+    specs = vm.get('specs') or {}
+    gpu = specs.get('gpu') or {}
+    return {
+        'id': server,
+        'name': vm.get('name'),
+        'status': vm.get('status'),
+        'gpu_model': gpu.get('type'),
+        'gpu_count': gpu.get('amount'),
+        'vcpus': specs.get('vcpus'),
+        'ram': specs.get('ram'),
+        'storage': specs.get('storage'),
+        'cost': vm.get('cost'),
+        'hostnode': vm.get('hostnode'),
+    }
+
+
+def _result_rows(results, names=None):
+    """
+    Rows for a {id: result or exception} map from a bulk operation.
+    """
+    names = names or {}
+    return [{
+        'id': item,
+        'name': names.get(item),
+        'ok': not isinstance(result, Exception),
+        'error': str(result) if isinstance(result, Exception) else None,
+    } for item, result in results.items()]
+
+
+# Client and selection
+
+def make_client(args):
+    """
+    Build a TensorDockAPI from the command-line options and environment.
+    """
+    api_key = args.api_key or os.environ.get(ENV_API_KEY)
+    api_token = args.api_token or os.environ.get(ENV_API_TOKEN)
+    if not api_key or not api_token:
+        raise CLIError(f"Credentials are required: pass --api-key/--api-token or set {ENV_API_KEY} "
+                       f"and {ENV_API_TOKEN}.")
+    from .api import TensorDockAPI
+    api = TensorDockAPI(api_key, api_token, pool_maxsize=args.parallel)
+    base_url = args.base_url or os.environ.get(ENV_BASE_URL)
+    if base_url:
+        api.base_url = base_url.rstrip('/')
+    return api
+
+
+def _matcher(args):
+    if getattr(args, 'regex', None):
+        pattern = re.compile(args.regex)
+        return lambda name: pattern.search(name or '') is not None
+    if getattr(args, 'name', None):
+        return lambda name: fnmatch.fnmatchcase(name or '', args.name)
+    return None
+
+
+def _matching(vms, args):
+    """
+    Yield (UUID, VM) for the VMs whose name matches --name/--regex and whose status matches --status.
+    """
+    matcher = _matcher(args)
+    status = args.status.lower() if getattr(args, 'status', None) else None
+    for server, vm in vms.items():
+        if matcher is not None and not matcher(vm.get('name')):
+            continue
+        if status is not None and (vm.get('status') or '').lower() != status:
+            continue
+        yield server, vm
+
+
+def select_vms(api, args):
+    """
+    Resolve the VMs an operation targets: the UUIDs given, plus every VM
+    matching --name (glob), --regex or --status.
+
+    Returns:
+        dict: A mapping of VM UUID to VM name (None for UUIDs given directly).
+
+    Raises:
+        CLIError: If no selection was given.
+    """
+    selected = dict.fromkeys(args.servers or ())
+    if _matcher(args) is not None or args.status:
+        vms = api.virtual_machines.list_vms().get('virtualmachines') or {}
+        selected.update((server, vm.get('name')) for server, vm in _matching(vms, args))
+    elif not selected:
+        raise CLIError("Select VMs by UUID, --name, --regex or --status.")
+    return selected
+
+
+# Commands
+
+def cmd_vms_list(api, args):
+    vms = api.virtual_machines.list_vms().get('virtualmachines') or {}
+    return [_vm_row(server, vm) for server, vm in _matching(vms, args)], VM_COLUMNS
+
+
+def cmd_vms_get(api, args):
+    servers = select_vms(api, args)
+    results = api.virtual_machines.get_details_many(servers, args.parallel)
+    rows = []
+    for server, result in results.items():
+        if isinstance(result, Exception):
+            rows.append({'id': server, 'error': str(result)})
+        else:
+            rows.append(_vm_row(server, result.get('virtualmachine') or {}))
+    return rows, None
+
+
+def _bulk(method):
+    def command(api, args):
+        servers = select_vms(api, args)
+        if not servers:
+            raise CLIError("No VMs matched.")
+        if args.dry_run:
+            return [{'id': server, 'name': name} for server, name in servers.items()], ('id', 'name')
+        if method == 'delete' and not args.yes:
+            raise CLIError(f"Refusing to delete {len(servers)} VM(s) without --yes (use --dry-run to list them).")
+        vms = api.virtual_machines
+        if method == 'start':
+            results = vms.start_many(servers, args.parallel)
+        elif method == 'stop':
+            results = vms.stop_many(servers, args.disassociate_resources, args.parallel)
+        elif method == 'delete':
+            results = vms.delete_many(servers, args.parallel)
+        else:
+            changes = {key: getattr(args, key) for key in ('gpu_model', 'gpu_count', 'vcpus', 'ram', 'storage')
+                       if getattr(args, key) is not None}
+            if not changes:
+                raise CLIError("Nothing to modify: pass at least one of --gpu-model, --gpu-count, --vcpus, "
+                               "--ram or --storage.")
+            results = api._run_many(lambda server: vms.modify_vm(server, **changes), servers, args.parallel)
+        return _result_rows(results, servers), RESULT_COLUMNS
+    return command
+
+
+def cmd_hostnodes_search(api, args):
+    from .marketplace import HostnodeIndex
+    index = HostnodeIndex.from_api(api, min_gpu_count=args.gpu_count)
+    offers = index.cheapest(
+        k=args.limit, max_price=args.max_price, gpu_model=args.gpu_model, gpu_count=args.gpu_count,
+        vcpus=args.vcpus, ram=args.ram, storage=args.storage, countries=args.country, regions=args.region,
+        cities=args.city, min_uptime=args.min_uptime, min_ports=args.min_ports,
+    )
+    rows = []
+    for offer in offers:
+        location = index.raw[offer.hostnode_id].get('location') or {}
+        rows.append({
+            'hostnode': offer.hostnode_id,
+            'gpu_model': offer.gpu_model,
+            'gpu_count': offer.gpu_count,
+            'price_hourly': round(offer.price_hourly, 4),
+            'city': location.get('city'),
+            'region': location.get('region'),
+            'country': location.get('country'),
+            'uptime': (index.raw[offer.hostnode_id].get('status') or {}).get('uptime'),
+        })
+    return rows, None
+
+
+def cmd_containers_scale(api, args):
+    result = api.containers.scale_container(args.container_id, args.replicas)
+    return [{'id': args.container_id, 'replicas': args.replicas, 'ok': bool(result.get('success', True))}], None
+
+
+def cmd_containers_replicas(api, args):
+    replicas = api.containers.get_container_replicas(args.container_id).get('result') or []
+    return replicas, None
+
+
+def cmd_billing_balance(api, args):
+    return [api.billing.get_balance()], ('balance', 'hourly_cost')
+
+
+def cmd_billing_summary(api, args):
+    periods = args.periods
+    if args.to is not None:
+        from .ledger import period_range
+        periods = period_range(periods[0], args.to)
+    results = api._run_many(api.billing.get_monthly_summary, periods, args.parallel)
+    rows = []
+    for period, summary in results.items():
+        if isinstance(summary, Exception):
+            rows.append({'period': period, 'error': str(summary)})
+            continue
+        changes = summary.get('changes') or {}
+        rows.append({
+            'period': period,
+            'previous_balance': summary.get('previous_balance'),
+            'expenses': changes.get('expenses'),
+            'payouts': changes.get('payouts'),
+            'final_balance': summary.get('final_balance'),
+        })
+    return rows, None
+
+
+# Parser
+
+def _parallelism(value):
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid count: {value!r}") from None
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {count}")
+    return count
+
+
+def _add_selection(parser, servers=True):
+    if servers:
+        parser.add_argument('servers', nargs='*', metavar='UUID', help="VM UUIDs.")
+    parser.add_argument('--name', help="Select VMs whose name matches this glob, e.g. 'train-*'.")
+    parser.add_argument('--regex', help="Select VMs whose name matches this regular expression.")
+    parser.add_argument('--status', help="Select VMs with this status, e.g. Running.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='tensordock', description="Manage TensorDock VMs, containers and billing.")
+    parser.add_argument('--api-key', help=f"API key. Defaults to ${ENV_API_KEY}.")
+    parser.add_argument('--api-token', help=f"API token. Defaults to ${ENV_API_TOKEN}.")
+    parser.add_argument('--base-url', help=f"API base URL. Defaults to ${ENV_BASE_URL} or the public API.")
+    parser.add_argument('-o', '--output', choices=OUTPUT_FORMATS, default='table', help="Output format.")
+    parser.add_argument('-p', '--parallel', type=_parallelism, default=10, metavar='N',
+                        help="Run up to N API calls concurrently. Defaults to 10.")
+    # Let -o and -p also follow the subcommand without overriding the top-level defaults.
+    common = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+    common.add_argument('-o', '--output', choices=OUTPUT_FORMATS, help="Output format.")
+    common.add_argument('-p', '--parallel', type=_parallelism, metavar='N', help="Run up to N API calls concurrently.")
+    groups = parser.add_subparsers(dest='group', metavar='COMMAND')
+    groups.required = True
+
+    vms = groups.add_parser('vms', help="Virtual machines.").add_subparsers(dest='command', metavar='ACTION')
+    vms.required = True
+    command = vms.add_parser('list', parents=[common], help="List VMs.")
+    _add_selection(command, servers=False)
+    command.set_defaults(handler=cmd_vms_list)
+    command = vms.add_parser('get', parents=[common], help="Show VM details.")
+    _add_selection(command)
+    command.set_defaults(handler=cmd_vms_get)
+    for action, description in (('start', "Start VMs."), ('stop', "Stop VMs."), ('delete', "Delete VMs."),
+                                ('modify', "Change VM specs.")):
+        command = vms.add_parser(action, parents=[common], help=description)
+        _add_selection(command)
+        command.add_argument('--dry-run', action='store_true', help="Only list the selected VMs.")
+        if action == 'stop':
+            command.add_argument('--disassociate-resources', action='store_true',
+                                 help="Release the VMs' GPUs while stopped.")
+        if action == 'delete':
+            command.add_argument('-y', '--yes', action='store_true', help="Confirm deletion.")
+        if action == 'modify':
+            command.add_argument('--gpu-model')
+            command.add_argument('--gpu-count', type=int)
+            command.add_argument('--vcpus', type=int)
+            command.add_argument('--ram', type=int, help="RAM in GB.")
+            command.add_argument('--storage', type=int, help="Storage in GB.")
+        command.set_defaults(handler=_bulk(action))
+
+    hostnodes = groups.add_parser('hostnodes', help="Hostnode marketplace.").add_subparsers(dest='command',
+                                                                                            metavar='ACTION')
+    hostnodes.required = True
+    command = hostnodes.add_parser('search', parents=[common],
+                                   help="Find the cheapest hostnodes for a spec (requires numpy).")
+    command.add_argument('--gpu-model', action='append', help="Accepted GPU model; repeat for several.")
+    command.add_argument('--gpu-count', type=int, default=0)
+    command.add_argument('--vcpus', type=int, default=0)
+    command.add_argument('--ram', type=int, default=0, help="RAM in GB.")
+    command.add_argument('--storage', type=int, default=0, help="Storage in GB.")
+    command.add_argument('--country', action='append')
+    command.add_argument('--region', action='append')
+    command.add_argument('--city', action='append')
+    command.add_argument('--min-uptime', type=float)
+    command.add_argument('--min-ports', type=int, default=0)
+    command.add_argument('--max-price', type=float, help="Maximum total hourly price.")
+    command.add_argument('--limit', type=int, default=10, help="Number of offers. Defaults to 10.")
+    command.set_defaults(handler=cmd_hostnodes_search)
+
+    containers = groups.add_parser('containers', help="Containers.").add_subparsers(dest='command',
+                                                                                    metavar='ACTION')
+    containers.required = True
+    command = containers.add_parser('scale', parents=[common], help="Add (positive) or remove (negative) replicas.")
+    command.add_argument('container_id')
+    command.add_argument('replicas', type=int)
+    command.set_defaults(handler=cmd_containers_scale)
+    command = containers.add_parser('replicas', parents=[common], help="List a container's replicas.")
+    command.add_argument('container_id')
+    command.set_defaults(handler=cmd_containers_replicas)
+
+    billing = groups.add_parser('billing', help="Billing.").add_subparsers(dest='command', metavar='ACTION')
+    billing.required = True
+    command = billing.add_parser('balance', parents=[common], help="Show the balance and hourly cost.")
+    command.set_defaults(handler=cmd_billing_balance)
+    command = billing.add_parser('summary', parents=[common], help="Show monthly summaries.")
+    command.add_argument('periods', nargs='+', metavar='YYYY-MM')
+    command.add_argument('--to', metavar='YYYY-MM', help="Fetch every period from the first one to this one.")
+    command.set_defaults(handler=cmd_billing_summary)
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the `tensordock` console script. Returns the exit status.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        api = make_client(args)
+        try:
+            rows, columns = args.handler(api, args)
+        finally:
+            api.close()
+    except (CLIError, ImportError) as error:
+        print(f"tensordock: {error}", file=sys.stderr)
+        return 2
+    except Exception as error:
+        print(f"tensordock: {error}", file=sys.stderr)
+        return 1
+    write_rows(rows, args.output, columns)
+    failed = any(row.get('ok') is False or row.get('error') for row in rows if isinstance(row, dict))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,22 @@
-from .authorization import Authorization
-from .virtual_machines import VirtualMachines
-from .containers import Containers
-from .billing import Billing
+from importlib import import_module
+
+__all__ = ['Authorization', 'VirtualMachines', 'Containers', 'Billing']
+
+_LAZY = {
+    'Authorization': '.authorization',
+    'VirtualMachines': '.virtual_machines',
+    'Containers': '.containers',
+    'Billing': '.billing',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,28 @@
+class Endpoint:
+    """
+    Base class for endpoint groups. Subclasses set `prefix` to the path the
+    group lives under and describe each call; the owning client performs it.
+    """
+    prefix = None
+
+    def __init__(self, api):
+        self.api = api
+
+    def _make_request(self, endpoint, data=None, method='post', parse=None):
+        """
+        Internal method to make API requests.
+
+        Returns the decoded response, passed through `parse` when given, for
+        TensorDockAPI, or an awaitable resolving to it for AsyncTensorDockAPI.
+        """
+        return self.api._request(f"{self.prefix}/{endpoint}", data, method, parse)
+
+    def _stream_request(self, endpoint, data=None, method='post', items=(), parse=None):
+        """
+        Internal method to make API requests whose response is parsed incrementally.
+
+        Returns a generator (TensorDockAPI) or async generator (AsyncTensorDockAPI)
+        over the entries of the container found at the `items` key path, each
+        passed through `parse` when given.
+        """
+        return self.api._stream(f"{self.prefix}/{endpoint}", data, method, items, parse)
@@ -1,26 +1,7 @@
-import requests
-from ..exceptions import TensorDockAPIException
+from .base import Endpoint
 
-class Billing:
-    def __init__(self, api):
-        self.api = api
-
-    def _make_request(self, endpoint, data=None):
-        """
-        Internal method to make API requests.
-        """
-        url = f"{self.api.base_url}/billing/{endpoint}"
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        data = data or {}
-        data['api_key'] = self.api.api_key
-        data['api_token'] = self.api.api_token
-        
-        response = requests.post(url, data=data, headers=headers)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise TensorDockAPIException(f"Error in billing/{endpoint}: {response.text}")
+class Billing(Endpoint):
+    prefix = 'billing'
 
     def get_balance(self):
         """
@@ -38,7 +19,7 @@ class Billing:
         """
         return self._make_request('balance')
 
-    def get_revenue(self, start_timestamp=None, end_timestamp=None, hostnode_id=None):
+    def get_revenue(self, start_timestamp=None, end_timestamp=None, hostnode_id=None, stream=False):
         """
         Retrieve revenue information for hosting providers.
 
@@ -46,6 +27,8 @@ class Billing:
             start_timestamp (str, optional): Start timestamp of the period to retrieve historical data for.
             end_timestamp (str, optional): End timestamp of the period to retrieve historical data for.
             hostnode_id (str, optional): Hostnode to filter data by.
+            stream (bool, optional): Parse the response incrementally and return an iterator of
+                per-hostnode revenue records (the entries of `data`) as they arrive. Defaults to False.
 
         Returns:
             dict: A dictionary containing revenue data for each hostnode.
@@ -86,7 +69,10 @@ class Billing:
             'end_timestamp': end_timestamp,
             'hostnode_id': hostnode_id
         }
-        return self._make_request('revenue', {k: v for k, v in data.items() if v is not None})
+        data = {k: v for k, v in data.items() if v is not None}
+        if stream:
+            return self._stream_request('revenue', data, items=('data',))
+        return self._make_request('revenue', data)
 
     def get_monthly_summary(self, period):
         """
@@ -1,29 +1,8 @@
-import requests
-from ..exceptions import TensorDockAPIException
+from ..waiters import DEFAULT_WAIT_TIMEOUT
+from .base import Endpoint
 
-class Containers:
-    def __init__(self, api):
-        self.api = api
-
-    def _make_request(self, endpoint, data=None, method='post'):
-        """
-        Internal method to make API requests.
-        """
-        url = f"{self.api.base_url}/client/container/{endpoint}"
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        data = data or {}
-        data['api_key'] = self.api.api_key
-        data['api_token'] = self.api.api_token
-        
-        if method.lower() == 'get':
-            response = requests.get(url, params=data, headers=headers)
-        else:
-            response = requests.post(url, data=data, headers=headers)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise TensorDockAPIException(f"Error in client/container/{endpoint}: {response.text}")
+class Containers(Endpoint):
+    prefix = 'client/container'
 
     def deploy_container(self, **kwargs):
         """
@@ -125,3 +104,23 @@ class Containers:
             }
         """
         return self._make_request(f'{container_id}/replicas', method='get')
+
+    def wait_for_replicas(self, container_id, count, timeout=DEFAULT_WAIT_TIMEOUT):
+        """
+        Block until a container has exactly `count` replicas.
+
+        All waiters on the same client share one poller that calls
+        `get_container_replicas` once per container per tick.
+
+        Args:
+            container_id (str): ID of the container.
+            count (int): Number of replicas to wait for.
+            timeout (float, optional): Seconds to wait before giving up. Defaults to 600.
+
+        Returns:
+            list: The container's replicas, as in the `result` list of `get_container_replicas`.
+
+        Raises:
+            TensorDockTimeoutError: If the replica count was not reached within `timeout`.
+        """
+        return self.api.status_poller.wait_for_replicas(container_id, count, timeout)
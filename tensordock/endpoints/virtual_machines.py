@@ -1,36 +1,24 @@
-import requests
-from ..exceptions import TensorDockAPIException
-
-class VirtualMachines:
-    def __init__(self, api):
-        self.api = api
-
-    def _make_request(self, endpoint, data=None, method='post'):
-        """
-        Internal method to make API requests.
-        """
-        url = f"{self.api.base_url}/client/{endpoint}"
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        data = data or {}
-        data['api_key'] = self.api.api_key
-        data['api_token'] = self.api.api_token
-        
-        if method.lower() == 'get':
-            response = requests.get(url, params=data, headers=headers)
-        else:
-            response = requests.post(url, data=data, headers=headers)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise TensorDockAPIException(f"Error in client/{endpoint}: {response.text}")
-
-    def get_available_hostnodes(self, min_gpu_count=0):
+from functools import partial
+
+from ..batch import DEFAULT_MAX_WORKERS
+from ..models import Hostnode, VM, parse_hostnodes, parse_vms
+from ..waiters import DEFAULT_WAIT_TIMEOUT
+from .base import Endpoint
+
+class VirtualMachines(Endpoint):
+    prefix = 'client'
+
+    def get_available_hostnodes(self, min_gpu_count=0, typed=False, stream=False):
         """
         Retrieve a list of available hostnodes.
 
         Args:
             min_gpu_count (int, optional): Minimum number of GPUs required. Defaults to 0.
+            typed (bool, optional): Return a dict of hostnode UUID to Hostnode models
+                instead of the raw response. Defaults to False.
+            stream (bool, optional): Parse the response incrementally and return an iterator of
+                `(hostnode_uuid, hostnode)` pairs as they arrive, so memory is bounded by one
+                hostnode rather than the whole marketplace. Defaults to False.
 
         Returns:
             dict: A dictionary containing information about available hostnodes.
@@ -83,14 +71,20 @@ class VirtualMachines:
                 "success": true
             }
         """
-        return self._make_request(f'deploy/hostnodes?minGPUCount={min_gpu_count}', method='get')
-
-    def get_hostnode_details(self, hostnode_uuid):
+        data = {'minGPUCount': min_gpu_count}
+        if stream:
+            parse = (lambda item: (item[0], Hostnode(*item))) if typed else None
+            return self._stream_request('deploy/hostnodes', data, method='get', items=('hostnodes',), parse=parse)
+        parse = parse_hostnodes if typed else None
+        return self._make_request('deploy/hostnodes', data, method='get', parse=parse)
+
+    def get_hostnode_details(self, hostnode_uuid, typed=False):
         """
         Retrieve details for a specific hostnode.
 
         Args:
             hostnode_uuid (str): UUID of the hostnode.
+            typed (bool, optional): Return a Hostnode model instead of the raw response. Defaults to False.
 
         Returns:
             dict: A dictionary containing details of the specified hostnode.
@@ -141,7 +135,8 @@ class VirtualMachines:
                 }
             }
         """
-        return self._make_request(f'deploy/hostnodes/{hostnode_uuid}', method='get')
+        parse = (lambda response: Hostnode(hostnode_uuid, response[hostnode_uuid])) if typed else None
+        return self._make_request(f'deploy/hostnodes/{hostnode_uuid}', method='get', parse=parse)
 
     def deploy_vm(self, **kwargs):
         """
@@ -214,10 +209,14 @@ class VirtualMachines:
         """
         return self._make_request('spot/validate/existing', {'server': server, 'price': price})
 
-    def list_vms(self):
+    def list_vms(self, typed=False):
         """
         List all virtual machines for the organization.
 
+        Args:
+            typed (bool, optional): Return a dict of VM UUID to VM models
+                instead of the raw response. Defaults to False.
+
         Returns:
             dict: A dictionary containing information about all VMs.
 
@@ -249,14 +248,15 @@ class VirtualMachines:
                 }
             }
         """
-        return self._make_request('list')
+        return self._make_request('list', parse=parse_vms if typed else None)
 
-    def get_vm_details(self, server):
+    def get_vm_details(self, server, typed=False):
         """
         Get details of a specific virtual machine.
 
         Args:
             server (str): UUID of the VM.
+            typed (bool, optional): Return a VM model instead of the raw response. Defaults to False.
 
         Returns:
             dict: A dictionary containing details of the specified VM.
@@ -289,7 +289,8 @@ class VirtualMachines:
                 }
             }
         """
-        return self._make_request('get/single', {'server': server})
+        parse = (lambda response: VM(server, response['virtualmachine'])) if typed else None
+        return self._make_request('get/single', {'server': server}, parse=parse)
 
     def start_vm(self, server):
         """
@@ -367,3 +368,79 @@ class VirtualMachines:
             }
         """
         return self._make_request('delete/single', {'server': server})
+
+    def get_details_many(self, servers, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Get details of many virtual machines concurrently.
+
+        Args:
+            servers (iterable): UUIDs of the VMs.
+            max_workers (int, optional): Maximum number of concurrent calls. Defaults to 10.
+                Keep this at or below the client's pool_maxsize so every call reuses a pooled connection.
+
+        Returns:
+            dict: A mapping of each UUID to its `get_vm_details` response, or to the
+            exception raised for it. A failure for one VM does not abort the others.
+        """
+        return self.api._run_many(self.get_vm_details, servers, max_workers)
+
+    def start_many(self, servers, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Start many virtual machines concurrently.
+
+        Args:
+            servers (iterable): UUIDs of the VMs to start.
+            max_workers (int, optional): Maximum number of concurrent calls. Defaults to 10.
+
+        Returns:
+            dict: A mapping of each UUID to its `start_vm` response, or to the exception raised for it.
+        """
+        return self.api._run_many(self.start_vm, servers, max_workers)
+
+    def stop_many(self, servers, disassociate_resources=False, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Stop many virtual machines concurrently.
+
+        Args:
+            servers (iterable): UUIDs of the VMs to stop.
+            disassociate_resources (bool, optional): Whether to release the GPUs when stopping. Defaults to False.
+            max_workers (int, optional): Maximum number of concurrent calls. Defaults to 10.
+
+        Returns:
+            dict: A mapping of each UUID to its `stop_vm` response, or to the exception raised for it.
+        """
+        return self.api._run_many(partial(self.stop_vm, disassociate_resources=disassociate_resources), servers, max_workers)
+
+    def delete_many(self, servers, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Delete many virtual machines concurrently.
+
+        Args:
+            servers (iterable): UUIDs of the VMs to delete.
+            max_workers (int, optional): Maximum number of concurrent calls. Defaults to 10.
+
+        Returns:
+            dict: A mapping of each UUID to its `delete_vm` response, or to the exception raised for it.
+        """
+        return self.api._run_many(self.delete_vm, servers, max_workers)
+
+    def wait_for_vm_status(self, server, status, timeout=DEFAULT_WAIT_TIMEOUT):
+        """
+        Block until a virtual machine reaches a status.
+
+        All waiters on the same client share one poller that calls `list_vms` once
+        per tick, however many VMs are being waited on.
+
+        Args:
+            server (str): UUID of the VM.
+            status (str or list): Status (or statuses) to wait for, e.g. "Running".
+                Comparison is case-insensitive. Pass None to wait for the VM to be deleted.
+            timeout (float, optional): Seconds to wait before giving up. Defaults to 600.
+
+        Returns:
+            dict: The VM as listed by `list_vms` once it reached the status, or None if it was deleted.
+
+        Raises:
+            TensorDockTimeoutError: If the status was not reached within `timeout`.
+        """
+        return self.api.status_poller.wait_for_vm_status(server, status, timeout)
@@ -1,2 +1,30 @@
 class TensorDockAPIException(Exception):
-    pass
\ No newline at end of file
+    def __init__(self, message, status_code=None, response_text=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_text = response_text
+        self.retry_after = retry_after
+
+class TensorDockTimeoutError(TensorDockAPIException, TimeoutError):
+    pass
+
+class TensorDockCircuitOpenError(TensorDockAPIException):
+    """
+    Raised without calling the API while the circuit breaker for the call's endpoint group is open.
+    `retry_after` is the number of seconds until the circuit half-opens, when known.
+    """
+
+class TensorDockDeployError(TensorDockAPIException):
+    """
+    Raised when some deployments of a batch failed.
+
+    Attributes:
+        deployed (dict): Deployments that succeeded, mapped to their `deploy_vm` response.
+        errors (dict): Deployments that failed, mapped to the exception raised.
+        rolled_back (list): UUIDs of the successfully deployed VMs that were deleted again.
+    """
+    def __init__(self, message, deployed=None, errors=None, rolled_back=None, status_code=None):
+        super().__init__(message, status_code=status_code)
+        self.deployed = deployed or {}
+        self.errors = errors or {}
+        self.rolled_back = rolled_back or []
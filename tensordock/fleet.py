@@ -0,0 +1,293 @@
+from operator import attrgetter
+
+from .batch import run_many, run_many_async
+from .ratelimit import RateLimiter, TokenBucket
+
+# Endpoint groups an org-wide rate budget is shared across.
+ENDPOINT_GROUPS = ('auth', 'client', 'container', 'billing')
+
+
+def org_rate_limiter(limit):
+    """
+    Build the rate limiter for one organization.
+
+    Args:
+        limit (tuple, TokenBucket or RateLimiter): A `(rate, burst)` budget or a TokenBucket shared by
+            every endpoint group of the organization, or a RateLimiter used as is.
+
+    Returns:
+        RateLimiter: The limiter, or None if `limit` is None.
+    """
+    if limit is None or isinstance(limit, RateLimiter):
+        return limit
+    bucket = limit if isinstance(limit, TokenBucket) else TokenBucket(*limit)
+    return RateLimiter({group: bucket for group in ENDPOINT_GROUPS})
+
+
+def _credentials(value):
+    if isinstance(value, dict):
+        return value['api_key'], value['api_token']
+    api_key, api_token = value
+    return api_key, api_token
+
+
+def _method(method):
+    """
+    Turn "virtual_machines.list_vms" (or a callable taking a client) into a callable taking a client.
+    """
+    if callable(method):
+        return method
+    getter = attrgetter(method)
+    return lambda api, *args, **kwargs: getter(api)(*args, **kwargs)
+
+
+class BaseTensorDockFleet:
+    """
+    Configuration and result merging shared by the sync and async fleets.
+    """
+    client_class = None
+
+    def __init__(self, organizations, rate_limit=None, max_workers=None, **client_kwargs):
+        """
+        Args:
+            organizations (dict): Organization name to its `(api_key, api_token)` tuple or a dict with
+                `api_key` and `api_token`.
+            rate_limit (tuple or dict, optional): Per-organization rate budget: a `(rate, burst)` tuple
+                applied to every organization, or a dict of organization name to a tuple, TokenBucket or
+                RateLimiter. Each organization's budget is shared by all of its endpoint groups.
+            max_workers (int, optional): Maximum number of organizations queried at once. Defaults to all.
+            **client_kwargs: Further arguments for every client, e.g. `cache` or `retry`.
+        """
+        self.max_workers = max_workers
+        self.clients = {}
+        for org, credentials in organizations.items():
+            limit = rate_limit.get(org) if isinstance(rate_limit, dict) else rate_limit
+            self.clients[org] = self._client(*_credentials(credentials), rate_limiter=org_rate_limiter(limit),
+                                             **client_kwargs)
+
+    def _client(self, api_key, api_token, **kwargs):
+        return self.client_class(api_key, api_token, **kwargs)
+
+    @property
+    def organizations(self):
+        """
+        list: The organization names.
+        """
+        return list(self.clients)
+
+    def __getitem__(self, org):
+        return self.clients[org]
+
+    def __len__(self):
+        return len(self.clients)
+
+    def _workers(self, orgs):
+        return self.max_workers or max(1, len(orgs))
+
+    @staticmethod
+    def _merge_vms(results):
+        merged = {}
+        errors = {}
+        for org, result in results.items():
+            if isinstance(result, Exception):
+                errors[org] = result
+                continue
+            for server, vm in (result.get('virtualmachines') or {}).items():
+                merged[server] = dict(vm, org=org)
+        return {'virtualmachines': merged, 'errors': errors}
+
+    @staticmethod
+    def _merge_balances(results):
+        balances = {}
+        errors = {}
+        for org, result in results.items():
+            if isinstance(result, Exception):
+                errors[org] = result
+            else:
+                balances[org] = result
+        return {
+            'balance': sum(result.get('balance') or 0 for result in balances.values()),
+            'hourly_cost': sum(result.get('hourly_cost') or 0 for result in balances.values()),
+            'organizations': balances,
+            'errors': errors,
+        }
+
+
+class TensorDockFleet(BaseTensorDockFleet):
+    """
+    Runs API calls across many organizations at once.
+
+    Every organization gets its own TensorDockAPI with its own credentials and
+    rate budget, but all of them send requests through one shared pooled
+    session, so connections are reused across organizations. Calls fan out
+    over a thread pool, so a fleet-wide view costs about one round trip of
+    wall time rather than one per organization.
+
+    Example:
+        fleet = TensorDockFleet({
+            'research': ('key1', 'token1'),
+            'production': ('key2', 'token2'),
+        }, rate_limit=(5, 10))
+        vms = fleet.list_vms()['virtualmachines']       # every VM, tagged with its 'org'
+        balances = fleet.get_balance()
+        details = fleet.call('virtual_machines.get_vm_details', server)  # {org: result or exception}
+    """
+    def __init__(self, organizations, rate_limit=None, max_workers=None, pool_connections=None, pool_maxsize=None,
+                 session=None, **client_kwargs):
+        """
+        Args:
+            organizations, rate_limit, max_workers, **client_kwargs: See BaseTensorDockFleet.
+            pool_connections (int, optional): Number of hosts to keep connection pools for. Defaults to 10.
+            pool_maxsize (int, optional): Connections kept per host, shared by every organization.
+                Defaults to the number of organizations (at least 10).
+            session (requests.Session, optional): Session to share instead of creating one.
+        """
+        from .transport import create_session, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+        self.session = session or create_session(
+            pool_connections or DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize or max(DEFAULT_POOL_MAXSIZE, len(organizations)),
+        )
+        super().__init__(organizations, rate_limit, max_workers, session=self.session, **client_kwargs)
+
+    @property
+    def client_class(self):
+        from .api import TensorDockAPI
+        return TensorDockAPI
+
+    def map(self, func, orgs=None):
+        """
+        Call `func(api)` for every organization concurrently.
+
+        Args:
+            func (callable): Called with each organization's client.
+            orgs (iterable, optional): Organizations to include. Defaults to all.
+
+        Returns:
+            dict: A mapping of organization name to its result, or to the exception it raised.
+        """
+        orgs = list(self.clients if orgs is None else orgs)
+        return run_many(lambda org: func(self.clients[org]), orgs, self._workers(orgs))
+
+    def call(self, method, *args, **kwargs):
+        """
+        Call an endpoint method on every organization concurrently.
+
+        Args:
+            method (str or callable): A dotted endpoint method such as "billing.get_balance", or a
+                callable taking the client as its first argument.
+            *args, **kwargs: Arguments for the method.
+
+        Returns:
+            dict: A mapping of organization name to its result, or to the exception it raised.
+        """
+        method = _method(method)
+        return self.map(lambda api: method(api, *args, **kwargs))
+
+    def list_vms(self):
+        """
+        Every organization's VMs in one `list_vms`-shaped view.
+
+        Returns:
+            dict: `virtualmachines` maps each VM UUID to its VM with an added `org` key;
+            `errors` maps organizations whose call failed to the exception.
+        """
+        return self._merge_vms(self.call('virtual_machines.list_vms'))
+
+    def get_balance(self):
+        """
+        Every organization's balance, plus fleet-wide totals.
+
+        Returns:
+            dict: `balance` and `hourly_cost` summed over the organizations that answered,
+            `organizations` mapping each to its `get_balance` response, and `errors`.
+        """
+        return self._merge_balances(self.call('billing.get_balance'))
+
+    def close(self):
+        """
+        Close the shared session.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncTensorDockFleet(BaseTensorDockFleet):
+    """
+    asyncio counterpart of TensorDockFleet: every organization's
+    AsyncTensorDockAPI shares one aiohttp session, and `map`, `call`,
+    `list_vms` and `get_balance` are coroutines.
+
+    Example:
+        async with AsyncTensorDockFleet(organizations, rate_limit=(5, 10)) as fleet:
+            vms = (await fleet.list_vms())['virtualmachines']
+    """
+    def __init__(self, organizations, rate_limit=None, max_workers=None, pool_maxsize=None, **client_kwargs):
+        """
+        Args:
+            organizations, rate_limit, max_workers, **client_kwargs: See BaseTensorDockFleet.
+            pool_maxsize (int, optional): Size of the shared connection pool. Defaults to 100.
+        """
+        if pool_maxsize is not None:
+            client_kwargs['pool_maxsize'] = pool_maxsize
+        super().__init__(organizations, rate_limit, max_workers, **client_kwargs)
+        self.session = None
+
+    @property
+    def client_class(self):
+        from .async_api import AsyncTensorDockAPI
+        return AsyncTensorDockAPI
+
+    def _share_session(self):
+        if self.session is None or self.session.closed:
+            clients = list(self.clients.values())
+            if clients:
+                clients[0].session = None
+                self.session = clients[0]._get_session()
+                for api in clients:
+                    api.session = self.session
+        return self.session
+
+    async def map(self, func, orgs=None):
+        """
+        Coroutine counterpart of `TensorDockFleet.map`; `func(api)` must return an awaitable.
+        """
+        self._share_session()
+        orgs = list(self.clients if orgs is None else orgs)
+        return await run_many_async(lambda org: func(self.clients[org]), orgs, self._workers(orgs))
+
+    async def call(self, method, *args, **kwargs):
+        """
+        Coroutine counterpart of `TensorDockFleet.call`.
+        """
+        method = _method(method)
+        return await self.map(lambda api: method(api, *args, **kwargs))
+
+    async def list_vms(self):
+        """
+        Coroutine counterpart of `TensorDockFleet.list_vms`.
+        """
+        return self._merge_vms(await self.call('virtual_machines.list_vms'))
+
+    async def get_balance(self):
+        """
+        Coroutine counterpart of `TensorDockFleet.get_balance`.
+        """
+        return self._merge_balances(await self.call('billing.get_balance'))
+
+    async def close(self):
+        """
+        Close the shared session.
+        """
+        if self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,304 @@
+import re
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_EVEN
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .batch import DEFAULT_MAX_WORKERS
+
+# Amounts are stored as integer millionths of a dollar, so sums are exact.
+AMOUNT_SCALE = 6
+_QUANTUM = Decimal(1).scaleb(-AMOUNT_SCALE)
+
+# Effect of each transaction list on the organization's balance.
+SIGNS = {
+    'deposits': 1,
+    'withdrawals': -1,
+    'vm_expenses': -1,
+    'storage_expenses': -1,
+    'vm_payouts': 1,
+    'storage_payouts': 1,
+}
+EXPENSES = ('vm_expenses', 'storage_expenses')
+PAYOUTS = ('vm_payouts', 'storage_payouts')
+
+_GPU_DETAILS = re.compile(r'^\s*(\d+)\s*x\s*(.+?)\s*$')
+
+BalancePoint = namedtuple('BalancePoint', ['period', 'net', 'balance', 'reported'])
+BalancePoint.__doc__ = """
+The organization's balance at the end of one billing period.
+
+Attributes:
+    period (str): Billing period in YYYY-MM format.
+    net (Decimal): Sum of all transactions in the period, signed by their effect on the balance.
+    balance (Decimal): Opening balance of the first period plus the cumulative net.
+    reported (Decimal): The `final_balance` the API reported for the period, or None.
+"""
+
+
+def period_range(start, end):
+    """
+    Return every billing period from `start` to `end` inclusive.
+
+    Args:
+        start (str): First period in YYYY-MM format.
+        end (str): Last period in YYYY-MM format.
+
+    Returns:
+        list: Periods in YYYY-MM format, oldest first.
+    """
+    first, last = _month_index(start), _month_index(end)
+    return [_period(index) for index in range(first, last + 1)]
+
+
+def _month_index(period):
+    year, month = period.split('-')
+    return int(year) * 12 + int(month) - 1
+
+
+def _period(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _to_units(value):
+    """
+    Convert an amount sent as a string or number to integer millionths, without float rounding.
+    """
+    if value is None or value == '':
+        return 0
+    amount = Decimal(str(value)).scaleb(AMOUNT_SCALE).to_integral_value(ROUND_HALF_EVEN)
+    return int(amount)
+
+
+def _to_decimal(units):
+    return Decimal(int(units)).scaleb(-AMOUNT_SCALE).quantize(_QUANTUM)
+
+
+def parse_gpu_details(details):
+    """
+    Split a `gpu_details` string such as "1x L40 48 GB" into (count, gpu type).
+    """
+    if not details:
+        return 0, None
+    match = _GPU_DETAILS.match(details)
+    if match is None:
+        return 0, details.strip()
+    return int(match.group(1)), match.group(2)
+
+
+class _Categories:
+    """
+    Assigns small integer codes to repeated strings; None is coded as -1.
+    """
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class BillingLedger:
+    """
+    Columnar table of every transaction across many `get_monthly_summary` periods.
+
+    All transaction lists (`vm_expenses`, `storage_expenses`, `vm_payouts`,
+    `storage_payouts`, `deposits`, `withdrawals`) are flattened into NumPy
+    columns with one row per transaction. Amounts are parsed with Decimal and
+    stored as integer millionths of a dollar, so aggregations are exact and
+    are returned as Decimal. VM, hostnode and GPU type are coded as integer
+    categories, which turns every "cost by ..." question into a sort and a
+    segmented sum over the whole history at once. Requires numpy.
+
+    Example:
+        ledger = BillingLedger.from_api(api, '2023-01', '2024-12')
+        ledger.cost_by_vm()
+        ledger.cost_by_gpu(kinds=PAYOUTS)
+        for point in ledger.running_balance():
+            print(point.period, point.balance, point.reported)
+    """
+    def __init__(self, summaries):
+        """
+        Args:
+            summaries (dict): Mapping of billing period (YYYY-MM) to its `get_monthly_summary` response.
+        """
+        if np is None:
+            raise ImportError("BillingLedger requires numpy: pip install tensordock[billing]")
+        self.kinds = _Categories()
+        self.vms = _Categories()
+        self.hostnodes = _Categories()
+        self.gpus = _Categories()
+
+        periods = sorted(summaries, key=_month_index)
+        self.periods = periods
+        self.opening_balance = _to_units(summaries[periods[0]].get('previous_balance')) if periods else 0
+        self.reported_balances = {
+            period: _to_decimal(_to_units(summaries[period]['final_balance']))
+            for period in periods if summaries[period].get('final_balance') not in (None, '')
+        }
+
+        period_column, kind, amount, vm, hostnode, gpu, gpu_count = [], [], [], [], [], [], []
+        for period in periods:
+            month = _month_index(period)
+            transactions = summaries[period].get('transactions') or {}
+            for name, rows in transactions.items():
+                if not rows:
+                    continue
+                kind_code = self.kinds.code(name)
+                for row in rows:
+                    count, gpu_type = parse_gpu_details(row.get('gpu_details'))
+                    period_column.append(month)
+                    kind.append(kind_code)
+                    amount.append(_to_units(row.get('total_amount', row.get('amount'))))
+                    vm.append(self.vms.code(row.get('virtual_machine_id')))
+                    hostnode.append(self.hostnodes.code(row.get('hostnode_id')))
+                    gpu.append(self.gpus.code(gpu_type))
+                    gpu_count.append(count)
+
+        self.month = np.array(period_column, dtype=np.int32)
+        self.kind = np.array(kind, dtype=np.int16)
+        self.amount = np.array(amount, dtype=np.int64)
+        self.vm = np.array(vm, dtype=np.int32)
+        self.hostnode = np.array(hostnode, dtype=np.int32)
+        self.gpu = np.array(gpu, dtype=np.int32)
+        self.gpu_count = np.array(gpu_count, dtype=np.int32)
+        kind_signs = np.array([SIGNS.get(name, 0) for name in self.kinds.values], dtype=np.int64)
+        self.signed_amount = self.amount * kind_signs[self.kind] if len(self.kind) else self.amount.copy()
+
+    @classmethod
+    def from_api(cls, api, start, end, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Fetch every period from `start` to `end` concurrently and build a ledger.
+
+        Args:
+            api (TensorDockAPI): The client to fetch summaries with.
+            start (str): First period in YYYY-MM format.
+            end (str): Last period in YYYY-MM format.
+            max_workers (int, optional): Maximum number of concurrent requests. Defaults to 10.
+
+        Returns:
+            BillingLedger: The ledger over the fetched periods.
+
+        Raises:
+            TensorDockAPIException: If any period could not be fetched.
+        """
+        results = api._run_many(api.billing.get_monthly_summary, period_range(start, end), max_workers)
+        return cls(cls._check(results))
+
+    @classmethod
+    async def from_api_async(cls, api, start, end, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Coroutine counterpart of `from_api` for AsyncTensorDockAPI.
+        """
+        results = await api._run_many(api.billing.get_monthly_summary, period_range(start, end), max_workers)
+        return cls(cls._check(results))
+
+    @staticmethod
+    def _check(results):
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def __len__(self):
+        return len(self.amount)
+
+    def _mask(self, kinds):
+        if kinds is None:
+            return np.ones(len(self.amount), dtype=bool)
+        if isinstance(kinds, str):
+            kinds = [kinds]
+        codes = [self.kinds.codes[name] for name in kinds if name in self.kinds.codes]
+        return np.isin(self.kind, np.array(codes, dtype=np.int16))
+
+    def _sum_by(self, column, kinds, signed=False):
+        """
+        Exact per-code sums of the amount column over the rows of the given kinds.
+
+        Returns:
+            tuple: (codes, sums) as NumPy arrays, ordered by code.
+        """
+        mask = self._mask(kinds)
+        codes = column[mask]
+        values = (self.signed_amount if signed else self.amount)[mask]
+        if codes.size == 0:
+            return codes, values
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        return codes[starts], np.add.reduceat(values[order], starts)
+
+    def _as_dict(self, codes, sums, categories):
+        return {
+            categories.values[code] if code >= 0 else None: _to_decimal(total)
+            for code, total in zip(codes.tolist(), sums.tolist())
+        }
+
+    def cost_by_vm(self, kinds=EXPENSES):
+        """
+        Total amount per virtual machine UUID.
+
+        Args:
+            kinds (tuple, optional): Transaction lists to include. Defaults to VM and storage expenses;
+                pass `PAYOUTS` for hosting revenue or None for every list.
+
+        Returns:
+            dict: A mapping of VM UUID to Decimal amount. Transactions without a VM are keyed by None.
+        """
+        return self._as_dict(*self._sum_by(self.vm, kinds), self.vms)
+
+    def cost_by_hostnode(self, kinds=EXPENSES):
+        """
+        Total amount per hostnode UUID. See `cost_by_vm` for `kinds`.
+        """
+        return self._as_dict(*self._sum_by(self.hostnode, kinds), self.hostnodes)
+
+    def cost_by_gpu(self, kinds=EXPENSES):
+        """
+        Total amount per GPU type parsed from `gpu_details` (e.g. "L40 48 GB"). See `cost_by_vm` for `kinds`.
+        """
+        return self._as_dict(*self._sum_by(self.gpu, kinds), self.gpus)
+
+    def cost_by_month(self, kinds=EXPENSES):
+        """
+        Total amount per billing period. See `cost_by_vm` for `kinds`.
+
+        Returns:
+            dict: A mapping of period (YYYY-MM) to Decimal amount, oldest first.
+        """
+        codes, sums = self._sum_by(self.month, kinds)
+        return {_period(month): _to_decimal(total) for month, total in zip(codes.tolist(), sums.tolist())}
+
+    def running_balance(self):
+        """
+        Balance at the end of every fetched period, computed from the transactions.
+
+        The first period's `previous_balance` is taken as the opening balance and
+        each period's signed transactions are added to it in order; the balance the
+        API reported is returned alongside for reconciliation.
+
+        Returns:
+            list: BalancePoint tuples, oldest period first.
+        """
+        if not self.periods:
+            return []
+        first = _month_index(self.periods[0])
+        months = _month_index(self.periods[-1]) - first + 1
+        net = np.zeros(months, dtype=np.int64)
+        if len(self.month):
+            np.add.at(net, self.month - first, self.signed_amount)
+        balance = self.opening_balance + np.cumsum(net)
+        return [
+            BalancePoint(period, _to_decimal(net[_month_index(period) - first]),
+                         _to_decimal(balance[_month_index(period) - first]), self.reported_balances.get(period))
+            for period in self.periods
+        ]
@@ -0,0 +1,250 @@
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .models import Hostnode
+
+Offer = namedtuple('Offer', ['hostnode_id', 'gpu_model', 'gpu_count', 'price_hourly'])
+Offer.__doc__ = """
+A priced match for a requested spec on one hostnode.
+
+Attributes:
+    hostnode_id (str): UUID of the hostnode.
+    gpu_model (str): GPU model the price was computed for, or None for a CPU-only spec.
+    gpu_count (int): Number of GPUs in the spec.
+    price_hourly (float): Total hourly price of the spec on this hostnode.
+"""
+
+
+class _Categories:
+    """
+    Assigns small integer codes to repeated strings (countries, GPU models, ...).
+    """
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, values):
+        if isinstance(values, str):
+            values = [values]
+        return np.array([self.codes[v] for v in values if v in self.codes], dtype=np.int32)
+
+
+class HostnodeIndex:
+    """
+    Columnar index over a `get_available_hostnodes` response.
+
+    Every hostnode field used for placement is stored in a contiguous NumPy
+    column, and the GPUs offered by each hostnode are stored as a separate
+    long table (one row per hostnode and GPU model). Filtering and pricing a
+    spec are then a handful of array operations across all hostnodes at once
+    instead of a Python loop over nested dicts. Requires numpy.
+
+    Example:
+        index = HostnodeIndex.from_api(api)
+        offers = index.cheapest(gpu_model='rtxa6000-pcie-48gb', gpu_count=2, vcpus=8,
+                                ram=32, storage=100, countries=['United States'], k=5)
+    """
+    def __init__(self, hostnodes):
+        """
+        Args:
+            hostnodes (dict): Either the full `get_available_hostnodes` response or its
+                `hostnodes` mapping of UUID to hostnode.
+        """
+        if np is None:
+            raise ImportError("HostnodeIndex requires numpy: pip install tensordock[marketplace]")
+        if 'hostnodes' in hostnodes and isinstance(hostnodes['hostnodes'], dict):
+            hostnodes = hostnodes['hostnodes']
+        self.raw = hostnodes
+        self.ids = list(hostnodes)
+
+        self.countries = _Categories()
+        self.regions = _Categories()
+        self.cities = _Categories()
+        self.gpu_models = _Categories()
+
+        columns = {name: [] for name in (
+            'cpu_amount', 'cpu_price', 'ram_amount', 'ram_price', 'storage_amount', 'storage_price',
+            'uptime', 'listed', 'online', 'port_count', 'country', 'region', 'city',
+        )}
+        gpu_node, gpu_model, gpu_amount, gpu_price = [], [], [], []
+
+        for position, hostnode in enumerate(hostnodes.values()):
+            specs = hostnode.get('specs') or {}
+            status = hostnode.get('status') or {}
+            location = hostnode.get('location') or {}
+            for resource in ('cpu', 'ram', 'storage'):
+                spec = specs.get(resource) or {}
+                columns[f'{resource}_amount'].append(spec.get('amount') or 0)
+                columns[f'{resource}_price'].append(spec.get('price') or 0.0)
+            uptime = status.get('uptime')
+            columns['uptime'].append(uptime if uptime is not None else np.nan)
+            columns['listed'].append(bool(status.get('listed')))
+            columns['online'].append(bool(status.get('online')))
+            columns['port_count'].append(len((hostnode.get('networking') or {}).get('ports') or ()))
+            columns['country'].append(self.countries.code(location.get('country')))
+            columns['region'].append(self.regions.code(location.get('region')))
+            columns['city'].append(self.cities.code(location.get('city')))
+
+            for model, spec in (specs.get('gpu') or {}).items():
+                gpu_node.append(position)
+                gpu_model.append(self.gpu_models.code(model))
+                gpu_amount.append(spec.get('amount') or 0)
+                gpu_price.append(spec.get('price') or 0.0)
+
+        self.cpu_amount = np.array(columns['cpu_amount'], dtype=np.int32)
+        self.cpu_price = np.array(columns['cpu_price'], dtype=np.float64)
+        self.ram_amount = np.array(columns['ram_amount'], dtype=np.int32)
+        self.ram_price = np.array(columns['ram_price'], dtype=np.float64)
+        self.storage_amount = np.array(columns['storage_amount'], dtype=np.int64)
+        self.storage_price = np.array(columns['storage_price'], dtype=np.float64)
+        self.uptime = np.array(columns['uptime'], dtype=np.float64)
+        self.listed = np.array(columns['listed'], dtype=bool)
+        self.online = np.array(columns['online'], dtype=bool)
+        self.port_count = np.array(columns['port_count'], dtype=np.int32)
+        self.country = np.array(columns['country'], dtype=np.int32)
+        self.region = np.array(columns['region'], dtype=np.int32)
+        self.city = np.array(columns['city'], dtype=np.int32)
+
+        self.gpu_node = np.array(gpu_node, dtype=np.int64)
+        self.gpu_model = np.array(gpu_model, dtype=np.int32)
+        self.gpu_amount = np.array(gpu_amount, dtype=np.int32)
+        self.gpu_price = np.array(gpu_price, dtype=np.float64)
+
+    @classmethod
+    def from_api(cls, api, min_gpu_count=0):
+        """
+        Build an index from a fresh `get_available_hostnodes` call.
+
+        Args:
+            api (TensorDockAPI): The client to fetch hostnodes with.
+            min_gpu_count (int, optional): Minimum number of GPUs required. Defaults to 0.
+
+        Returns:
+            HostnodeIndex: The index over the returned hostnodes.
+        """
+        return cls(api.virtual_machines.get_available_hostnodes(min_gpu_count=min_gpu_count))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def hostnode(self, hostnode_id):
+        """
+        Return the Hostnode model for `hostnode_id`.
+        """
+        return Hostnode(hostnode_id, self.raw[hostnode_id])
+
+    def _gpu_cost(self, gpu_model, gpu_count):
+        """
+        Cheapest GPU cost per hostnode for `gpu_count` GPUs of any of the
+        requested models (inf where no model has enough GPUs), plus the
+        model code chosen for each hostnode (-1 where none).
+        """
+        size = len(self.ids)
+        cost = np.full(size, np.inf)
+        chosen = np.full(size, -1, dtype=np.int32)
+        if gpu_count <= 0:
+            cost[:] = 0.0
+            return cost, chosen
+
+        rows = self.gpu_amount >= gpu_count
+        if gpu_model is not None:
+            rows &= np.isin(self.gpu_model, self.gpu_models.lookup(gpu_model))
+        rows = np.flatnonzero(rows)
+        if rows.size == 0:
+            return cost, chosen
+
+        row_cost = self.gpu_price[rows] * gpu_count
+        nodes = self.gpu_node[rows]
+        order = np.lexsort((row_cost, nodes))
+        nodes, first = np.unique(nodes[order], return_index=True)
+        cheapest = rows[order[first]]
+        cost[nodes] = row_cost[order[first]]
+        chosen[nodes] = self.gpu_model[cheapest]
+        return cost, chosen
+
+    def _mask(self, vcpus, ram, storage, countries, regions, cities, min_uptime, listed, online, min_ports):
+        mask = (self.cpu_amount >= vcpus) & (self.ram_amount >= ram) & (self.storage_amount >= storage)
+        if countries is not None:
+            mask &= np.isin(self.country, self.countries.lookup(countries))
+        if regions is not None:
+            mask &= np.isin(self.region, self.regions.lookup(regions))
+        if cities is not None:
+            mask &= np.isin(self.city, self.cities.lookup(cities))
+        if min_uptime is not None:
+            mask &= self.uptime >= min_uptime
+        if listed:
+            mask &= self.listed
+        if online:
+            mask &= self.online
+        if min_ports:
+            mask &= self.port_count >= min_ports
+        return mask
+
+    def price(self, gpu_model=None, gpu_count=0, vcpus=0, ram=0, storage=0, countries=None, regions=None,
+              cities=None, min_uptime=None, listed=True, online=True, min_ports=0):
+        """
+        Compute the total hourly price of a spec on every hostnode at once.
+
+        Args:
+            gpu_model (str or list, optional): GPU model(s) to accept. Any model if None.
+            gpu_count (int, optional): Number of GPUs. Defaults to 0.
+            vcpus (int, optional): Number of vCPUs. Defaults to 0.
+            ram (int, optional): Amount of RAM in GB. Defaults to 0.
+            storage (int, optional): Storage amount in GB. Defaults to 0.
+            countries (list, optional): Only accept hostnodes in these countries.
+            regions (list, optional): Only accept hostnodes in these regions.
+            cities (list, optional): Only accept hostnodes in these cities.
+            min_uptime (float, optional): Minimum uptime ratio (e.g. 0.99).
+            listed (bool, optional): Only accept listed hostnodes. Defaults to True.
+            online (bool, optional): Only accept online hostnodes. Defaults to True.
+            min_ports (int, optional): Minimum number of free external ports. Defaults to 0.
+
+        Returns:
+            tuple: (prices, gpu_model_codes) as NumPy arrays aligned with `ids`. Hostnodes
+            that cannot host the spec or fail a filter are priced at inf.
+        """
+        cost, chosen = self._gpu_cost(gpu_model, gpu_count)
+        prices = cost + self.cpu_price * vcpus + self.ram_price * ram + self.storage_price * storage
+        mask = self._mask(vcpus, ram, storage, countries, regions, cities, min_uptime, listed, online, min_ports)
+        prices[~mask] = np.inf
+        return prices, chosen
+
+    def cheapest(self, k=10, max_price=None, **spec):
+        """
+        Return the `k` cheapest hostnodes able to host a spec.
+
+        Args:
+            k (int, optional): Number of offers to return. Defaults to 10.
+            max_price (float, optional): Drop offers above this total hourly price.
+            **spec: The spec and filters accepted by `price`.
+
+        Returns:
+            list: Offer tuples ordered from cheapest to most expensive.
+        """
+        prices, chosen = self.price(**spec)
+        candidates = np.flatnonzero(np.isfinite(prices) if max_price is None else prices <= max_price)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(prices[candidates], k)[:k]]
+        candidates = candidates[np.argsort(prices[candidates], kind='stable')]
+
+        gpu_count = spec.get('gpu_count', 0)
+        return [
+            Offer(
+                self.ids[position],
+                self.gpu_models.values[chosen[position]] if chosen[position] >= 0 else None,
+                gpu_count,
+                float(prices[position]),
+            )
+            for position in candidates
+        ]
@@ -0,0 +1,244 @@
+import math
+import threading
+
+from .transport import endpoint_group, endpoint_route
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+class RequestMetrics:
+    """
+    Measurements for one API call, passed to every `after_request` hook.
+
+    Attributes:
+        path (str): Endpoint path of the call.
+        route (str): Path with IDs replaced by placeholders, suitable as a metric label.
+        group (str): Endpoint group ("auth", "client", "container" or "billing").
+        method (str): HTTP method.
+        status_code (int): HTTP status of the last attempt, or None if no response arrived.
+        connect (float): Seconds spent opening a new connection, or None if a pooled
+            connection was reused or the transport does not report it.
+        ttfb (float): Seconds from sending the last attempt to receiving its response headers.
+        total (float): Seconds for the whole call, including retries, backoff and decoding.
+        response_size (int): Size of the last response body in bytes.
+        transfer_size (int): Size of the last response body on the wire, before decompression,
+            or None if the server did not send a Content-Length.
+        attempts (int): Number of HTTP requests sent; 0 when served from the cache.
+        retries (int): Number of retries made.
+        cache_hit (bool): Whether the response came from the response cache (or a
+            shared in-flight request).
+        error (str): Exception class name if the call failed, else None.
+    """
+    __slots__ = ('path', 'route', 'group', 'method', 'status_code', 'connect', 'ttfb', 'total',
+                 'response_size', 'transfer_size', 'attempts', 'retries', 'cache_hit', 'error')
+
+    def __init__(self, path, method):
+        self.path = path
+        self.route = endpoint_route(path)
+        self.group = endpoint_group(path)
+        self.method = method.upper()
+        self.status_code = None
+        self.connect = None
+        self.ttfb = None
+        self.total = None
+        self.response_size = None
+        self.transfer_size = None
+        self.attempts = 0
+        self.retries = 0
+        self.cache_hit = False
+        self.error = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"RequestMetrics({self.method} {self.path}, status={self.status_code}, total={self.total})"
+
+
+class _Series:
+    __slots__ = ('buckets', 'count', 'errors', 'total_sum', 'ttfb_sum', 'ttfb_count', 'connect_sum',
+                 'connect_count', 'bytes', 'transfer_bytes', 'retries', 'cache_hits')
+
+    def __init__(self, bucket_count):
+        self.buckets = [0] * bucket_count
+        self.count = 0
+        self.errors = 0
+        self.total_sum = 0.0
+        self.ttfb_sum = 0.0
+        self.ttfb_count = 0
+        self.connect_sum = 0.0
+        self.connect_count = 0
+        self.bytes = 0
+        self.transfer_bytes = 0
+        self.retries = 0
+        self.cache_hits = 0
+
+
+class InMemoryHistogram:
+    """
+    Metrics sink aggregating call latencies into fixed-bucket histograms per
+    (route, method), along with error, retry, cache-hit and byte counters.
+
+    Example:
+        histogram = InMemoryHistogram()
+        api = TensorDockAPI(api_key, api_token, metrics=histogram)
+        ...
+        print(histogram.summary())
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (tuple, optional): Ascending latency bucket upper bounds in seconds.
+        """
+        self.bucket_bounds = tuple(buckets) if buckets[-1] == math.inf else tuple(buckets) + (math.inf,)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics):
+        """
+        Add one call's RequestMetrics to the histograms.
+        """
+        key = (metrics.route, metrics.method)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series(len(self.bucket_bounds))
+            series.count += 1
+            series.total_sum += metrics.total or 0.0
+            for index, bound in enumerate(self.bucket_bounds):
+                if (metrics.total or 0.0) <= bound:
+                    series.buckets[index] += 1
+                    break
+            if metrics.ttfb is not None:
+                series.ttfb_sum += metrics.ttfb
+                series.ttfb_count += 1
+            if metrics.connect is not None:
+                series.connect_sum += metrics.connect
+                series.connect_count += 1
+            series.bytes += metrics.response_size or 0
+            series.transfer_bytes += (metrics.response_size or 0) if metrics.transfer_size is None \
+                else metrics.transfer_size
+            series.retries += metrics.retries
+            series.cache_hits += metrics.cache_hit
+            series.errors += metrics.error is not None
+
+    def percentile(self, route, method, q):
+        """
+        Estimate the `q` quantile (0-1) of total latency for a route, as the upper
+        bound of the bucket it falls in. Returns None if nothing was recorded.
+        """
+        series = self.series.get((route, method.upper()))
+        if series is None or series.count == 0:
+            return None
+        rank = q * series.count
+        seen = 0
+        for bound, count in zip(self.bucket_bounds, series.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bucket_bounds[-1]
+
+    def summary(self):
+        """
+        Return a dict of per-(route, method) statistics, slowest routes first.
+
+        Example response:
+            {
+                "POST client/list": {
+                    "count": 120,
+                    "errors": 0,
+                    "mean": 0.084,
+                    "p50": 0.1,
+                    "p95": 0.25,
+                    "p99": 0.5,
+                    "mean_ttfb": 0.079,
+                    "mean_connect": 0.012,
+                    "bytes": 1843200,
+                    "transfer_bytes": 245760,
+                    "retries": 2,
+                    "cache_hits": 40
+                }
+            }
+        """
+        with self._lock:
+            items = list(self.series.items())
+        result = {}
+        for (route, method), series in sorted(items, key=lambda item: -item[1].total_sum):
+            result[f"{method} {route}"] = {
+                'count': series.count,
+                'errors': series.errors,
+                'mean': series.total_sum / series.count,
+                'p50': self.percentile(route, method, 0.5),
+                'p95': self.percentile(route, method, 0.95),
+                'p99': self.percentile(route, method, 0.99),
+                'mean_ttfb': series.ttfb_sum / series.ttfb_count if series.ttfb_count else None,
+                'mean_connect': series.connect_sum / series.connect_count if series.connect_count else None,
+                'bytes': series.bytes,
+                'transfer_bytes': series.transfer_bytes,
+                'retries': series.retries,
+                'cache_hits': series.cache_hits,
+            }
+        return result
+
+
+class PrometheusSink(InMemoryHistogram):
+    """
+    InMemoryHistogram that renders its contents in the Prometheus text exposition format.
+
+    Example:
+        sink = PrometheusSink()
+        api = TensorDockAPI(api_key, api_token, metrics=sink)
+        ...
+        body = sink.render()  # serve from your /metrics handler
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, namespace='tensordock'):
+        super().__init__(buckets)
+        self.namespace = namespace
+
+    def render(self):
+        """
+        Return all metrics as Prometheus text exposition format.
+        """
+        ns = self.namespace
+        with self._lock:
+            items = sorted(self.series.items())
+            lines = [
+                f"# HELP {ns}_request_duration_seconds Total duration of TensorDock API calls.",
+                f"# TYPE {ns}_request_duration_seconds histogram",
+            ]
+            for (route, method), series in items:
+                labels = f'endpoint="{route}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(self.bucket_bounds, series.buckets):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(float(bound))
+                    lines.append(f'{ns}_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{ns}_request_duration_seconds_sum{{{labels}}} {series.total_sum}")
+                lines.append(f"{ns}_request_duration_seconds_count{{{labels}}} {series.count}")
+
+            for name, help_text, value, count in (
+                ('request_ttfb_seconds', 'Time to first byte of TensorDock API responses.',
+                 lambda s: s.ttfb_sum, lambda s: s.ttfb_count),
+                ('request_connect_seconds', 'Time spent opening connections to the TensorDock API.',
+                 lambda s: s.connect_sum, lambda s: s.connect_count),
+            ):
+                lines.append(f"# HELP {ns}_{name} {help_text}")
+                lines.append(f"# TYPE {ns}_{name} summary")
+                for (route, method), series in items:
+                    labels = f'endpoint="{route}",method="{method}"'
+                    lines.append(f"{ns}_{name}_sum{{{labels}}} {value(series)}")
+                    lines.append(f"{ns}_{name}_count{{{labels}}} {count(series)}")
+
+            for name, help_text, value in (
+                ('response_bytes_total', 'Bytes received from the TensorDock API.', lambda s: s.bytes),
+                ('response_transfer_bytes_total', 'Bytes received from the TensorDock API on the wire, before '
+                 'decompression.', lambda s: s.transfer_bytes),
+                ('request_retries_total', 'Retries of TensorDock API calls.', lambda s: s.retries),
+                ('request_cache_hits_total', 'TensorDock API calls served from the cache.', lambda s: s.cache_hits),
+                ('request_errors_total', 'Failed TensorDock API calls.', lambda s: s.errors),
+            ):
+                lines.append(f"# HELP {ns}_{name} {help_text}")
+                lines.append(f"# TYPE {ns}_{name} counter")
+                for (route, method), series in items:
+                    lines.append(f'{ns}_{name}{{endpoint="{route}",method="{method}"}} {value(series)}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,243 @@
+from array import array
+
+
+class field:
+    """
+    Declares a model attribute read from a path of keys in the response dict,
+    optionally converted with `wrap`. `unwrap` converts the value back for
+    `to_dict`; values that are models are converted with their own `to_dict`.
+    """
+    __slots__ = ('path', 'wrap', 'unwrap', 'default')
+
+    def __init__(self, *path, wrap=None, unwrap=None, default=None):
+        self.path = path
+        self.wrap = wrap
+        self.unwrap = unwrap
+        self.default = default
+
+    def read(self, data):
+        value = data
+        for key in self.path:
+            if not isinstance(value, dict) or key not in value:
+                return self.default
+            value = value[key]
+        if self.wrap is not None and value is not None:
+            return self.wrap(value)
+        return value
+
+    def write(self, data, value):
+        if value is None:
+            return
+        if self.unwrap is not None:
+            value = self.unwrap(value)
+        elif isinstance(value, Model):
+            value = value.to_dict()
+        for key in self.path[:-1]:
+            data = data.setdefault(key, {})
+        data[self.path[-1]] = value
+
+
+class _ModelType(type):
+    """
+    Turns a model's `field` declarations into slots, so instances have no
+    per-instance dict.
+    """
+    def __new__(mcs, name, bases, namespace):
+        fields = {key: value for key, value in namespace.items() if isinstance(value, field)}
+        for key in fields:
+            del namespace[key]
+        namespace['__slots__'] = tuple(namespace.get('__slots__', ())) + tuple(fields)
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._fields = {**getattr(cls, '_fields', {}), **fields}
+        return cls
+
+
+class Model(metaclass=_ModelType):
+    """
+    Base class for typed API response objects.
+
+    A model copies its fields out of the decoded response dict into slots when
+    it is created and keeps no reference to the dict, so once the response is
+    dropped only the slotted objects remain; they take a fraction of the memory
+    of the nested dicts. Keys a model does not declare are not kept.
+    """
+    __slots__ = ()
+
+    def __init__(self, data):
+        for name, spec in self._fields.items():
+            setattr(self, name, spec.read(data))
+
+    def to_dict(self):
+        """
+        Return the model's fields as a dict laid out like the API response.
+        """
+        data = {}
+        for name, spec in self._fields.items():
+            spec.write(data, getattr(self, name))
+        return data
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class KeyedModel(Model):
+    """
+    A model for a response entry keyed by its UUID (or name) in a parent dict.
+    """
+    __slots__ = ('id',)
+
+    def __init__(self, id, data):
+        super().__init__(data)
+        self.id = id
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.id == other.id
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r})"
+
+
+class Location(Model):
+    id = field('id')
+    city = field('city')
+    region = field('region')
+    country = field('country')
+    dc = field('dc')
+
+
+class ResourceSpec(Model):
+    amount = field('amount', default=0)
+    price = field('price', default=0)
+    type = field('type')
+
+
+class GpuSpec(Model):
+    """
+    A GPU offer on a hostnode (`model`, `amount`, `price`) or the GPUs
+    attached to a VM (`model`, `amount`).
+    """
+    __slots__ = ('model',)
+    amount = field('amount', default=0)
+    price = field('price')
+
+    def __init__(self, model, data):
+        super().__init__(data)
+        self.model = model
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.model == other.model
+
+    def __repr__(self):
+        return f"GpuSpec(model={self.model!r}, amount={self.amount!r}, price={self.price!r})"
+
+
+class PortForward:
+    __slots__ = ('external', 'internal')
+
+    def __init__(self, external, internal):
+        self.external = int(external)
+        self.internal = int(internal)
+
+    def __eq__(self, other):
+        return isinstance(other, PortForward) and (self.external, self.internal) == (other.external, other.internal)
+
+    def __hash__(self):
+        return hash((self.external, self.internal))
+
+    def __repr__(self):
+        return f"PortForward(external={self.external}, internal={self.internal})"
+
+
+def _ports(value):
+    # Port numbers packed as unsigned shorts: 2 bytes each instead of a pointer to an int object.
+    return array('H', value)
+
+
+def _port_forwards(value):
+    return tuple(PortForward(external, internal) for external, internal in value.items())
+
+
+def _port_forwards_dict(forwards):
+    return {str(forward.external): forward.internal for forward in forwards}
+
+
+def _gpu_offers(value):
+    return tuple(GpuSpec(model, spec) for model, spec in value.items())
+
+
+def _gpu_offers_dict(gpus):
+    return {gpu.model: gpu.to_dict() for gpu in gpus}
+
+
+def _vm_gpu(value):
+    # CPU-only VMs report either no GPU spec or one with an amount of 0.
+    return GpuSpec(value.get('type'), value) if value and value.get('amount') else None
+
+
+def _vm_gpu_dict(gpu):
+    return dict(gpu.to_dict(), type=gpu.model)
+
+
+class Hostnode(KeyedModel):
+    location = field('location', wrap=Location)
+    ports = field('networking', 'ports', wrap=_ports, unwrap=list, default=())
+    receive = field('networking', 'receive')
+    send = field('networking', 'send')
+    cpu = field('specs', 'cpu', wrap=ResourceSpec)
+    ram = field('specs', 'ram', wrap=ResourceSpec)
+    storage = field('specs', 'storage', wrap=ResourceSpec)
+    gpus = field('specs', 'gpu', wrap=_gpu_offers, unwrap=_gpu_offers_dict, default=())
+    listed = field('status', 'listed', default=False)
+    online = field('status', 'online', default=False)
+    uptime = field('status', 'uptime')
+    report = field('status', 'report')
+
+    def gpu(self, model):
+        """
+        Return the GpuSpec for `model`, or None if the hostnode does not offer it.
+        """
+        for gpu in self.gpus:
+            if gpu.model == model:
+                return gpu
+        return None
+
+
+class VM(KeyedModel):
+    name = field('name')
+    status = field('status')
+    type = field('type')
+    cost = field('cost')
+    hostname = field('hostname')
+    hostnode = field('hostnode')
+    location = field('location')
+    operating_system = field('operating_system')
+    timestamp_creation = field('timestamp_creation')
+    port_forwards = field('port_forwards', wrap=_port_forwards, unwrap=_port_forwards_dict, default=())
+    gpu = field('specs', 'gpu', wrap=_vm_gpu, unwrap=_vm_gpu_dict)
+    ram = field('specs', 'ram')
+    vcpus = field('specs', 'vcpus')
+    storage = field('specs', 'storage')
+
+
+def _parse_all(model, raw):
+    return {key: model(key, value) for key, value in raw.items()}
+
+
+def parse_vms(response):
+    """
+    Parse a `list_vms` response into a dict of VM UUID to VM model.
+    """
+    return _parse_all(VM, response.get('virtualmachines') or {})
+
+
+def parse_hostnodes(response):
+    """
+    Parse a `get_available_hostnodes` response into a dict of hostnode UUID to Hostnode model.
+    """
+    return _parse_all(Hostnode, response.get('hostnodes') or {})
@@ -0,0 +1,451 @@
+import math
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .batch import DEFAULT_MAX_WORKERS
+from .exceptions import TensorDockDeployError
+from .marketplace import HostnodeIndex
+
+# How many of the cheapest candidate hostnodes the repair phase examines for each unplaced request.
+REPAIR_CANDIDATES = 32
+
+Placement = namedtuple('Placement', ['request', 'hostnode_id', 'gpu_model', 'price_hourly', 'external_ports',
+                                     'internal_ports'])
+Placement.__doc__ = """
+One VM request assigned to a hostnode.
+
+Attributes:
+    request (VMRequest): The request being placed.
+    hostnode_id (str): UUID of the hostnode chosen.
+    gpu_model (str): GPU model chosen, or None for a CPU-only request.
+    price_hourly (float): Hourly price of the VM on that hostnode.
+    external_ports (tuple): Free external ports of the hostnode assigned to the VM.
+    internal_ports (tuple): Internal ports they forward to.
+"""
+
+
+class VMRequest:
+    """
+    A VM to be placed by PlacementPlanner.
+
+    Example:
+        VMRequest('trainer-0', gpu_model='rtxa6000-pcie-48gb', gpu_count=2, vcpus=8, ram=32, storage=100,
+                  countries=['United States'], max_price=2.5, operating_system='Ubuntu 22.04 LTS',
+                  ssh_key=public_key)
+    """
+    def __init__(self, name, gpu_model=None, gpu_count=0, vcpus=0, ram=0, storage=0, internal_ports=(22,),
+                 countries=None, regions=None, cities=None, min_uptime=None, max_price=None, **deploy):
+        """
+        Args:
+            name (str): Name of the VM.
+            gpu_model (str or list, optional): GPU model(s) to accept. Any model if None.
+            gpu_count (int, optional): Number of GPUs. Defaults to 0.
+            vcpus (int, optional): Number of vCPUs.
+            ram (int, optional): Amount of RAM in GB.
+            storage (int, optional): Storage amount in GB.
+            internal_ports (iterable, optional): Internal ports to forward; one free external port is
+                assigned for each. Defaults to (22,).
+            countries (list, optional): Only accept hostnodes in these countries.
+            regions (list, optional): Only accept hostnodes in these regions.
+            cities (list, optional): Only accept hostnodes in these cities.
+            min_uptime (float, optional): Minimum hostnode uptime ratio.
+            max_price (float, optional): Maximum total hourly price.
+            **deploy: Further `deploy_vm` arguments, e.g. operating_system, password, ssh_key.
+        """
+        self.name = name
+        self.gpu_model = gpu_model
+        self.gpu_count = gpu_count
+        self.vcpus = vcpus
+        self.ram = ram
+        self.storage = storage
+        self.internal_ports = tuple(internal_ports)
+        self.countries = countries
+        self.regions = regions
+        self.cities = cities
+        self.min_uptime = min_uptime
+        self.max_price = max_price
+        self.deploy = deploy
+
+    def spec_key(self):
+        """
+        Requests with equal keys are interchangeable for placement and are planned together.
+        """
+        def frozen(value):
+            if value is None or isinstance(value, str):
+                return value
+            return tuple(sorted(value))
+        return (frozen(self.gpu_model), self.gpu_count if self.gpu_count > 0 else 0, self.vcpus, self.ram,
+                self.storage, len(self.internal_ports), frozen(self.countries), frozen(self.regions),
+                frozen(self.cities), self.min_uptime, self.max_price)
+
+    def __repr__(self):
+        return f"VMRequest({self.name!r}, gpu_model={self.gpu_model!r}, gpu_count={self.gpu_count})"
+
+
+class Plan:
+    """
+    The result of PlacementPlanner.plan.
+
+    Attributes:
+        placements (list): Placement tuples, in the order of the requests.
+        unplaced (list): VMRequests no hostnode could take.
+    """
+    def __init__(self, placements, unplaced):
+        self.placements = placements
+        self.unplaced = unplaced
+
+    @property
+    def total_price(self):
+        """
+        Total hourly price of all placed VMs.
+        """
+        return sum(placement.price_hourly for placement in self.placements)
+
+    def __repr__(self):
+        return (f"Plan(placed={len(self.placements)}, unplaced={len(self.unplaced)}, "
+                f"total_price={self.total_price:.3f})")
+
+
+class _Spec:
+    """
+    Candidate slots for one group of identical requests, cheapest first. A
+    slot is a hostnode (CPU-only requests) or a hostnode GPU row.
+    """
+    __slots__ = ('gpu_count', 'vcpus', 'ram', 'storage', 'ports', 'node_array', 'row_array', 'nodes', 'rows',
+                 'prices')
+
+    def __init__(self, index, request, listed, online):
+        self.gpu_count = max(request.gpu_count, 0)
+        self.vcpus = request.vcpus
+        self.ram = request.ram
+        self.storage = request.storage
+        self.ports = len(request.internal_ports)
+
+        static = index._mask(self.vcpus, self.ram, self.storage, request.countries, request.regions,
+                             request.cities, request.min_uptime, listed, online, self.ports)
+        node_cost = index.cpu_price * self.vcpus + index.ram_price * self.ram + index.storage_price * self.storage
+        if self.gpu_count:
+            rows = (index.gpu_amount >= self.gpu_count) & static[index.gpu_node]
+            if request.gpu_model is not None:
+                rows &= np.isin(index.gpu_model, index.gpu_models.lookup(request.gpu_model))
+            rows = np.flatnonzero(rows)
+            nodes = index.gpu_node[rows]
+            prices = index.gpu_price[rows] * self.gpu_count + node_cost[nodes]
+        else:
+            nodes = np.flatnonzero(static)
+            rows = np.full(nodes.size, -1, dtype=np.int64)
+            prices = node_cost[nodes]
+        if request.max_price is not None:
+            keep = prices <= request.max_price
+            nodes, rows, prices = nodes[keep], rows[keep], prices[keep]
+        order = np.argsort(prices, kind='stable')
+        self.node_array = nodes[order]
+        self.row_array = rows[order]
+        self.nodes = self.node_array.tolist()
+        self.rows = self.row_array.tolist()
+        self.prices = prices[order].tolist()
+
+
+class _Capacity:
+    """
+    Remaining capacity of every hostnode and GPU row while a plan is built.
+    """
+    def __init__(self, index):
+        self.cpu = index.cpu_amount.astype(np.int64)
+        self.ram = index.ram_amount.astype(np.int64)
+        self.storage = index.storage_amount.astype(np.int64)
+        self.ports = index.port_count.astype(np.int64)
+        self.gpu = index.gpu_amount.astype(np.int64)
+
+    def fits(self, spec):
+        """
+        Number of copies of `spec` that fit on each of its slots, as an array.
+        """
+        nodes = spec.node_array
+        fit = np.full(nodes.size, np.iinfo(np.int64).max)
+        for left, need in ((self.cpu, spec.vcpus), (self.ram, spec.ram), (self.storage, spec.storage),
+                           (self.ports, spec.ports)):
+            if need:
+                np.minimum(fit, left[nodes] // need, out=fit)
+        if spec.gpu_count:
+            np.minimum(fit, self.gpu[spec.row_array] // spec.gpu_count, out=fit)
+        return fit
+
+    def fit(self, spec, node, row):
+        """
+        Number of copies of `spec` that fit on a slot.
+        """
+        fit = math.inf
+        if spec.vcpus:
+            fit = self.cpu[node] // spec.vcpus
+        if spec.ram and self.ram[node] // spec.ram < fit:
+            fit = self.ram[node] // spec.ram
+        if spec.storage and self.storage[node] // spec.storage < fit:
+            fit = self.storage[node] // spec.storage
+        if spec.ports and self.ports[node] // spec.ports < fit:
+            fit = self.ports[node] // spec.ports
+        if row >= 0 and self.gpu[row] // spec.gpu_count < fit:
+            fit = self.gpu[row] // spec.gpu_count
+        return fit
+
+    def take(self, spec, node, row, copies=1):
+        self.cpu[node] -= spec.vcpus * copies
+        self.ram[node] -= spec.ram * copies
+        self.storage[node] -= spec.storage * copies
+        self.ports[node] -= spec.ports * copies
+        if row >= 0:
+            self.gpu[row] -= spec.gpu_count * copies
+
+    def release(self, spec, node, row):
+        self.take(spec, node, row, -1)
+
+
+class PlacementPlanner:
+    """
+    Computes a capacity-respecting, cost-minimizing assignment of VM requests
+    to hostnodes, and optionally deploys it.
+
+    Identical requests are grouped, and every group's candidate slots (a
+    hostnode, or a hostnode's GPU model) are priced for all hostnodes at once
+    with the HostnodeIndex columns. Groups are then placed most-constrained
+    first, each filling its cheapest slots as far as remaining capacity
+    allows (first-fit decreasing over price-sorted slots). A repair pass then
+    retries every unplaced request by moving one already-placed VM off one of
+    its cheapest hostnodes to its next-best slot. Free external ports are
+    assigned from each hostnode's `networking.ports`. Requires numpy.
+
+    Example:
+        planner = PlacementPlanner.from_api(api)
+        plan = planner.plan([VMRequest(f'worker-{i}', gpu_model='rtxa4000-pcie-16gb', gpu_count=1,
+                                       vcpus=4, ram=16, storage=50, operating_system='Ubuntu 22.04 LTS',
+                                       ssh_key=public_key) for i in range(50)])
+        deployed = planner.execute(plan)
+    """
+    def __init__(self, hostnodes, api=None, listed=True, online=True):
+        """
+        Args:
+            hostnodes (dict or HostnodeIndex): A `get_available_hostnodes` response or an index over one.
+            api (TensorDockAPI or AsyncTensorDockAPI, optional): Client used by `execute`.
+            listed (bool, optional): Only place on listed hostnodes. Defaults to True.
+            online (bool, optional): Only place on online hostnodes. Defaults to True.
+        """
+        self.index = hostnodes if isinstance(hostnodes, HostnodeIndex) else HostnodeIndex(hostnodes)
+        self.api = api
+        self.listed = listed
+        self.online = online
+
+    @classmethod
+    def from_api(cls, api, min_gpu_count=0, **kwargs):
+        """
+        Build a planner over a fresh `get_available_hostnodes` call.
+        """
+        return cls(HostnodeIndex.from_api(api, min_gpu_count), api=api, **kwargs)
+
+    def plan(self, requests):
+        """
+        Assign requests to hostnodes.
+
+        Args:
+            requests (iterable): VMRequest objects.
+
+        Returns:
+            Plan: The placements and the requests that could not be placed.
+        """
+        requests = list(requests)
+        groups = {}
+        for request in requests:
+            groups.setdefault(request.spec_key(), []).append(request)
+        specs = {}
+        spec_of = {}
+        for key, members in groups.items():
+            specs[key] = spec = _Spec(self.index, members[0], self.listed, self.online)
+            spec_of.update(dict.fromkeys(members, spec))
+
+        # Most constrained groups first: fewest candidate slots, then largest requests.
+        order = sorted(groups, key=lambda key: (len(specs[key].nodes), -specs[key].gpu_count, -specs[key].vcpus,
+                                                -specs[key].ram))
+        capacity = _Capacity(self.index)
+        assigned = {}
+        on_node = {}
+        unplaced = []
+        for key in order:
+            spec, waiting = specs[key], groups[key]
+            position = 0
+            # Slots on the same hostnode share capacity, so each candidate is re-checked as it is filled.
+            for slot in np.flatnonzero(capacity.fits(spec) > 0).tolist():
+                if position == len(waiting):
+                    break
+                node, row = spec.nodes[slot], spec.rows[slot]
+                copies = min(capacity.fit(spec, node, row), len(waiting) - position)
+                if copies <= 0:
+                    continue
+                capacity.take(spec, node, row, copies)
+                for request in waiting[position:position + copies]:
+                    assigned[request] = slot
+                    on_node.setdefault(node, []).append(request)
+                position += copies
+            unplaced.extend(waiting[position:])
+
+        # A failed repair fails again for an identical request until some repair succeeds.
+        failed = set()
+        remaining = []
+        for request in unplaced:
+            spec = spec_of[request]
+            if spec in failed or not self._repair(request, spec_of, capacity, assigned, on_node):
+                failed.add(spec)
+                remaining.append(request)
+            else:
+                failed.clear()
+        unplaced = remaining
+        return Plan(self._placements(requests, spec_of, assigned), unplaced)
+
+    def _repair(self, request, spec_of, capacity, assigned, on_node):
+        """
+        Try to place `request` by moving one placed VM off one of its cheapest
+        hostnodes. Returns whether the request was placed.
+        """
+        spec = spec_of[request]
+        for slot in range(min(len(spec.nodes), REPAIR_CANDIDATES)):
+            node, row = spec.nodes[slot], spec.rows[slot]
+            for other in list(on_node.get(node, ())):
+                other_spec = spec_of[other]
+                other_slot = assigned[other]
+                other_row = other_spec.rows[other_slot]
+                capacity.release(other_spec, node, other_row)
+                if capacity.fit(spec, node, row) >= 1:
+                    targets = np.flatnonzero((capacity.fits(other_spec) > 0) & (other_spec.node_array != node))
+                    if targets.size:
+                        target = int(targets[0])
+                        target_node, target_row = other_spec.nodes[target], other_spec.rows[target]
+                        capacity.take(other_spec, target_node, target_row)
+                        capacity.take(spec, node, row)
+                        assigned[other] = target
+                        on_node[node].remove(other)
+                        on_node.setdefault(target_node, []).append(other)
+                        assigned[request] = slot
+                        on_node[node].append(request)
+                        return True
+                capacity.take(other_spec, node, other_row)
+        return False
+
+    def _placements(self, requests, spec_of, assigned):
+        free_ports = {}
+        placements = []
+        for request in requests:
+            slot = assigned.get(request)
+            if slot is None:
+                continue
+            spec = spec_of[request]
+            node, row = spec.nodes[slot], spec.rows[slot]
+            hostnode_id = self.index.ids[node]
+            ports = free_ports.get(node)
+            if ports is None:
+                ports = free_ports[node] = list((self.index.raw[hostnode_id].get('networking') or {})
+                                                .get('ports') or ())
+            external = tuple(ports[:spec.ports])
+            del ports[:spec.ports]
+            gpu_model = self.index.gpu_models.values[self.index.gpu_model[row]] if row >= 0 else None
+            placements.append(Placement(request, hostnode_id, gpu_model, spec.prices[slot], external,
+                                        request.internal_ports))
+        return placements
+
+    @staticmethod
+    def deploy_kwargs(placement):
+        """
+        Return the `deploy_vm` arguments for a placement.
+        """
+        request = placement.request
+        kwargs = dict(request.deploy)
+        kwargs.update(
+            name=request.name,
+            hostnode=placement.hostnode_id,
+            gpu_count=request.gpu_count,
+            vcpus=request.vcpus,
+            ram=request.ram,
+            storage=request.storage,
+            external_ports='{' + ', '.join(str(port) for port in placement.external_ports) + '}',
+            internal_ports='{' + ', '.join(str(port) for port in placement.internal_ports) + '}',
+        )
+        if placement.gpu_model is not None:
+            kwargs['gpu_model'] = placement.gpu_model
+        return kwargs
+
+    def _api(self, api):
+        api = api or self.api
+        if api is None:
+            raise ValueError("PlacementPlanner.execute needs a client: pass api= or build the planner with from_api")
+        return api
+
+    @staticmethod
+    def _split(results):
+        deployed, errors = {}, {}
+        for placement, result in results.items():
+            if isinstance(result, Exception):
+                errors[placement] = result
+            else:
+                deployed[placement] = result
+        return deployed, errors
+
+    @staticmethod
+    def _deploy_error(deployed, errors, rolled_back):
+        message = f"{len(errors)} of {len(deployed) + len(errors)} deployments failed"
+        if rolled_back:
+            message += f"; deleted the {len(rolled_back)} VMs that were deployed"
+        first = next(iter(errors.values()))
+        return TensorDockDeployError(f"{message}: {first}", deployed=deployed, errors=errors,
+                                     rolled_back=rolled_back,
+                                     status_code=getattr(first, 'status_code', None))
+
+    def execute(self, plan, api=None, max_workers=DEFAULT_MAX_WORKERS, rollback=True):
+        """
+        Deploy every placement of a plan concurrently.
+
+        Args:
+            plan (Plan): The plan to deploy.
+            api (TensorDockAPI, optional): Client to deploy with. Defaults to the planner's client.
+            max_workers (int, optional): Maximum number of concurrent `deploy_vm` calls. Defaults to 10.
+            rollback (bool, optional): If any deployment fails, delete the VMs that were deployed
+                before raising. Defaults to True.
+
+        Returns:
+            dict: A mapping of each Placement to its `deploy_vm` response.
+
+        Raises:
+            TensorDockDeployError: If any deployment failed. Its `deployed`, `errors` and
+                `rolled_back` attributes describe what happened to each placement.
+        """
+        api = self._api(api)
+        results = api._run_many(lambda placement: api.virtual_machines.deploy_vm(**self.deploy_kwargs(placement)),
+                                plan.placements, max_workers)
+        deployed, errors = self._split(results)
+        if not errors:
+            return deployed
+        rolled_back = []
+        if rollback:
+            servers = [response.get('server') for response in deployed.values() if response.get('server')]
+            deleted = api.virtual_machines.delete_many(servers, max_workers)
+            rolled_back = [server for server, result in deleted.items() if not isinstance(result, Exception)]
+        raise self._deploy_error(deployed, errors, rolled_back)
+
+    async def execute_async(self, plan, api=None, max_workers=DEFAULT_MAX_WORKERS, rollback=True):
+        """
+        Coroutine counterpart of `execute` for AsyncTensorDockAPI.
+        """
+        api = self._api(api)
+        results = await api._run_many(
+            lambda placement: api.virtual_machines.deploy_vm(**self.deploy_kwargs(placement)),
+            plan.placements, max_workers,
+        )
+        deployed, errors = self._split(results)
+        if not errors:
+            return deployed
+        rolled_back = []
+        if rollback:
+            servers = [response.get('server') for response in deployed.values() if response.get('server')]
+            deleted = await api.virtual_machines.delete_many(servers, max_workers)
+            rolled_back = [server for server, result in deleted.items() if not isinstance(result, Exception)]
+        raise self._deploy_error(deployed, errors, rolled_back)
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+from .transport import endpoint_group
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` calls per second with bursts of up to `burst` calls.
+
+    Callers reserve a token and are told how long to wait for it, so waiting
+    happens outside the lock and works the same for threads and coroutines.
+    """
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Sustained number of calls per second.
+            burst (int, optional): Maximum number of calls allowed at once. Defaults to `rate` (at least 1).
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return the number of seconds to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """
+        Block until a token is available.
+        """
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """
+        Wait on the running event loop until a token is available.
+        """
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """
+    Client-side rate limits per endpoint group ("auth", "client", "container", "billing").
+
+    Example:
+        limiter = RateLimiter({'client': (5, 10), 'billing': (1, 2)})
+        api = TensorDockAPI(api_key, api_token, rate_limiter=limiter)
+    """
+    def __init__(self, limits=None, default=None):
+        """
+        Args:
+            limits (dict, optional): Endpoint group to a `(rate, burst)` tuple or a TokenBucket.
+            default (tuple, optional): `(rate, burst)` for groups missing from `limits`.
+                Those groups are unlimited if omitted.
+        """
+        self.default = default
+        self.buckets = {}
+        for group, limit in (limits or {}).items():
+            self.buckets[group] = limit if isinstance(limit, TokenBucket) else TokenBucket(*limit)
+        self._lock = threading.Lock()
+
+    def bucket(self, path):
+        """
+        Return the TokenBucket governing `path`, or None if it is unlimited.
+        """
+        group = endpoint_group(path)
+        bucket = self.buckets.get(group)
+        if bucket is None and self.default is not None:
+            with self._lock:
+                bucket = self.buckets.setdefault(group, TokenBucket(*self.default))
+        return bucket
+
+    def acquire(self, path):
+        bucket = self.bucket(path)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def acquire_async(self, path):
+        bucket = self.bucket(path)
+        if bucket is not None:
+            await bucket.acquire_async()
@@ -0,0 +1,340 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .exceptions import TensorDockAPIException, TensorDockCircuitOpenError, TensorDockTimeoutError
+from .transport import endpoint_group, endpoint_route, is_idempotent
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Absolute time.monotonic() by which the current call must finish, or None.
+_deadline = contextvars.ContextVar('tensordock_deadline', default=None)
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Bound every API call made inside the block, retries and hedges included, to `seconds`
+    from now. Calls still running when it passes raise TensorDockTimeoutError. A nested
+    deadline can only shorten the enclosing one.
+
+    Example:
+        with deadline(5):
+            details = api.virtual_machines.get_vm_details(server)
+
+    Args:
+        seconds (float): Time budget in seconds, or None for no deadline.
+    """
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """
+    Return the seconds left before the current deadline, or None when no deadline is set.
+    """
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check_deadline(path):
+    """
+    Raise TensorDockTimeoutError if the current deadline has passed.
+
+    Returns:
+        float: The seconds left, or None when no deadline is set.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise TensorDockTimeoutError(f"Deadline exceeded calling {path}")
+    return left
+
+
+class _Circuit:
+    __slots__ = ('state', 'failures', 'opened_at', 'probes', 'probed_at', 'calls', 'failed', 'rejected', 'opened')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probed_at = 0.0
+        self.calls = 0
+        self.failed = 0
+        self.rejected = 0
+        self.opened = 0
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast per endpoint group ("auth", "client", "container", "billing")
+    while the upstream is unhealthy.
+
+    After `failure_threshold` consecutive failures (connection errors, timeouts
+    or 5xx responses) the group's circuit opens and its calls raise
+    TensorDockCircuitOpenError without touching the network. Once
+    `reset_timeout` has passed the circuit half-opens and lets up to
+    `half_open_calls` probe calls through: a success closes it again, a failure
+    re-opens it. Errors the API answers deliberately, such as a 404, count as
+    successes since the upstream is responding. A probe that ends without an
+    outcome, e.g. because its task was cancelled, must be handed back with
+    `release`; probes still unaccounted for after `reset_timeout` are dropped
+    so the circuit cannot stay stuck half-open.
+
+    Example:
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        api = TensorDockAPI(api_key, api_token, circuit_breaker=breaker)
+        breaker.stats()['client']['state']
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_calls=1):
+        """
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open a circuit. Defaults to 5.
+            reset_timeout (float, optional): Seconds a circuit stays open before probing. Defaults to 30.
+            half_open_calls (int, optional): Probe calls let through while half-open. Defaults to 1.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, group):
+        circuit = self._circuits.get(group)
+        if circuit is None:
+            circuit = self._circuits.setdefault(group, _Circuit())
+        return circuit
+
+    def allow(self, path):
+        """
+        Admit a call to `path`, or raise TensorDockCircuitOpenError if its circuit is open.
+        Every admitted call must be followed by `record`, or by `release` if it ended
+        without an outcome.
+        """
+        group = endpoint_group(path)
+        with self._lock:
+            circuit = self._circuit(group)
+            now = time.monotonic()
+            if circuit.state == OPEN:
+                wait = circuit.opened_at + self.reset_timeout - now
+                if wait > 0:
+                    circuit.rejected += 1
+                    raise TensorDockCircuitOpenError(
+                        f"Circuit for {group} endpoints is open; retry in {wait:.1f}s", retry_after=wait)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_calls and now - circuit.probed_at < self.reset_timeout:
+                    circuit.rejected += 1
+                    raise TensorDockCircuitOpenError(f"Circuit for {group} endpoints is half-open; probe in flight")
+                if circuit.probes >= self.half_open_calls:
+                    circuit.probes = 0
+                circuit.probes += 1
+                circuit.probed_at = now
+            circuit.calls += 1
+
+    def release(self, path):
+        """
+        Hand back a call admitted by `allow` that ended without an outcome, such as a
+        cancelled task or an interrupted call, so a half-open circuit can probe again.
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint_group(path))
+            if circuit is not None and circuit.state == HALF_OPEN and circuit.probes:
+                circuit.probes -= 1
+
+    def is_failure(self, error, transient_errors=()):
+        """
+        Return whether `error` counts against the upstream's health. Clients only
+        record calls that were sent, so a deadline that expires before sending
+        never reaches the breaker; a timeout recorded here was the upstream's.
+        """
+        if isinstance(error, TensorDockTimeoutError):
+            return True
+        if isinstance(error, TensorDockAPIException):
+            return error.status_code is not None and error.status_code >= 500
+        return isinstance(error, transient_errors)
+
+    def record(self, path, error=None, transient_errors=()):
+        """
+        Record the outcome of a call admitted by `allow`.
+
+        Args:
+            path (str): Endpoint path of the call.
+            error (Exception, optional): The error the call raised, or None if it succeeded.
+            transient_errors (tuple, optional): Transport exception types that count as failures.
+        """
+        failed = error is not None and self.is_failure(error, transient_errors)
+        with self._lock:
+            circuit = self._circuit(endpoint_group(path))
+            if not failed:
+                circuit.failures = 0
+                circuit.state = CLOSED
+                return
+            circuit.failures += 1
+            circuit.failed += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                if circuit.state != OPEN:
+                    circuit.opened += 1
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+
+    def state(self, group):
+        """
+        Return the state of a group's circuit: "closed", "open" or "half_open".
+        An open circuit whose reset timeout has passed is reported as "half_open".
+        """
+        with self._lock:
+            circuit = self._circuits.get(group)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN and time.monotonic() - circuit.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return circuit.state
+
+    def reset(self, group=None):
+        """
+        Close one group's circuit, or every circuit if `group` is None.
+        """
+        with self._lock:
+            if group is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(group, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Endpoint group to its `state`, current consecutive `failures`, and counts of
+            admitted `calls`, `failed` calls, calls `rejected` while open, and times `opened`.
+        """
+        with self._lock:
+            groups = list(self._circuits.items())
+        return {group: {
+            'state': self.state(group),
+            'failures': circuit.failures,
+            'calls': circuit.calls,
+            'failed': circuit.failed,
+            'rejected': circuit.rejected,
+            'opened': circuit.opened,
+        } for group, circuit in groups}
+
+
+class _Route:
+    __slots__ = ('samples', 'calls', 'hedged', 'wins', 'threshold', 'stale')
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.wins = 0
+        self.threshold = None
+        self.stale = 0
+
+
+class HedgingPolicy:
+    """
+    Sends a duplicate of a slow idempotent call once it has been outstanding
+    longer than the route's observed `quantile` latency; whichever attempt
+    answers first wins and the other is abandoned.
+
+    Only GETs and read-only POSTs are hedged. A route is not hedged until
+    `min_samples` latencies have been observed for it, and at most `max_ratio`
+    of its calls are hedged, so a slow upstream sees at most that much extra load.
+
+    Example:
+        api = TensorDockAPI(api_key, api_token, hedging=HedgingPolicy(quantile=0.95))
+        api.hedging.stats()['client/get/single']['win_rate']
+    """
+    def __init__(self, quantile=0.95, min_samples=20, window=200, max_ratio=0.1, min_delay=0.01):
+        """
+        Args:
+            quantile (float, optional): Latency quantile after which a call is hedged. Defaults to 0.95.
+            min_samples (int, optional): Latencies observed on a route before it is hedged. Defaults to 20.
+            window (int, optional): Number of recent latencies kept per route. Defaults to 200.
+            max_ratio (float, optional): Largest fraction of a route's calls that may be hedged. Defaults to 0.1.
+            min_delay (float, optional): Shortest hedge delay in seconds. Defaults to 0.01.
+        """
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.window = window
+        self.max_ratio = max_ratio
+        self.min_delay = min_delay
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def _route(self, path):
+        route = endpoint_route(path)
+        state = self._routes.get(route)
+        if state is None:
+            state = self._routes.setdefault(route, _Route(self.window))
+        return state
+
+    def _threshold(self, route):
+        # Re-sorting the window on every call is wasted work; refresh the quantile every few samples.
+        if route.threshold is None or route.stale >= max(1, self.window // 20):
+            ordered = sorted(route.samples)
+            route.threshold = ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+            route.stale = 0
+        return route.threshold
+
+    def hedge_after(self, path, method='post'):
+        """
+        Count a call and decide whether to hedge it.
+
+        Returns:
+            float: Seconds after which to send a duplicate, or None not to hedge the call.
+        """
+        if not is_idempotent(path, method):
+            return None
+        with self._lock:
+            route = self._route(path)
+            route.calls += 1
+            if len(route.samples) < self.min_samples or route.hedged >= self.max_ratio * route.calls:
+                return None
+            return max(self.min_delay, self._threshold(route))
+
+    def observe(self, path, seconds):
+        """
+        Record the latency of a successful attempt on `path`.
+        """
+        with self._lock:
+            route = self._route(path)
+            route.samples.append(seconds)
+            route.stale += 1
+
+    def record(self, path, won):
+        """
+        Record a hedge sent for `path` and whether it answered before the original attempt.
+        """
+        with self._lock:
+            route = self._route(path)
+            route.hedged += 1
+            route.wins += bool(won)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Route to its counted `calls`, `hedged` calls, `hedge_wins`, `win_rate` (wins per
+            hedge) and current hedge `delay` in seconds (None until enough samples are observed).
+        """
+        with self._lock:
+            return {name: {
+                'calls': route.calls,
+                'hedged': route.hedged,
+                'hedge_wins': route.wins,
+                'win_rate': route.wins / route.hedged if route.hedged else None,
+                'delay': self._threshold(route) if len(route.samples) >= self.min_samples else None,
+            } for name, route in self._routes.items()}
@@ -0,0 +1,67 @@
+import random
+
+from .exceptions import TensorDockAPIException
+from .transport import is_idempotent
+
+DEFAULT_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Retries failed calls with jittered exponential backoff.
+
+    A call is retried when the API answers with a retryable status or the
+    connection fails. A Retry-After header sent with the error is honored in
+    place of the computed backoff; if it asks for a longer wait than
+    `backoff_max`, the error is raised instead. Only idempotent calls (GETs
+    and read-only POSTs) are retried unless `retry_non_idempotent` is set.
+    """
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0,
+                 retry_statuses=DEFAULT_RETRY_STATUSES, retry_non_idempotent=False):
+        """
+        Args:
+            max_retries (int, optional): Maximum number of retries per call. Defaults to 3.
+            backoff_base (float, optional): Backoff cap in seconds for the first retry; doubled for
+                every further retry. Defaults to 0.5.
+            backoff_max (float, optional): Maximum delay between attempts in seconds. Defaults to 30.
+            retry_statuses (iterable, optional): HTTP status codes to retry. Defaults to 429 and 5xx gateway errors.
+            retry_non_idempotent (bool, optional): Also retry calls that mutate state. Defaults to False.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def backoff(self, attempt):
+        """
+        Return a "full jitter" delay for the given retry attempt (0-based).
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def delay_for(self, path, method, attempt, error, transient_errors=()):
+        """
+        Decide whether a failed call should be retried.
+
+        Args:
+            path (str): Endpoint path of the call.
+            method (str): HTTP method of the call.
+            attempt (int): Number of retries already made.
+            error (Exception): The error the attempt raised.
+            transient_errors (tuple, optional): Transport exception types that are safe to retry.
+
+        Returns:
+            float: Seconds to wait before retrying, or None to give up and re-raise.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if not self.retry_non_idempotent and not is_idempotent(path, method):
+            return None
+        if isinstance(error, TensorDockAPIException):
+            if error.status_code not in self.retry_statuses:
+                return None
+            if error.retry_after is not None:
+                return error.retry_after if error.retry_after <= self.backoff_max else None
+        elif not isinstance(error, transient_errors):
+            return None
+        return self.backoff(attempt)
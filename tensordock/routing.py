@@ -0,0 +1,326 @@
+import asyncio
+import itertools
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from .batch import run_many, run_many_async, DEFAULT_MAX_WORKERS
+
+DEFAULT_REFRESH_INTERVAL = 30.0
+DEFAULT_PROBE_TIMEOUT = 1.0
+
+ROUND_ROBIN = 'round_robin'
+LEAST_COST = 'least_cost'
+
+ReplicaEndpoint = namedtuple('ReplicaEndpoint', ['ip', 'port', 'vm_uuid', 'rate_hourly'])
+ReplicaEndpoint.__doc__ = """
+One externally reachable address of a container replica.
+
+Attributes:
+    ip (str): Public IP address of the replica.
+    port (int): External port forwarded to the requested internal port.
+    vm_uuid (str): UUID of the VM running the replica.
+    rate_hourly (float): Hourly rate of the replica.
+"""
+
+
+def build_routes(response):
+    """
+    Turn a `get_container_replicas` response into a routing table.
+
+    Args:
+        response (dict): The `get_container_replicas` response.
+
+    Returns:
+        dict: A mapping of internal port to the list of ReplicaEndpoint tuples serving it.
+    """
+    routes = {}
+    for replica in response.get('result') or ():
+        ip = replica.get('ip_address')
+        if not ip:
+            continue
+        for internal, external in zip(replica.get('internal_ports') or (), replica.get('external_ports') or ()):
+            routes.setdefault(int(internal), []).append(
+                ReplicaEndpoint(ip, int(external), replica.get('vm_uuid'), replica.get('rate_hourly') or 0.0)
+            )
+    return routes
+
+
+class _Routes:
+    """
+    The routing table of one container, with the per-port lists lookups need
+    precomputed: every endpoint, the healthy ones, and the cheapest healthy ones.
+    """
+    __slots__ = ('all', 'healthy', 'cheapest', 'updated')
+
+    def __init__(self, routes, health, updated):
+        self.all = {port: tuple(endpoints) for port, endpoints in routes.items()}
+        self.healthy = {}
+        self.cheapest = {}
+        for port, endpoints in self.all.items():
+            healthy = tuple(endpoint for endpoint in endpoints if health.get(endpoint[:2], True))
+            self.healthy[port] = healthy
+            if healthy:
+                rate = min(endpoint.rate_hourly for endpoint in healthy)
+                self.cheapest[port] = tuple(endpoint for endpoint in healthy if endpoint.rate_hourly == rate)
+            else:
+                self.cheapest[port] = ()
+        self.updated = updated
+
+
+class ReplicaResolver:
+    """
+    Cached routing table from container internal ports to replica endpoints.
+
+    Each watched container's `get_container_replicas` response is turned into
+    a table mapping internal port to its (ip, external port) endpoints, so
+    routing a request is a dictionary lookup instead of an API call. One
+    background worker refreshes every watched container each `interval`
+    seconds, fetching them concurrently, and can TCP-probe every endpoint so
+    unreachable replicas are skipped. A container whose refresh fails keeps
+    its previous table.
+
+    Example:
+        with ReplicaResolver(api, health_check=True) as resolver:
+            resolver.watch(container_id)
+            ip, port, _, _ = resolver.resolve(container_id, 5000)
+
+    With AsyncTensorDockAPI, use `await resolver.watch_async(...)` and
+    `await resolver.start_async()`; lookups are the same in both cases.
+    """
+    def __init__(self, api, interval=DEFAULT_REFRESH_INTERVAL, health_check=False,
+                 probe_timeout=DEFAULT_PROBE_TIMEOUT, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            api (TensorDockAPI or AsyncTensorDockAPI): Client to fetch replicas with.
+            interval (float, optional): Seconds between background refreshes. Defaults to 30.
+            health_check (bool, optional): TCP-probe every endpoint on each refresh and route only to
+                the ones that accept a connection. Defaults to False.
+            probe_timeout (float, optional): Seconds to wait for a probe to connect. Defaults to 1.
+            max_workers (int, optional): Maximum concurrent replica fetches and probes. Defaults to 10.
+        """
+        self.api = api
+        self.interval = interval
+        self.health_check = health_check
+        self.probe_timeout = probe_timeout
+        self.max_workers = max_workers
+        self.last_error = None
+        self._tables = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._task = None
+
+    # Lookups
+
+    def containers(self):
+        """
+        Return the IDs of the watched containers.
+        """
+        return list(self._tables)
+
+    def endpoints(self, container_id, internal_port, healthy=True):
+        """
+        Return the endpoints serving an internal port of a container.
+
+        Args:
+            container_id (str): ID of a watched container.
+            internal_port (int): Port inside the container, e.g. 5000.
+            healthy (bool, optional): Leave out endpoints that failed their last probe. Defaults to True.
+
+        Returns:
+            tuple: ReplicaEndpoint tuples; empty if the container is not watched or has none.
+        """
+        routes = self._tables.get(container_id)
+        if routes is None:
+            return ()
+        return (routes.healthy if healthy else routes.all).get(internal_port, ())
+
+    def resolve(self, container_id, internal_port, strategy=ROUND_ROBIN):
+        """
+        Pick one healthy endpoint for an internal port of a container.
+
+        Args:
+            container_id (str): ID of a watched container.
+            internal_port (int): Port inside the container.
+            strategy (str, optional): "round_robin" to rotate over every healthy endpoint, or
+                "least_cost" to rotate over the healthy endpoints with the lowest `rate_hourly`.
+                Defaults to "round_robin".
+
+        Returns:
+            ReplicaEndpoint: The chosen endpoint, or None if there is no healthy endpoint.
+        """
+        routes = self._tables.get(container_id)
+        if routes is None:
+            return None
+        if strategy == LEAST_COST:
+            candidates = routes.cheapest.get(internal_port, ())
+        elif strategy == ROUND_ROBIN:
+            candidates = routes.healthy.get(internal_port, ())
+        else:
+            raise ValueError(f"Unknown strategy {strategy!r}")
+        if not candidates:
+            return None
+        key = (container_id, internal_port, strategy)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        return candidates[next(counter) % len(candidates)]
+
+    def age(self, container_id):
+        """
+        Seconds since a container's table was last refreshed, or None if it is not watched.
+        """
+        routes = self._tables.get(container_id)
+        return None if routes is None else time.monotonic() - routes.updated
+
+    # Watching
+
+    def watch(self, container_id):
+        """
+        Start routing a container: fetch its replicas now and refresh them in the background.
+
+        Raises:
+            TensorDockAPIException: If the initial fetch failed.
+        """
+        if container_id not in self._tables:
+            self._refresh([container_id], raise_errors=True)
+
+    async def watch_async(self, container_id):
+        """
+        Coroutine counterpart of `watch` for AsyncTensorDockAPI.
+        """
+        if container_id not in self._tables:
+            await self._refresh_async([container_id], raise_errors=True)
+
+    def unwatch(self, container_id):
+        """
+        Stop routing a container and drop its table.
+        """
+        with self._lock:
+            self._tables.pop(container_id, None)
+            for key in [key for key in self._counters if key[0] == container_id]:
+                del self._counters[key]
+
+    # Refreshing
+
+    def _install(self, containers, responses, health, raise_errors):
+        now = time.monotonic()
+        error = None
+        with self._lock:
+            for container_id in containers:
+                response = responses[container_id]
+                if isinstance(response, Exception):
+                    error = response
+                    continue
+                if not raise_errors and container_id not in self._tables:
+                    continue  # unwatched while the refresh was in flight
+                self._tables[container_id] = _Routes(build_routes(response), health, now)
+        self.last_error = error
+        if error is not None and raise_errors:
+            raise error
+
+    def _addresses(self, responses):
+        return {endpoint[:2] for response in responses.values() if not isinstance(response, Exception)
+                for endpoints in build_routes(response).values() for endpoint in endpoints}
+
+    def _probe(self, address):
+        try:
+            socket.create_connection(address, timeout=self.probe_timeout).close()
+            return True
+        except OSError:
+            return False
+
+    async def _probe_async(self, address):
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(*address), self.probe_timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        return True
+
+    def _refresh(self, containers, raise_errors=False):
+        responses = run_many(self.api.containers.get_container_replicas, containers, self.max_workers)
+        health = {}
+        if self.health_check:
+            health = run_many(self._probe, self._addresses(responses), self.max_workers)
+        self._install(containers, responses, health, raise_errors)
+
+    async def _refresh_async(self, containers, raise_errors=False):
+        responses = await run_many_async(self.api.containers.get_container_replicas, containers, self.max_workers)
+        health = {}
+        if self.health_check:
+            health = await run_many_async(self._probe_async, self._addresses(responses), self.max_workers)
+        self._install(containers, responses, health, raise_errors)
+
+    def refresh(self):
+        """
+        Refresh every watched container now. Failures are kept in `last_error`.
+        """
+        self._refresh(self.containers())
+
+    async def refresh_async(self):
+        """
+        Coroutine counterpart of `refresh` for AsyncTensorDockAPI.
+        """
+        await self._refresh_async(self.containers())
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as error:
+                self.last_error = error
+
+    async def _run_async(self):
+        while not self._stopped.is_set():
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_async()
+            except Exception as error:
+                self.last_error = error
+
+    def start(self):
+        """
+        Start the background refresh thread. Returns the resolver.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='tensordock-replica-resolver', daemon=True)
+            self._thread.start()
+        return self
+
+    async def start_async(self):
+        """
+        Start the background refresh task on the running event loop. Returns the resolver.
+        """
+        if self._task is None or self._task.done():
+            self._stopped.clear()
+            self._task = asyncio.ensure_future(self._run_async())
+        return self
+
+    def stop(self):
+        """
+        Stop the background refresh thread or task.
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def __aenter__(self):
+        return await self.start_async()
+
+    async def __aexit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,403 @@
+import json
+import math
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from .cache import ResponseCache, _matches
+
+# Read endpoints whose responses are written to the store by default.
+DEFAULT_SNAPSHOT_PATHS = ('client/list', 'client/get/single', 'client/deploy/hostnodes')
+
+Snapshot = namedtuple('Snapshot', ['fetched_at', 'data'])
+Snapshot.__doc__ = """
+A stored response or record.
+
+Attributes:
+    fetched_at (float): Unix time the response was received.
+    data (dict): The stored JSON data.
+"""
+
+GpuObservation = namedtuple('GpuObservation', ['fetched_at', 'hostnode_id', 'gpu_model', 'amount', 'price'])
+GpuObservation.__doc__ = """
+A change in the GPUs one hostnode offered for one model.
+
+Attributes:
+    fetched_at (float): Unix time of the snapshot the change was first seen in.
+    hostnode_id (str): UUID of the hostnode.
+    gpu_model (str): GPU model, e.g. "rtxa6000-pcie-48gb".
+    amount (int): Number of GPUs available; 0 once the hostnode stopped offering the model.
+    price (float): Hourly price per GPU.
+"""
+
+GpuAvailability = namedtuple('GpuAvailability', ['at', 'hostnodes', 'amount', 'min_price'])
+GpuAvailability.__doc__ = """
+Marketplace availability of one GPU model at a point in time.
+
+Attributes:
+    at (float): The Unix time the availability was computed for.
+    hostnodes (int): Number of hostnodes offering the model.
+    amount (int): Total number of GPUs of the model available.
+    min_price (float): Lowest hourly price per GPU, or None if none were available.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (path, params)
+);
+CREATE TABLE IF NOT EXISTS vms (
+    server TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hostnodes (
+    hostnode_id TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gpu_current (
+    hostnode_id TEXT NOT NULL,
+    gpu_model TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    price REAL,
+    PRIMARY KEY (hostnode_id, gpu_model)
+);
+CREATE TABLE IF NOT EXISTS gpu_history (
+    fetched_at REAL NOT NULL,
+    hostnode_id TEXT NOT NULL,
+    gpu_model TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    price REAL
+);
+CREATE INDEX IF NOT EXISTS gpu_history_model ON gpu_history (gpu_model, fetched_at);
+CREATE INDEX IF NOT EXISTS gpu_history_hostnode ON gpu_history (hostnode_id, fetched_at);
+"""
+
+
+class SnapshotStore:
+    """
+    SQLite-backed store of API responses for warm starts and historical queries.
+
+    Pass it to a client as `snapshots=` and every successful response from the
+    endpoints in `paths` is written to the database with its timestamp: the
+    latest raw response per endpoint and parameters, one row per VM and per
+    hostnode so single records can be looked up by UUID without loading a
+    whole listing, and a change log of every hostnode's GPU amount and price
+    for querying the marketplace over time. If the client also has a response
+    cache, it is pre-filled from the store on startup so the first
+    `list_vms`/`get_available_hostnodes` calls after a restart need no
+    request.
+
+    Responses are encoded and written by a background thread, so recording
+    adds no latency to the call; the queries below wait for pending writes
+    first, and `flush` does so explicitly. A recorded response must not be
+    mutated afterwards.
+
+    Example:
+        store = SnapshotStore('tensordock.db', warm_max_age=300)
+        api = TensorDockAPI(api_key, api_token, cache=True, snapshots=store)
+        ...
+        store.gpu_availability('rtxa6000-pcie-48gb', at=time.time() - 86400)
+    """
+    def __init__(self, path, paths=DEFAULT_SNAPSHOT_PATHS, warm_max_age=None):
+        """
+        Args:
+            path (str): SQLite database file; ":memory:" for a store that lives only in this process.
+            paths (iterable, optional): Endpoint paths (and their sub-paths) to record.
+                Defaults to the VM listing, VM details and hostnode endpoints.
+            warm_max_age (float, optional): Oldest response in seconds that may pre-fill a cache. By
+                default a response is only used while it is younger than the cache's TTL for it.
+        """
+        self.path = path
+        self.paths = tuple(paths)
+        self.warm_max_age = warm_max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._pending = queue.Queue()
+        self._writer = None
+        self._error = None
+
+    def records(self, path):
+        """
+        Return whether responses from `path` are written to the store.
+        """
+        return any(_matches(path, prefix) for prefix in self.paths)
+
+    def record(self, path, data, response, fetched_at=None):
+        """
+        Queue a successful response to be stored. Called by the client for every endpoint in `paths`.
+
+        Args:
+            path (str): Endpoint path of the call.
+            data (dict): Parameters of the call.
+            response (dict): The decoded response.
+            fetched_at (float, optional): Unix time the response was received. Defaults to now.
+        """
+        if not self.records(path):
+            return
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_pending, name='tensordock-snapshots',
+                                                    daemon=True)
+                    self._writer.start()
+        self._pending.put((path, data, response, fetched_at))
+
+    def flush(self):
+        """
+        Wait until every recorded response has been written. Raises the first error
+        a background write hit since the last flush, if any.
+        """
+        if self._writer is not None:
+            self._pending.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _write_pending(self):
+        """
+        Internal method run by the writer thread: writes queued responses in one
+        transaction per batch until it takes None off the queue.
+        """
+        while True:
+            batch = [self._pending.get()]
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([entry for entry in batch if entry is not None])
+            except Exception as error:
+                self._error = self._error or error
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+            if None in batch:
+                return
+
+    def _write(self, batch):
+        with self._lock, self._db:
+            self._db.execute('BEGIN')
+            for entry in batch:
+                self._db.execute('SAVEPOINT entry')
+                try:
+                    self._store(*entry)
+                except Exception as error:
+                    self._db.execute('ROLLBACK TO entry')
+                    self._error = self._error or error
+                self._db.execute('RELEASE entry')
+
+    def _store(self, path, data, response, fetched_at):
+        params = ResponseCache.key_for(path, data)[1]
+        self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                         (path, params, fetched_at, json.dumps(response)))
+        if path == 'client/list':
+            self._record_vms(fetched_at, response.get('virtualmachines') or {}, full=True)
+        elif path == 'client/get/single' and (data or {}).get('server'):
+            self._record_vms(fetched_at, {data['server']: response.get('virtualmachine') or {}}, full=False)
+        elif path == 'client/deploy/hostnodes':
+            full = not int((data or {}).get('minGPUCount') or 0)
+            self._record_hostnodes(fetched_at, response.get('hostnodes') or {}, full)
+        elif path.startswith('client/deploy/hostnodes/'):
+            hostnode_id = path.rsplit('/', 1)[1]
+            if isinstance(response.get(hostnode_id), dict):
+                self._record_hostnodes(fetched_at, {hostnode_id: response[hostnode_id]}, full=False)
+
+    def _record_vms(self, fetched_at, vms, full):
+        self._db.executemany(
+            'INSERT OR REPLACE INTO vms VALUES (?, ?, ?, ?)',
+            ((server, fetched_at, vm.get('status'), json.dumps(vm)) for server, vm in vms.items()),
+        )
+        if full:
+            # VMs missing from a complete listing have been deleted.
+            self._db.execute('DELETE FROM vms WHERE fetched_at < ?', (fetched_at,))
+
+    def _record_hostnodes(self, fetched_at, hostnodes, full):
+        self._db.executemany(
+            'INSERT OR REPLACE INTO hostnodes VALUES (?, ?, ?)',
+            ((hostnode_id, fetched_at, json.dumps(hostnode)) for hostnode_id, hostnode in hostnodes.items()),
+        )
+        db = self._db
+        db.execute('CREATE TEMP TABLE IF NOT EXISTS gpu_seen ('
+                   'hostnode_id TEXT, gpu_model TEXT, amount INTEGER, price REAL, PRIMARY KEY (hostnode_id, gpu_model))')
+        db.execute('DELETE FROM gpu_seen')
+        db.executemany('INSERT OR REPLACE INTO gpu_seen VALUES (?, ?, ?, ?)', (
+            (hostnode_id, model, spec.get('amount') or 0, spec.get('price'))
+            for hostnode_id, hostnode in hostnodes.items()
+            for model, spec in ((hostnode.get('specs') or {}).get('gpu') or {}).items()
+        ))
+        # Only changes are logged, so the history grows with market activity rather than poll frequency.
+        db.execute(
+            'INSERT INTO gpu_history SELECT ?, s.hostnode_id, s.gpu_model, s.amount, s.price FROM gpu_seen s '
+            'LEFT JOIN gpu_current c ON c.hostnode_id = s.hostnode_id AND c.gpu_model = s.gpu_model '
+            'WHERE c.hostnode_id IS NULL OR c.amount != s.amount OR c.price IS NOT s.price',
+            (fetched_at,),
+        )
+        # Models a listed hostnode no longer shows, or hostnodes missing from a complete listing, are gone.
+        gone = ('FROM gpu_current c WHERE c.amount > 0 AND NOT EXISTS ('
+                'SELECT 1 FROM gpu_seen s WHERE s.hostnode_id = c.hostnode_id AND s.gpu_model = c.gpu_model)')
+        if not full:
+            gone += ' AND c.hostnode_id IN (SELECT hostnode_id FROM gpu_seen)'
+        db.execute(f'INSERT INTO gpu_history SELECT ?, c.hostnode_id, c.gpu_model, 0, c.price {gone}', (fetched_at,))
+        db.execute(f'UPDATE gpu_current SET amount = 0 WHERE rowid IN (SELECT c.rowid {gone})')
+        db.execute('INSERT OR REPLACE INTO gpu_current SELECT * FROM gpu_seen')
+
+    def latest(self, path, data=None):
+        """
+        Return the most recent stored response for a call.
+
+        Args:
+            path (str): Endpoint path, e.g. "client/list".
+            data (dict, optional): Parameters of the call.
+
+        Returns:
+            Snapshot: The response and when it was fetched, or None if it was never stored.
+        """
+        self.flush()
+        params = ResponseCache.key_for(path, data)[1]
+        with self._lock:
+            row = self._db.execute('SELECT fetched_at, body FROM responses WHERE path = ? AND params = ?',
+                                   (path, params)).fetchone()
+        return Snapshot(row[0], json.loads(row[1])) if row else None
+
+    def vm(self, server):
+        """
+        Return the last stored state of a VM, or None if it is unknown or was deleted.
+        """
+        self.flush()
+        with self._lock:
+            row = self._db.execute('SELECT fetched_at, data FROM vms WHERE server = ?', (server,)).fetchone()
+        return Snapshot(row[0], json.loads(row[1])) if row else None
+
+    def vms_with_status(self, status):
+        """
+        Return the UUIDs of the stored VMs currently in `status`.
+        """
+        self.flush()
+        with self._lock:
+            rows = self._db.execute('SELECT server FROM vms WHERE lower(status) = lower(?)', (status,)).fetchall()
+        return [row[0] for row in rows]
+
+    def hostnode(self, hostnode_id):
+        """
+        Return the last stored state of a hostnode, or None if it was never seen.
+        """
+        self.flush()
+        with self._lock:
+            row = self._db.execute('SELECT fetched_at, data FROM hostnodes WHERE hostnode_id = ?',
+                                   (hostnode_id,)).fetchone()
+        return Snapshot(row[0], json.loads(row[1])) if row else None
+
+    def gpu_history(self, gpu_model, since=None, until=None, hostnode_id=None):
+        """
+        Return every recorded change in the amount or price of a GPU model.
+
+        Args:
+            gpu_model (str): GPU model, e.g. "rtxa6000-pcie-48gb".
+            since (float, optional): Only changes at or after this Unix time.
+            until (float, optional): Only changes at or before this Unix time.
+            hostnode_id (str, optional): Only changes on this hostnode.
+
+        Returns:
+            list: GpuObservation tuples, oldest first.
+        """
+        query = 'SELECT fetched_at, hostnode_id, gpu_model, amount, price FROM gpu_history WHERE gpu_model = ?'
+        args = [gpu_model]
+        if since is not None:
+            query += ' AND fetched_at >= ?'
+            args.append(since)
+        if until is not None:
+            query += ' AND fetched_at <= ?'
+            args.append(until)
+        if hostnode_id is not None:
+            query += ' AND hostnode_id = ?'
+            args.append(hostnode_id)
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY fetched_at', args).fetchall()
+        return [GpuObservation(*row) for row in rows]
+
+    def gpu_availability(self, gpu_model, at=None):
+        """
+        Reconstruct how many GPUs of a model were on offer, and at what lowest price, at a point in time.
+
+        Args:
+            gpu_model (str): GPU model, e.g. "rtxa6000-pcie-48gb".
+            at (float, optional): Unix time to reconstruct. Defaults to now.
+
+        Returns:
+            GpuAvailability: Availability as of the last snapshot taken at or before `at`.
+        """
+        at = time.time() if at is None else at
+        self.flush()
+        with self._lock:
+            hostnodes, amount, min_price = self._db.execute(
+                'SELECT count(*), coalesce(sum(amount), 0), min(price) FROM ('
+                '  SELECT amount, price, max(fetched_at) FROM gpu_history'
+                '  WHERE gpu_model = ? AND fetched_at <= ? GROUP BY hostnode_id'
+                ') WHERE amount > 0',
+                (gpu_model, at),
+            ).fetchone()
+        return GpuAvailability(at, hostnodes, amount, min_price)
+
+    def warm(self, cache):
+        """
+        Pre-fill a ResponseCache with the stored responses that are still fresh enough.
+
+        Args:
+            cache (ResponseCache): The cache to fill.
+
+        Returns:
+            int: Number of responses loaded.
+        """
+        self.flush()
+        now = time.time()
+        with self._lock:
+            paths = [row[0] for row in self._db.execute('SELECT DISTINCT path FROM responses')]
+        loaded = 0
+        for path in paths:
+            ttl = cache.ttl_for(path)
+            if ttl is None:
+                continue
+            max_age = self.warm_max_age if self.warm_max_age is not None else ttl
+            # Expired responses are skipped in SQL, so their bodies are never read or decoded.
+            query, args = 'SELECT params, fetched_at, body FROM responses WHERE path = ?', [path]
+            if not math.isinf(max_age):
+                query += ' AND fetched_at > ?'
+                args.append(now - max_age)
+            with self._lock:
+                rows = self._db.execute(query, args).fetchall()
+            for params, fetched_at, body in rows:
+                cache.set((path, params), json.loads(body), max_age - (now - fetched_at))
+                loaded += 1
+        return loaded
+
+    def close(self):
+        """
+        Write any pending responses and close the database.
+        """
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,332 @@
+import math
+import threading
+import time
+from collections import namedtuple
+
+from .batch import DEFAULT_MAX_WORKERS
+from .exceptions import TensorDockAPIException
+
+DEFAULT_PRECISION = 0.01
+DEFAULT_START_PRICE = 0.1
+DEFAULT_MAX_BID = 50.0
+DEFAULT_BID_TTL = 30.0
+
+SpotBid = namedtuple('SpotBid', ['target', 'price'])
+SpotBid.__doc__ = """
+The lowest viable spot bid found for a hostnode or VM.
+
+Attributes:
+    target (str): UUID of the hostnode (new VMs) or of the VM (existing VMs).
+    price (float): Lowest bid the API accepted, within the optimizer's precision.
+"""
+
+
+def _accepted(result):
+    """
+    Interpret one validation result: True if the bid was accepted, False if it
+    was rejected. Errors other than a rejected bid are re-raised.
+    """
+    if isinstance(result, TensorDockAPIException):
+        if result.status_code is not None and 400 <= result.status_code < 500 and result.status_code != 429:
+            return False
+        raise result
+    if isinstance(result, Exception):
+        raise result
+    return bool(result.get('success'))
+
+
+class _Bracket:
+    """
+    What is known about one target: the highest rejected and lowest accepted bid.
+    """
+    __slots__ = ('created', 'rejected', 'accepted')
+
+    def __init__(self, created):
+        self.created = created
+        self.rejected = 0.0
+        self.accepted = None
+
+    def update(self, price, accepted):
+        if accepted:
+            if self.accepted is None or price < self.accepted:
+                self.accepted = price
+        elif price > self.rejected:
+            self.rejected = price
+
+
+class SpotBidOptimizer:
+    """
+    Finds the lowest spot bid the API accepts, for a new VM on a hostnode or
+    for an existing VM.
+
+    Each search first brackets the winning price by doubling from
+    `start_price`, then narrows the bracket until it is within `precision`.
+    With `probes=1` this is a binary search making one validation call per
+    step; with `probes=k` each step validates k prices concurrently and
+    shrinks the bracket k+1 times, trading extra calls for fewer round trips.
+    What is learned about each (hostnode, spec) or VM is memoized for `ttl`
+    seconds, so repeated searches start from the known bracket. Acceptance is
+    assumed to be monotonic in price.
+
+    Example:
+        optimizer = SpotBidOptimizer(api, probes=3)
+        bid = optimizer.cheapest_bid(hostnode_ids, gpu_model='rtxa4000-pcie-16gb', gpu_count=1,
+                                     vcpus=4, ram=16, storage=50)
+        bids = optimizer.rebid_fleet()  # every Outbid VM
+    """
+    def __init__(self, api, precision=DEFAULT_PRECISION, start_price=DEFAULT_START_PRICE,
+                 max_price=DEFAULT_MAX_BID, probes=1, ttl=DEFAULT_BID_TTL, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            api (TensorDockAPI or AsyncTensorDockAPI): Client to validate bids with.
+            precision (float, optional): Bids are searched on a grid of this step. Defaults to 0.01.
+            start_price (float, optional): First bid tried when nothing is known. Defaults to 0.1.
+            max_price (float, optional): Highest bid ever tried. Defaults to 50.
+            probes (int, optional): Bids validated concurrently per search step. Defaults to 1.
+            ttl (float, optional): Seconds a search result is reused for. Defaults to 30.
+            max_workers (int, optional): Maximum concurrent searches across hostnodes or VMs. Defaults to 10.
+        """
+        self.api = api
+        self.precision = precision
+        self.start_price = start_price
+        self.max_price = max_price
+        self.probes = max(1, probes)
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _grid(self, price):
+        return round(math.ceil(round(price / self.precision, 6)) * self.precision, 10)
+
+    def _bracket(self, key):
+        now = time.monotonic()
+        with self._lock:
+            bracket = self._memo.get(key)
+            if bracket is None or now - bracket.created > self.ttl:
+                bracket = self._memo[key] = _Bracket(now)
+            return bracket
+
+    def clear(self):
+        """
+        Forget every memoized search result.
+        """
+        with self._lock:
+            self._memo.clear()
+
+    def _search(self, key, max_price, bound=None):
+        """
+        The search itself, as a generator: yields lists of prices to validate and
+        receives the matching list of accepted flags. Its return value is the
+        lowest accepted price, or None if nothing up to `max_price` (or the
+        current `bound()`) was accepted.
+        """
+        bracket = self._bracket(key)
+        max_price = self.max_price if max_price is None else max_price
+        while True:
+            with self._lock:
+                rejected, accepted = bracket.rejected, bracket.accepted
+            cap = max_price if bound is None or bound() is None else min(max_price, bound())
+            if accepted is not None and accepted - rejected <= self.precision + 1e-9:
+                return accepted if accepted <= cap else None
+            if rejected >= cap:
+                return None
+            if accepted is not None and accepted > cap:
+                # Another search already found something cheaper than anything above the cap.
+                accepted = None
+
+            if accepted is None:
+                # Bracketing: double from the highest rejected bid until one is accepted.
+                price = max(self.start_price, rejected * 2)
+                prices = []
+                for _ in range(self.probes):
+                    prices.append(min(cap, self._grid(price)))
+                    price *= 2
+            else:
+                step = (accepted - rejected) / (self.probes + 1)
+                prices = [self._grid(rejected + step * (i + 1)) for i in range(self.probes)]
+                prices = [price for price in prices if rejected < price < accepted]
+                if not prices:
+                    return accepted if accepted <= cap else None
+            prices = sorted(set(prices))
+
+            results = yield prices
+            with self._lock:
+                for price, result in zip(prices, results):
+                    bracket.update(price, result)
+                if bracket.accepted is not None and bracket.rejected >= bracket.accepted:
+                    # The market moved mid-search; keep the accepted bid and search below it again.
+                    bracket.rejected = 0.0
+
+    def _run(self, search, validate):
+        try:
+            prices = next(search)
+            while True:
+                if len(prices) == 1:
+                    try:
+                        results = {prices[0]: validate(prices[0])}
+                    except Exception as error:
+                        results = {prices[0]: error}
+                else:
+                    results = self.api._run_many(validate, prices, len(prices))
+                prices = search.send([_accepted(results[price]) for price in prices])
+        except StopIteration as stop:
+            return stop.value
+
+    async def _run_async(self, search, validate):
+        try:
+            prices = next(search)
+            while True:
+                results = await self.api._run_many(validate, prices, len(prices))
+                prices = search.send([_accepted(results[price]) for price in prices])
+        except StopIteration as stop:
+            return stop.value
+
+    def _new(self, hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price, bound=None):
+        key = ('new', hostnode, gpu_model, gpu_count, vcpus, ram, storage)
+
+        def validate(price):
+            return self.api.virtual_machines.validate_spot_price_new(
+                hostnode=hostnode, gpu_model=gpu_model, gpu_count=gpu_count, vcpus=vcpus, ram=ram,
+                storage=storage, price=price,
+            )
+        return self._search(key, max_price, bound), validate
+
+    def _existing(self, server, max_price):
+        def validate(price):
+            return self.api.virtual_machines.validate_spot_price_existing(server, price)
+        return self._search(('existing', server), max_price), validate
+
+    def find_bid(self, hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price=None):
+        """
+        Find the lowest accepted bid for a new spot VM on one hostnode.
+
+        Args:
+            hostnode (str): UUID of the hostnode.
+            gpu_model (str): GPU model.
+            gpu_count (int): Number of GPUs.
+            vcpus (int): Number of vCPUs.
+            ram (int): Amount of RAM in GB.
+            storage (int): Storage amount in GB.
+            max_price (float, optional): Highest bid to try. Defaults to the optimizer's max_price.
+
+        Returns:
+            float: The lowest accepted bid, or None if no bid up to `max_price` was accepted.
+        """
+        return self._run(*self._new(hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price))
+
+    async def find_bid_async(self, hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price=None):
+        """
+        Coroutine counterpart of `find_bid` for AsyncTensorDockAPI.
+        """
+        return await self._run_async(*self._new(hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price))
+
+    def _cheapest(self, results):
+        best = None
+        for hostnode, price in results.items():
+            if isinstance(price, Exception):
+                raise price
+            if price is not None and (best is None or price < best.price):
+                best = SpotBid(hostnode, price)
+        return best
+
+    def _best_bound(self):
+        """
+        A shared upper bound for concurrent searches: no hostnode needs to be
+        searched above the cheapest bid already accepted elsewhere.
+        """
+        state = {'best': None}
+
+        def bound():
+            return state['best']
+
+        def offer(price):
+            if price is not None:
+                with self._lock:
+                    if state['best'] is None or price < state['best']:
+                        state['best'] = price
+            return price
+        return bound, offer
+
+    def cheapest_bid(self, hostnodes, gpu_model, gpu_count, vcpus, ram, storage, max_price=None):
+        """
+        Search many hostnodes concurrently and return the cheapest accepted bid.
+
+        Searches share the best bid found so far as their upper bound, so most
+        hostnodes stop after a few calls once a cheap one has been found.
+
+        Args:
+            hostnodes (iterable): UUIDs of the hostnodes to consider.
+            gpu_model, gpu_count, vcpus, ram, storage: The spec, as for `find_bid`.
+            max_price (float, optional): Highest bid to try. Defaults to the optimizer's max_price.
+
+        Returns:
+            SpotBid: The cheapest (hostnode, price), or None if no hostnode accepted a bid.
+        """
+        bound, offer = self._best_bound()
+
+        def search(hostnode):
+            spec = self._new(hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price, bound)
+            return offer(self._run(*spec))
+        return self._cheapest(self.api._run_many(search, hostnodes, self.max_workers))
+
+    async def cheapest_bid_async(self, hostnodes, gpu_model, gpu_count, vcpus, ram, storage, max_price=None):
+        """
+        Coroutine counterpart of `cheapest_bid` for AsyncTensorDockAPI.
+        """
+        bound, offer = self._best_bound()
+
+        async def search(hostnode):
+            spec = self._new(hostnode, gpu_model, gpu_count, vcpus, ram, storage, max_price, bound)
+            return offer(await self._run_async(*spec))
+        return self._cheapest(await self.api._run_many(search, hostnodes, self.max_workers))
+
+    def find_existing_bid(self, server, max_price=None):
+        """
+        Find the lowest accepted bid for an existing spot VM.
+
+        Args:
+            server (str): UUID of the VM.
+            max_price (float, optional): Highest bid to try. Defaults to the optimizer's max_price.
+
+        Returns:
+            float: The lowest accepted bid, or None if no bid up to `max_price` was accepted.
+        """
+        return self._run(*self._existing(server, max_price))
+
+    async def find_existing_bid_async(self, server, max_price=None):
+        """
+        Coroutine counterpart of `find_existing_bid` for AsyncTensorDockAPI.
+        """
+        return await self._run_async(*self._existing(server, max_price))
+
+    @staticmethod
+    def _outbid(response):
+        return [server for server, vm in (response.get('virtualmachines') or {}).items()
+                if (vm.get('status') or '').lower() == 'outbid']
+
+    def rebid_fleet(self, servers=None, max_price=None):
+        """
+        Find the lowest accepted bid for many existing VMs concurrently.
+
+        Args:
+            servers (iterable, optional): UUIDs of the VMs. Defaults to every VM whose status is Outbid.
+            max_price (float, optional): Highest bid to try per VM. Defaults to the optimizer's max_price.
+
+        Returns:
+            dict: A mapping of each UUID to its lowest accepted bid (None if none was accepted),
+            or to the exception raised for it.
+        """
+        if servers is None:
+            servers = self._outbid(self.api.virtual_machines.list_vms())
+        return self.api._run_many(lambda server: self.find_existing_bid(server, max_price), servers,
+                                  self.max_workers)
+
+    async def rebid_fleet_async(self, servers=None, max_price=None):
+        """
+        Coroutine counterpart of `rebid_fleet` for AsyncTensorDockAPI.
+        """
+        if servers is None:
+            servers = self._outbid(await self.api.virtual_machines.list_vms())
+        return await self.api._run_many(lambda server: self.find_existing_bid_async(server, max_price), servers,
+                                        self.max_workers)
@@ -0,0 +1,266 @@
+import codecs
+import json
+import re
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+# Characters that change nesting depth or string state outside and inside a string.
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+# Characters a JSON number can start with and consist of.
+_NUMBER_START = '-0123456789'
+_NUMBER = re.compile(r'[-+.eE0-9]*')
+
+
+class _Incomplete(Exception):
+    pass
+
+
+class JSONItemStream:
+    """
+    Incremental parser yielding the entries of one container inside a JSON document.
+
+    Feed it the document in chunks; it walks down `path` (a tuple of object
+    keys) and returns each entry of the object or array found there as soon
+    as that entry is complete: `(key, value)` pairs for an object, values for
+    an array. Everything outside the path is skipped one value at a time, so
+    memory is bounded by the largest single entry plus one chunk rather than
+    by the whole document. An entry still incomplete after two decoding
+    attempts is not decoded again until complete: later chunks are only
+    scanned for its closing bracket, carrying the nesting depth and string
+    state over.
+
+    Example:
+        stream = JSONItemStream(('hostnodes',))
+        for chunk in chunks:
+            for hostnode_id, hostnode in stream.feed(chunk):
+                ...
+        stream.close()
+    """
+    def __init__(self, path):
+        self.path = tuple(path)
+        self.level = 0
+        self.state = 'open'
+        self.container = None
+        self.key = None
+        self.finished = False
+        self._buffer = ''
+        self._pos = 0
+        self._consumed = 0
+        self._retried = None
+        self._scan = None
+        self._final = False
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def feed(self, chunk):
+        """
+        Add a chunk of the document (bytes or str) and return the entries it completed.
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk)
+        self._consumed += self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return self._advance()
+
+    def close(self):
+        """
+        Signal the end of the document and return any remaining entries.
+
+        Raises:
+            ValueError: If the document ended inside the target container.
+        """
+        self._final = True
+        self._consumed += self._pos
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(b'', final=True)
+        self._pos = 0
+        items = self._advance()
+        if not self.finished and self.level == len(self.path) and self.state != 'open':
+            raise ValueError("JSON document ended before the streamed container was closed")
+        return items
+
+    def _char(self):
+        """
+        Skip whitespace and return the next character without consuming it.
+        """
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        if pos >= len(buffer):
+            raise _Incomplete
+        return buffer[pos]
+
+    def _value(self):
+        """
+        Decode and consume the complete JSON value at the current position.
+        """
+        self._char()
+        start = self._consumed + self._pos
+        if self._scan is None or self._scan[0] != start:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._final:
+                    raise
+                if self._buffer[self._pos] not in '{["' or self._retried != start:
+                    # Most entries are complete after one more chunk; retry decoding once first.
+                    self._retried = start
+                    raise _Incomplete
+                # Re-decoding a long entry from its start on every chunk is quadratic; scan for its end instead.
+                self._scan = (start, 0, 0, False)
+            else:
+                # raw_decode returns the longest valid prefix of a number, so "1." or "1e" at the end of
+                # the buffer decodes as 1; accept a number only once a character outside it has arrived.
+                if (not self._final and self._buffer[self._pos] in _NUMBER_START
+                        and _NUMBER.match(self._buffer, self._pos).end() == len(self._buffer)):
+                    raise _Incomplete
+                self._pos = end
+                return value
+        self._scan_to_end()
+        self._scan = None
+        value, end = _decoder.raw_decode(self._buffer, self._pos)
+        self._pos = end
+        return value
+
+    def _scan_to_end(self):
+        """
+        Find the end of the object, array or string at the current position, resuming
+        from where the previous chunk's scan stopped, or raise _Incomplete.
+        """
+        start, offset, depth, in_string = self._scan
+        buffer, begin = self._buffer, self._pos
+        pos = begin + offset
+        while True:
+            match = (_STRING_END if in_string else _STRUCTURE).search(buffer, pos)
+            if match is None:
+                self._scan = (start, len(buffer) - begin, depth, in_string)
+                raise _Incomplete
+            char, pos = match.group(), match.end()
+            if in_string:
+                if char == '\\':
+                    if pos == len(buffer):
+                        # Rescan the escape once the escaped character has arrived.
+                        self._scan = (start, pos - 1 - begin, depth, in_string)
+                        raise _Incomplete
+                    pos += 1
+                    continue
+                in_string = False
+                if depth == 0:
+                    return pos
+            elif char == '"':
+                in_string = True
+            elif char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return pos
+
+    def _advance(self):
+        items = []
+        while not self.finished:
+            mark = self._pos
+            try:
+                self._step(items)
+            except _Incomplete:
+                self._pos = mark
+                break
+        return items
+
+    def _step(self, items):
+        target = self.level == len(self.path)
+        state = self.state
+
+        if state == 'open':
+            char = self._char()
+            if target and char in '{[':
+                self.container = char
+            elif char != '{':
+                # The path does not lead to a container; nothing to stream.
+                self.finished = True
+                return
+            self._pos += 1
+            self.state = 'first'
+
+        elif state in ('first', 'next'):
+            char = self._char()
+            if char in '}]':
+                # Either the target container closed, or the key was not found at this level.
+                self._pos += 1
+                self.finished = True
+                return
+            if state == 'next':
+                if char != ',':
+                    raise ValueError(f"Expected ',' in JSON document, found {char!r}")
+                self._pos += 1
+                self._char()
+            if target and self.container == '[':
+                items.append(self._value())
+                self.state = 'next'
+                return
+            key = self._value()
+            if self._char() != ':':
+                raise ValueError("Expected ':' in JSON document")
+            self._pos += 1
+            self.key = key
+            self.state = 'value'
+
+        elif state == 'value':
+            if target:
+                items.append((self.key, self._value()))
+                self.state = 'next'
+            elif self.key == self.path[self.level]:
+                self.level += 1
+                self.state = 'open'
+            else:
+                self._value()
+                self.state = 'next'
+
+
+def count_bytes(chunks, metrics):
+    """
+    Pass chunks through while adding their size to `metrics.response_size`.
+    """
+    metrics.response_size = 0
+    for chunk in chunks:
+        metrics.response_size += len(chunk)
+        yield chunk
+
+
+async def acount_bytes(chunks, metrics):
+    """
+    Async counterpart of `count_bytes`.
+    """
+    metrics.response_size = 0
+    async for chunk in chunks:
+        metrics.response_size += len(chunk)
+        yield chunk
+
+
+def iter_json_items(chunks, path):
+    """
+    Yield the entries of the container at `path` from an iterable of JSON chunks.
+    """
+    stream = JSONItemStream(path)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+        if stream.finished:
+            return
+    yield from stream.close()
+
+
+async def aiter_json_items(chunks, path):
+    """
+    Async counterpart of `iter_json_items` for an async iterable of chunks.
+    """
+    stream = JSONItemStream(path)
+    async for chunk in chunks:
+        for item in stream.feed(chunk):
+            yield item
+        if stream.finished:
+            return
+    for item in stream.close():
+        yield item
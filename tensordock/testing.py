@@ -0,0 +1,884 @@
+import copy
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .cache import _matches
+from .transport import endpoint_route
+
+API_PREFIX = '/api/v0/'
+DEFAULT_UPSTREAM = "https://marketplace.tensordock.com/api/v0"
+DEFAULT_GPU_MODELS = (
+    'rtxa4000-pcie-16gb', 'rtxa5000-pcie-24gb', 'rtxa6000-pcie-48gb', 'geforcertx3090-pcie-24gb',
+    'geforcertx4090-pcie-24gb', 'l40-pcie-48gb', 'a100-pcie-80gb', 'h100-sxm5-80gb', 'v100-pcie-16gb',
+)
+DEFAULT_LOCATIONS = (
+    ('Canada', 'Manitoba', 'Winnipeg'),
+    ('Canada', 'Ontario', 'Toronto'),
+    ('United States', 'Illinois', 'Chicago'),
+    ('United States', 'New York', 'New York City'),
+    ('United States', 'Texas', 'Dallas'),
+    ('Germany', 'Hesse', 'Frankfurt'),
+    ('Netherlands', 'North Holland', 'Amsterdam'),
+    ('Japan', 'Tokyo', 'Tokyo'),
+)
+
+# Parameters never written to fixtures.
+CREDENTIALS = ('api_key', 'api_token')
+
+# Smallest response body compressed when compression is enabled.
+COMPRESSION_MIN_SIZE = 1024
+# Number of compressed bodies kept, so identical responses are compressed once.
+COMPRESSION_CACHE_SIZE = 8
+
+# Transitional status a lifecycle call puts a VM in, and the status it settles in.
+TRANSITIONS = {
+    'deploy': ('Deploying', 'Running'),
+    'start': ('Starting', 'Running'),
+    'stop': ('Stopping', 'Stopped'),
+}
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_hostnodes(count, seed=0, gpu_models=DEFAULT_GPU_MODELS, locations=DEFAULT_LOCATIONS):
+    """
+    Generate a synthetic marketplace in the shape of `get_available_hostnodes`.
+
+    Args:
+        count (int): Number of hostnodes.
+        seed (int, optional): Random seed; the same seed always gives the same marketplace. Defaults to 0.
+        gpu_models (iterable, optional): GPU models to draw from.
+        locations (iterable, optional): (country, region, city) tuples to draw from.
+
+    Returns:
+        dict: A mapping of hostnode UUID to hostnode.
+    """
+    rng = random.Random(seed)
+    gpu_models = list(gpu_models)
+    locations = list(locations)
+    hostnodes = {}
+    for _ in range(count):
+        country, region, city = rng.choice(locations)
+        first_port = rng.randrange(20000, 60000, 100)
+        gpus = {
+            model: {'amount': rng.choice((1, 2, 4, 8)), 'price': round(rng.uniform(0.1, 3.0), 3)}
+            for model in rng.sample(gpu_models, rng.choice((0, 1, 1, 1, 2)))
+        }
+        hostnodes[_uuid(rng)] = {
+            'location': {'city': city, 'country': country, 'dc': None, 'id': _uuid(rng), 'region': region},
+            'networking': {
+                'ports': list(range(first_port, first_port + rng.randint(5, 40))),
+                'receive': rng.choice((1000, 10000)),
+                'send': rng.choice((1000, 10000)),
+            },
+            'specs': {
+                'cpu': {'amount': rng.choice((8, 16, 32, 64, 128)), 'price': 0.003, 'type': 'AMD EPYC 7543'},
+                'gpu': gpus,
+                'ram': {'amount': rng.choice((32, 64, 128, 256, 512)), 'price': 0.002},
+                'storage': {'amount': rng.choice((500, 1000, 2000, 4000)), 'price': 0.00005},
+            },
+            'status': {
+                'listed': rng.random() < 0.95,
+                'online': rng.random() < 0.97,
+                'report': f"https://monitor.m.tensordock.com/report/uptime/{rng.getrandbits(128):032x}/",
+                'uptime': round(rng.uniform(0.9, 1.0), 4),
+            },
+        }
+    return hostnodes
+
+
+def generate_summary(period, seed=0, transactions=50):
+    """
+    Generate a synthetic `get_monthly_summary` response for one billing period.
+
+    Args:
+        period (str): Billing period in YYYY-MM format.
+        seed (int, optional): Random seed. Defaults to 0.
+        transactions (int, optional): Number of transactions per transaction list. Defaults to 50.
+
+    Returns:
+        dict: A response in the shape of `get_monthly_summary`.
+    """
+    rng = random.Random(f"{seed}:{period}")
+    year, month = (int(part) for part in period.split('-'))
+    end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    vms = [_uuid(rng) for _ in range(max(1, transactions // 5))]
+    hostnodes = [_uuid(rng) for _ in range(max(1, transactions // 10))]
+
+    def rows(kind):
+        result = []
+        for _ in range(transactions):
+            rate = round(rng.uniform(0.05, 3.0), 3)
+            row = {
+                'billing_period_start': f"{month:02d}/01",
+                'billing_period_end': f"{end_month:02d}/01",
+                'hostnode_id': rng.choice(hostnodes),
+                'rate_hourly': rate,
+                'total_amount': round(rate * rng.uniform(1, 720), 3),
+                'virtual_machine_id': rng.choice(vms),
+            }
+            if kind.startswith('vm_'):
+                row['gpu_details'] = f"{rng.choice((1, 2, 4))}x {rng.choice(('L40 48 GB', 'RTX A6000 48 GB', 'A100 80 GB'))}"
+            else:
+                row['storage_amount'] = rng.choice((100, 200, 500))
+            result.append(row)
+        return result
+
+    kinds = {kind: rows(kind) for kind in ('vm_expenses', 'storage_expenses', 'vm_payouts', 'storage_payouts')}
+    kinds['deposits'] = [{'amount': round(rng.uniform(100, 5000), 2)} for _ in range(rng.randint(0, 3))]
+    kinds['withdrawals'] = [{'amount': round(rng.uniform(100, 5000), 2)} for _ in range(rng.randint(0, 2))]
+    expenses = sum(row['total_amount'] for kind in ('vm_expenses', 'storage_expenses') for row in kinds[kind])
+    payouts = sum(row['total_amount'] for kind in ('vm_payouts', 'storage_payouts') for row in kinds[kind])
+    previous = round(rng.uniform(0, 5000), 2)
+    final = previous - expenses + payouts + sum(row['amount'] for row in kinds['deposits']) \
+        - sum(row['amount'] for row in kinds['withdrawals'])
+    return {
+        'bill_period': {'startY': f"{year:04d}", 'startM': f"{month:02d}",
+                        'endY': f"{end_year:04d}", 'endM': f"{end_month:02d}"},
+        'changes': {'expenses': f"{expenses:.2f}", 'payouts': f"{payouts:.2f}"},
+        'final_balance': f"{final:.2f}",
+        'organization_billing_address': None,
+        'organization_tax_id': None,
+        'previous_balance': f"{previous:.2f}",
+        'transactions': kinds,
+    }
+
+
+class MockError(Exception):
+    """
+    Raised by a route handler to answer with an error status.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _ports(value):
+    """
+    Parse a port list sent as "{30118, 30117}", "[22, 80]" or a repeated form field.
+    """
+    if isinstance(value, list):
+        value = ','.join(value)
+    return [int(port) for port in str(value or '').strip('{}[]').replace(' ', '').split(',') if port]
+
+
+def _compressors():
+    """
+    Content codings the server can produce, most preferred first: zstd and br
+    when zstd and brotli support are installed, then gzip and deflate.
+    """
+    compressors = {}
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            from backports import zstd
+        except ImportError:
+            zstd = None
+    if zstd is not None:
+        compressors['zstd'] = zstd.compress
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        compressors['br'] = brotli.compress
+    compressors['gzip'] = lambda data: gzip.compress(data, mtime=0)
+    compressors['deflate'] = zlib.compress
+    return compressors
+
+
+def _accepted_codings(header):
+    """
+    Parse an Accept-Encoding header into the set of codings it accepts (q=0 excludes one).
+    """
+    codings = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q=') and params[2:].strip('0.') == '':
+            continue
+        codings.add(coding.strip().lower())
+    return codings
+
+
+def _fixture_key(method, path, params):
+    params = {key: value for key, value in params.items() if key not in CREDENTIALS}
+    return f"{method} {path}?{urlencode(sorted(params.items()), doseq=True)}"
+
+
+class MockServer:
+    """
+    Local stand-in for the TensorDock API, for load tests, benchmarks and offline development.
+
+    Serves every route used by the endpoint classes from an in-memory,
+    stateful simulation: deploying a VM consumes its hostnode's GPUs, vCPUs,
+    RAM, storage and ports, lifecycle calls move VMs through transitional
+    statuses, containers keep their replicas, spot bids are accepted above a
+    hidden per-hostnode price, and billing endpoints return synthetic data.
+    Latency and errors can be injected globally or per route.
+
+    It can also record a live session to a fixture file (proxying to the
+    real API with the credentials stripped from what is written) and replay
+    that file later without network access.
+
+    Example:
+        with MockServer(hostnodes=5000, latency=0.02) as server:
+            api = server.client()
+            hostnodes = api.virtual_machines.get_available_hostnodes()
+
+        # Record against the real API, then replay offline:
+        with MockServer(record='fixtures.jsonl') as server:
+            server.client(api_key, api_token).virtual_machines.list_vms()
+        with MockServer(replay='fixtures.jsonl') as server:
+            server.client().virtual_machines.list_vms()
+    """
+    def __init__(self, hostnodes=200, seed=0, api_key='mock-key', api_token='mock-token', latency=0.0,
+                 jitter=0.0, error_rate=0.0, error_status=503, retry_after=None, slow_rate=0.0, slow_latency=1.0,
+                 faults=None,
+                 transition_delay=0.0, record=None, replay=None, replay_fallback=False,
+                 upstream=DEFAULT_UPSTREAM, compression=False, host='127.0.0.1', port=0):
+        """
+        Args:
+            hostnodes (int or dict, optional): Number of synthetic hostnodes to generate, or a
+                `get_available_hostnodes`-style mapping to serve. Defaults to 200.
+            seed (int, optional): Random seed for generated data and injected faults. Defaults to 0.
+            api_key (str, optional): API key the server accepts. None accepts any credentials.
+            api_token (str, optional): API token the server accepts.
+            latency (float, optional): Seconds added to every response. Defaults to 0.
+            jitter (float, optional): Up to this many extra seconds, uniformly random, per response.
+            error_rate (float, optional): Fraction of requests answered with `error_status`. Defaults to 0.
+            error_status (int, optional): Status of injected errors. Defaults to 503.
+            retry_after (float, optional): Retry-After header sent with injected errors.
+            slow_rate (float, optional): Fraction of responses delayed by a further `slow_latency`,
+                to model a degraded upstream's stragglers. Defaults to 0.
+            slow_latency (float, optional): Extra seconds added to slow responses. Defaults to 1.
+            faults (dict, optional): Per-route overrides of latency, jitter, error_rate, error_status,
+                retry_after, slow_rate and slow_latency, keyed by endpoint path prefix, e.g. {"client/list": {"error_rate": 0.5}}.
+            transition_delay (float, optional): Seconds VMs spend in Deploying/Starting/Stopping. Defaults to 0.
+            record (str, optional): Proxy every request to `upstream` and append the responses to this file.
+            replay (str, optional): Serve the responses recorded in this file.
+            replay_fallback (bool, optional): When replaying, simulate requests that were not recorded
+                instead of answering 404. Defaults to False.
+            upstream (str, optional): Base URL of the API to record from.
+            compression (bool or tuple, optional): Compress response bodies of at least 1 KiB with the
+                best coding the client's Accept-Encoding allows: "zstd" and "br" when zstd and brotli
+                support are installed, then "gzip" and "deflate". A tuple of codings restricts and
+                orders the ones offered. Identical bodies are compressed once. Defaults to False.
+            host (str, optional): Interface to listen on. Defaults to 127.0.0.1.
+            port (int, optional): Port to listen on; 0 picks a free one.
+        """
+        if isinstance(hostnodes, int):
+            hostnodes = generate_hostnodes(hostnodes, seed)
+        elif 'hostnodes' in hostnodes and isinstance(hostnodes['hostnodes'], dict):
+            hostnodes = hostnodes['hostnodes']
+        self.hostnodes = copy.deepcopy(hostnodes)
+        self.seed = seed
+        self.api_key = api_key
+        self.api_token = api_token
+        self.defaults = {'latency': latency, 'jitter': jitter, 'error_rate': error_rate,
+                         'error_status': error_status, 'retry_after': retry_after, 'slow_rate': slow_rate,
+                         'slow_latency': slow_latency}
+        self.faults = faults or {}
+        self.transition_delay = transition_delay
+        self.record = record
+        self.replay = replay
+        self.replay_fallback = replay_fallback
+        self.upstream = upstream.rstrip('/')
+        available = _compressors()
+        if compression is True:
+            compression = tuple(available)
+        for coding in compression or ():
+            if coding not in available:
+                raise ValueError(f"Cannot compress responses with {coding!r}; available: {', '.join(available)}")
+        self.compression = {coding: available[coding] for coding in compression or ()}
+        self.host = host
+        self.port = port
+
+        self.vms = {}
+        self.containers = {}
+        self.balance = 1000.0
+        self.requests = {}
+        rng = random.Random(seed)
+        self.spot_ratio = {hostnode_id: rng.uniform(0.3, 0.8) for hostnode_id in self.hostnodes}
+        self._rng = rng
+        self._lock = threading.RLock()
+        self._fixtures = self._load_fixtures(replay) if replay else None
+        self._upstream_session = None
+        self._compressed = {}
+        self._server = None
+        self._thread = None
+
+    # Server lifecycle
+
+    @property
+    def url(self):
+        """
+        Base URL of the running server, to be used as a client's `base_url`.
+        """
+        return f"http://{self.host}:{self.port}{API_PREFIX.rstrip('/')}"
+
+    def start(self):
+        """
+        Start serving on a background thread. Returns the server.
+        """
+        if self._server is None:
+            self._server = _Server((self.host, self.port), _handler(self))
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever, name='tensordock-mock-server',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the server and close its connections.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._upstream_session is not None:
+            self._upstream_session.close()
+            self._upstream_session = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def client(self, api_key=None, api_token=None, **kwargs):
+        """
+        Return a TensorDockAPI pointed at this server. Extra keyword arguments go to its constructor.
+        """
+        from .api import TensorDockAPI
+        api = TensorDockAPI(api_key or self.api_key or 'mock-key', api_token or self.api_token or 'mock-token',
+                            **kwargs)
+        api.base_url = self.url
+        return api
+
+    def async_client(self, api_key=None, api_token=None, **kwargs):
+        """
+        Return an AsyncTensorDockAPI pointed at this server.
+        """
+        from .async_api import AsyncTensorDockAPI
+        api = AsyncTensorDockAPI(api_key or self.api_key or 'mock-key', api_token or self.api_token or 'mock-token',
+                                 **kwargs)
+        api.base_url = self.url
+        return api
+
+    # Request handling
+
+    def _fault(self, path):
+        fault = dict(self.defaults)
+        for prefix, override in self.faults.items():
+            if _matches(path, prefix) or endpoint_route(path) == prefix:
+                fault.update(override)
+        return fault
+
+    def handle(self, method, path, params):
+        """
+        Answer one request. Returns (status, headers, body bytes).
+        """
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            fault = self._fault(path)
+            delay = fault['latency'] + (self._rng.uniform(0, fault['jitter']) if fault['jitter'] else 0.0)
+            if fault['slow_rate'] and self._rng.random() < fault['slow_rate']:
+                delay += fault['slow_latency']
+            failed = fault['error_rate'] and self._rng.random() < fault['error_rate']
+        if delay:
+            time.sleep(delay)
+        if failed:
+            headers = {}
+            if fault['retry_after'] is not None:
+                headers['Retry-After'] = str(fault['retry_after'])
+            return fault['error_status'], headers, json.dumps({'success': False, 'error': 'Injected failure'}).encode()
+
+        if self.record:
+            return self._proxy(method, path, params)
+        if self._fixtures is not None:
+            recorded = self._fixtures.get(_fixture_key(method, path, params))
+            if recorded:
+                entry = recorded.pop(0) if len(recorded) > 1 else recorded[0]
+                return entry['status'], {}, entry['body'].encode()
+            if not self.replay_fallback:
+                return 404, {}, json.dumps({'success': False, 'error': f"No recorded response for {path}"}).encode()
+
+        try:
+            if self.api_key is not None and (params.get('api_key') != self.api_key
+                                             or params.get('api_token') != self.api_token):
+                raise MockError(401, 'Invalid API key or token')
+            result = self._dispatch(method, path, params)
+        except MockError as error:
+            return error.status, {}, json.dumps({'success': False, 'error': str(error)}).encode()
+        return 200, {}, json.dumps(result).encode()
+
+    def encode(self, content, accept_encoding=None):
+        """
+        Compress a response body for a client sending `accept_encoding`.
+        Returns (body bytes, content coding or None).
+        """
+        if not self.compression or len(content) < COMPRESSION_MIN_SIZE:
+            return content, None
+        accepted = _accepted_codings(accept_encoding)
+        for coding, compress in self.compression.items():
+            if coding not in accepted:
+                continue
+            key = (coding, content)
+            body = self._compressed.get(key)
+            if body is None:
+                body = compress(content)
+                with self._lock:
+                    if len(self._compressed) >= COMPRESSION_CACHE_SIZE:
+                        self._compressed.clear()
+                    self._compressed[key] = body
+            return body, coding
+        return content, None
+
+    def _dispatch(self, method, path, params):
+        if path.startswith('client/deploy/hostnodes/'):
+            return self.hostnode_details(path.rsplit('/', 1)[1])
+        if path.startswith('client/container/') and path.endswith('/replicas'):
+            return self.container_replicas(path[len('client/container/'):-len('/replicas')])
+        route = ROUTES.get(path)
+        if route is None:
+            raise MockError(404, f"Unknown endpoint {path}")
+        return getattr(self, route)(params)
+
+    # Record and replay
+
+    @staticmethod
+    def _load_fixtures(path):
+        fixtures = {}
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    fixtures.setdefault(entry['key'], []).append(entry)
+        return fixtures
+
+    def _proxy(self, method, path, params):
+        import requests
+        if self._upstream_session is None:
+            self._upstream_session = requests.Session()
+        url = f"{self.upstream}/{path}"
+        if method == 'GET':
+            response = self._upstream_session.get(url, params=params)
+        else:
+            response = self._upstream_session.request(method, url, data=params)
+        entry = {'key': _fixture_key(method, path, params), 'status': response.status_code,
+                 'body': response.text, 'recorded_at': time.time()}
+        with self._lock:
+            with open(self.record, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        return response.status_code, {}, response.content
+
+    # Simulation helpers
+
+    def _settle(self, vm):
+        transition = vm.pop('_transition', None)
+        if transition is not None:
+            target, ready_at = transition
+            if time.monotonic() >= ready_at:
+                vm['status'] = target
+            else:
+                vm['_transition'] = transition
+
+    def _transition(self, vm, action):
+        status, target = TRANSITIONS[action]
+        if self.transition_delay:
+            vm['status'] = status
+            vm['_transition'] = (target, time.monotonic() + self.transition_delay)
+        else:
+            vm['status'] = target
+
+    def _public(self, vm):
+        self._settle(vm)
+        return {key: value for key, value in vm.items() if not key.startswith('_')}
+
+    def _vm(self, server):
+        vm = self.vms.get(server)
+        if vm is None:
+            raise MockError(404, f"Virtual machine {server} not found")
+        return vm
+
+    def _reserve(self, hostnode_id, gpu_model, gpu_count, vcpus, ram, storage, ports, sign=1):
+        """
+        Take (sign=1) or return (sign=-1) resources on a hostnode.
+        """
+        hostnode = self.hostnodes.get(hostnode_id)
+        if hostnode is None:
+            raise MockError(400, f"Hostnode {hostnode_id} not found")
+        specs = hostnode['specs']
+        needs = [(specs['cpu'], vcpus), (specs['ram'], ram), (specs['storage'], storage)]
+        if gpu_count:
+            gpu = specs['gpu'].get(gpu_model)
+            if gpu is None:
+                raise MockError(400, f"Hostnode {hostnode_id} has no {gpu_model}")
+            needs.append((gpu, gpu_count))
+        free = hostnode['networking']['ports']
+        if sign > 0:
+            for spec, amount in needs:
+                if spec['amount'] < amount:
+                    raise MockError(400, f"Hostnode {hostnode_id} does not have enough resources")
+            if any(port not in free for port in ports):
+                raise MockError(400, f"Ports {sorted(ports)} are not available on hostnode {hostnode_id}")
+            for port in ports:
+                free.remove(port)
+        else:
+            free.extend(ports)
+        for spec, amount in needs:
+            spec['amount'] -= sign * amount
+
+    def _price(self, hostnode_id, gpu_model, gpu_count, vcpus, ram, storage):
+        specs = self.hostnodes[hostnode_id]['specs']
+        gpu_price = specs['gpu'].get(gpu_model, {}).get('price', 0.0) if gpu_count else 0.0
+        return round(gpu_price * gpu_count + specs['cpu']['price'] * vcpus + specs['ram']['price'] * ram
+                     + specs['storage']['price'] * storage, 4)
+
+    def _spot_threshold(self, hostnode_id, gpu_model, gpu_count, vcpus, ram, storage):
+        return self._price(hostnode_id, gpu_model, gpu_count, vcpus, ram, storage) * self.spot_ratio[hostnode_id]
+
+    def set_vm_status(self, server, status):
+        """
+        Force a VM into a status, e.g. "Outbid", to set up a scenario.
+        """
+        with self._lock:
+            vm = self._vm(server)
+            vm.pop('_transition', None)
+            vm['status'] = status
+
+    # Authorization
+
+    def auth_test(self, params):
+        return {'success': True}
+
+    def auth_list(self, params):
+        return {'success': True, 'authorizations': {'mock': {
+            'permissions': 'All', 'timestamp_creation': '2024-01-01 00:00:00.000000', 'note': 'MockServer',
+        }}}
+
+    # Virtual machines
+
+    def available_hostnodes(self, params):
+        min_gpu_count = int(params.get('minGPUCount') or 0)
+        with self._lock:
+            hostnodes = {
+                hostnode_id: hostnode for hostnode_id, hostnode in self.hostnodes.items()
+                if not min_gpu_count
+                or any(gpu['amount'] >= min_gpu_count for gpu in hostnode['specs']['gpu'].values())
+            }
+            return {'hostnodes': copy.deepcopy(hostnodes), 'success': True}
+
+    def hostnode_details(self, hostnode_id):
+        with self._lock:
+            hostnode = self.hostnodes.get(hostnode_id)
+            if hostnode is None:
+                raise MockError(404, f"Hostnode {hostnode_id} not found")
+            return {'success': True, hostnode_id: copy.deepcopy(hostnode)}
+
+    def deploy_vm(self, params):
+        try:
+            hostnode_id = params['hostnode']
+            gpu_count = int(params.get('gpu_count') or 0)
+            gpu_model = params.get('gpu_model')
+            vcpus, ram, storage = int(params['vcpus']), int(params['ram']), int(params['storage'])
+        except (KeyError, ValueError) as error:
+            raise MockError(400, f"Invalid deployment parameters: {error}")
+        external, internal = _ports(params.get('external_ports')), _ports(params.get('internal_ports'))
+        if len(external) != len(internal):
+            raise MockError(400, "external_ports and internal_ports must have the same length")
+        with self._lock:
+            self._reserve(hostnode_id, gpu_model, gpu_count, vcpus, ram, storage, external)
+            price = self._price(hostnode_id, gpu_model, gpu_count, vcpus, ram, storage)
+            spot = params.get('price_type') == 'spot'
+            if spot and float(params.get('price') or 0) < self._spot_threshold(
+                    hostnode_id, gpu_model, gpu_count, vcpus, ram, storage):
+                self._reserve(hostnode_id, gpu_model, gpu_count, vcpus, ram, storage, external, sign=-1)
+                raise MockError(400, "Spot bid is too low")
+            server = _uuid(self._rng)
+            port_forwards = {str(e): str(i) for e, i in zip(external, internal)}
+            hostnode = self.hostnodes[hostnode_id]
+            self.vms[server] = vm = {
+                'cost': float(params['price']) if spot else price,
+                'hostname': f"{hostnode['location']['city'].lower().replace(' ', '-')}.mock.tensordock.com",
+                'hostnode': hostnode_id,
+                'location': hostnode['location']['id'],
+                'name': params.get('name', ''),
+                'operating_system': params.get('operating_system', ''),
+                'port_forwards': port_forwards,
+                'specs': {'gpu': {'amount': gpu_count, 'type': gpu_model}, 'ram': ram, 'storage': storage,
+                          'vcpus': vcpus},
+                'status': 'Running',
+                'timestamp_creation': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime()),
+                'type': 'spot' if spot else 'on-demand',
+            }
+            self._transition(vm, 'deploy')
+            return {
+                'cost': {'compute_price': price, 'storage_price': 0.0, 'total_price': price},
+                'execution_id': len(self.vms),
+                'ip': vm['hostname'],
+                'port_forwards': port_forwards,
+                'server': server,
+                'success': True,
+            }
+
+    def _vm_resources(self, vm, ports=True):
+        specs = vm['specs']
+        return (vm['hostnode'], specs['gpu']['type'], specs['gpu']['amount'], specs['vcpus'], specs['ram'],
+                specs['storage'], [int(port) for port in vm['port_forwards']] if ports else [])
+
+    def validate_spot_new(self, params):
+        try:
+            hostnode_id = params['hostnode']
+            spec = (params.get('gpu_model'), int(params.get('gpu_count') or 0), int(params.get('vcpus') or 0),
+                    int(params.get('ram') or 0), int(params.get('storage') or 0))
+            price = float(params['price'])
+        except (KeyError, ValueError) as error:
+            raise MockError(400, f"Invalid parameters: {error}")
+        with self._lock:
+            if hostnode_id not in self.hostnodes:
+                raise MockError(400, f"Hostnode {hostnode_id} not found")
+            if price < self._spot_threshold(hostnode_id, *spec):
+                raise MockError(400, "Spot bid is too low")
+        return {'success': True}
+
+    def validate_spot_existing(self, params):
+        with self._lock:
+            vm = self._vm(params.get('server'))
+            hostnode_id, gpu_model, gpu_count, vcpus, ram, storage, _ = self._vm_resources(vm, ports=False)
+            if float(params.get('price') or 0) < self._spot_threshold(hostnode_id, gpu_model, gpu_count, vcpus,
+                                                                       ram, storage):
+                raise MockError(400, "Spot bid is too low")
+        return {'success': True}
+
+    def list_vms(self, params):
+        with self._lock:
+            return {'success': True,
+                    'virtualmachines': {server: self._public(vm) for server, vm in self.vms.items()}}
+
+    def vm_details(self, params):
+        with self._lock:
+            return {'success': True, 'virtualmachine': self._public(self._vm(params.get('server')))}
+
+    def start_vm(self, params):
+        with self._lock:
+            self._transition(self._vm(params.get('server')), 'start')
+        return {'success': True}
+
+    def stop_vm(self, params):
+        with self._lock:
+            self._transition(self._vm(params.get('server')), 'stop')
+        return {'success': True}
+
+    def modify_vm(self, params):
+        server = params.get('server_id')
+        with self._lock:
+            vm = self._vm(server)
+            old = self._vm_resources(vm, ports=False)
+            specs = vm['specs']
+            new = (old[0], params.get('gpu_model', specs['gpu']['type']),
+                   int(params.get('gpu_count', specs['gpu']['amount'])), int(params.get('vcpus', specs['vcpus'])),
+                   int(params.get('ram', specs['ram'])), int(params.get('storage', specs['storage'])), [])
+            self._reserve(*old, sign=-1)
+            try:
+                self._reserve(*new)
+            except MockError:
+                self._reserve(*old)
+                raise
+            specs.update(gpu={'amount': new[2], 'type': new[1]}, vcpus=new[3], ram=new[4], storage=new[5])
+            if vm.get('type') != 'spot':
+                vm['cost'] = self._price(*new[:6])
+        return {'server': server, 'success': True}
+
+    def delete_vm(self, params):
+        with self._lock:
+            vm = self._vm(params.get('server'))
+            self._reserve(*self._vm_resources(vm), sign=-1)
+            del self.vms[params['server']]
+        return {'success': True}
+
+    # Containers
+
+    def _replica(self, container):
+        return {
+            'external_ports': [self._rng.randrange(40000, 50000) for _ in range(3)],
+            'hostnode_uptime_url': f"https://monitor.m.tensordock.com/report/uptime/{self._rng.getrandbits(128):032x}",
+            'internal_ports': [22, container['networking_port'], 7000],
+            'ip_address': f"10.{self._rng.randrange(256)}.{self._rng.randrange(256)}.{self._rng.randrange(1, 255)}",
+            'rate_hourly': container['rate_hourly'],
+            'vm_uuid': _uuid(self._rng),
+        }
+
+    def deploy_container(self, params):
+        container_id = params.get('project_id') or params.get('display_name')
+        if not container_id:
+            raise MockError(400, "project_id is required")
+        with self._lock:
+            container = self.containers[container_id] = {
+                'networking_port': int(params.get('networking_port') or 80),
+                'rate_hourly': float(params.get('max_vm_rate_hourly') or 0.3),
+                'replicas': [],
+            }
+            container['replicas'] = [self._replica(container) for _ in range(int(params.get('replicas') or 1))]
+        return {'success': True}
+
+    def scale_container(self, params):
+        with self._lock:
+            container = self.containers.get(params.get('container_id'))
+            if container is None:
+                raise MockError(404, f"Container {params.get('container_id')} not found")
+            change = int(params.get('replicas') or 0)
+            if change >= 0:
+                container['replicas'].extend(self._replica(container) for _ in range(change))
+            else:
+                del container['replicas'][max(0, len(container['replicas']) + change):]
+        return {'success': True}
+
+    def stop_container(self, params):
+        with self._lock:
+            if self.containers.pop(params.get('container_id'), None) is None:
+                raise MockError(404, f"Container {params.get('container_id')} not found")
+        return {'success': True}
+
+    def container_replicas(self, container_id):
+        with self._lock:
+            container = self.containers.get(container_id)
+            if container is None:
+                raise MockError(404, f"Container {container_id} not found")
+            return {'result': copy.deepcopy(container['replicas'])}
+
+    # Billing
+
+    def billing_balance(self, params):
+        with self._lock:
+            hourly = sum(vm['cost'] for vm in self.vms.values() if self._public(vm)['status'] == 'Running')
+            return {'balance': round(self.balance, 3), 'hourly_cost': round(hourly, 3), 'success': True}
+
+    def billing_revenue(self, params):
+        with self._lock:
+            by_hostnode = {}
+            for server, vm in self.vms.items():
+                if params.get('hostnode_id') and vm['hostnode'] != params['hostnode_id']:
+                    continue
+                by_hostnode.setdefault(vm['hostnode'], []).append((server, vm))
+            data = []
+            for hostnode_id, vms in by_hostnode.items():
+                hostnode = self.hostnodes[hostnode_id]
+                location = hostnode['location']
+                specs = hostnode['specs']
+                data.append({
+                    'hostnode_id': hostnode_id,
+                    'location': f"{location['city']}, {location['region']}, {location['country']}",
+                    'used_storage': sum(vm['specs']['storage'] for _, vm in vms),
+                    'used_gpus': sum(vm['specs']['gpu']['amount'] for _, vm in vms),
+                    'used_cpus': sum(vm['specs']['vcpus'] for _, vm in vms),
+                    'used_ram': sum(vm['specs']['ram'] for _, vm in vms),
+                    'available_storage': specs['storage']['amount'],
+                    'available_gpus': sum(gpu['amount'] for gpu in specs['gpu'].values()),
+                    'available_cpus': specs['cpu']['amount'],
+                    'available_ram': specs['ram']['amount'],
+                    'revenue_storage': round(sum(vm['specs']['storage'] * specs['storage']['price']
+                                                 for _, vm in vms), 4),
+                    'revenue_compute': round(sum(vm['cost'] for _, vm in vms), 4),
+                    'virtual_machines': [{
+                        'id': server,
+                        'used_storage': vm['specs']['storage'],
+                        'used_gpus': vm['specs']['gpu']['amount'],
+                        'used_cpus': vm['specs']['vcpus'],
+                        'used_ram': vm['specs']['ram'],
+                        'revenue_storage': round(vm['specs']['storage'] * specs['storage']['price'], 4),
+                        'revenue_compute': vm['cost'],
+                    } for server, vm in vms],
+                })
+        return {'data': data}
+
+    def billing_summary(self, params):
+        period = params.get('period') or ''
+        try:
+            year, month = (int(part) for part in period.split('-'))
+        except ValueError:
+            raise MockError(400, "period must be in YYYY-MM format")
+        if not 1 <= month <= 12:
+            raise MockError(400, "period must be in YYYY-MM format")
+        return generate_summary(f"{year:04d}-{month:02d}", self.seed)
+
+
+ROUTES = {
+    'auth/test': 'auth_test',
+    'auth/list': 'auth_list',
+    'client/deploy/hostnodes': 'available_hostnodes',
+    'client/deploy/single': 'deploy_vm',
+    'client/spot/validate/new': 'validate_spot_new',
+    'client/spot/validate/existing': 'validate_spot_existing',
+    'client/list': 'list_vms',
+    'client/get/single': 'vm_details',
+    'client/start/single': 'start_vm',
+    'client/stop/single': 'stop_vm',
+    'client/modify/single': 'modify_vm',
+    'client/delete/single': 'delete_vm',
+    'client/container/deploy': 'deploy_container',
+    'client/container/scale': 'scale_container',
+    'client/container/stop': 'stop_container',
+    'billing/balance': 'billing_balance',
+    'billing/revenue': 'billing_revenue',
+    'billing/summary': 'billing_summary',
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib default of 5 drops connections when clients open many at once.
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on requests they no longer need (cancelled tasks, lost hedges); that is not an error.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; without this, keep-alive clients wait on delayed ACKs.
+        disable_nagle_algorithm = True
+
+        def _serve(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode() if length else ''
+            params = {}
+            for source in (url.query, body):
+                for key, values in parse_qs(source, keep_blank_values=True).items():
+                    params[key] = values[0] if len(values) == 1 else values
+            path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path.lstrip('/')
+            status, headers, content = mock.handle(self.command, path, params)
+            content, coding = mock.encode(content, self.headers.get('Accept-Encoding'))
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            if coding is not None:
+                self.send_header('Content-Encoding', coding)
+            self.send_header('Content-Length', str(len(content)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,277 @@
+import json
+import threading
+import time
+from urllib.parse import urlencode
+
+from .exceptions import TensorDockAPIException
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+# JSON decoder backends, fastest first; "auto" picks the first one installed.
+JSON_DECODERS = ('orjson', 'msgspec', 'json')
+
+# POST endpoints that only read state and can be retried safely.
+IDEMPOTENT_PATHS = frozenset({
+    'auth/test',
+    'auth/list',
+    'client/list',
+    'client/get/single',
+    'client/spot/validate/new',
+    'client/spot/validate/existing',
+    'billing/balance',
+    'billing/revenue',
+    'billing/summary',
+})
+
+
+# Seconds the calling thread's last request spent opening a new connection.
+_connect_timing = threading.local()
+_timed_adapter = None
+
+
+def connect_time():
+    """
+    Return and clear the seconds the calling thread's last request through a session
+    from `create_session` spent opening a new connection, or None if it reused a
+    pooled connection.
+    """
+    seconds = getattr(_connect_timing, 'seconds', None)
+    _connect_timing.seconds = None
+    return seconds
+
+
+def _timed_adapter_class():
+    """
+    Build, once, an HTTPAdapter whose connection pools time `connect()` into
+    `_connect_timing`. requests reports only the total time to the response
+    headers, so this is the one place connection setup can be measured.
+    """
+    global _timed_adapter
+    if _timed_adapter is not None:
+        return _timed_adapter
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def timed(connection_class):
+        class TimedConnection(connection_class):
+            def connect(self):
+                started = time.perf_counter()
+                super().connect()
+                _connect_timing.seconds = time.perf_counter() - started
+        return TimedConnection
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = timed(HTTPConnection)
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = timed(HTTPSConnection)
+
+    class TimedHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': TimedHTTPConnectionPool,
+                'https': TimedHTTPSConnectionPool,
+            }
+
+    _timed_adapter = TimedHTTPAdapter
+    return _timed_adapter
+
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """
+    Create a requests Session with a keep-alive connection pool.
+
+    Args:
+        pool_connections (int, optional): Number of host pools to cache. Defaults to 10.
+        pool_maxsize (int, optional): Maximum number of connections kept per host. Defaults to 10.
+
+    Returns:
+        requests.Session: A session that reuses TCP/TLS connections across calls, and
+        records the time spent opening new ones for `connect_time`.
+    """
+    import requests
+
+    session = requests.Session()
+    adapter = _timed_adapter_class()(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def build_request(api, path, data=None, method='post'):
+    """
+    Build the HTTP request for an API call.
+
+    Both the sync and async clients send exactly what this returns, so the
+    two never encode a call differently.
+
+    Args:
+        api: The client holding the credentials and base URL.
+        path (str): Endpoint path relative to the base URL (e.g. "client/list").
+        data (dict, optional): Parameters for the call.
+        method (str, optional): HTTP method. Defaults to "post".
+
+    Returns:
+        tuple: (method, url, body, headers). For GET requests the parameters are
+        encoded into the URL and body is None.
+    """
+    params = dict(data or {})
+    params['api_key'] = api.api_key
+    params['api_token'] = api.api_token
+    encoded = urlencode(params, doseq=True)
+
+    method = method.upper()
+    url = f"{api.base_url}/{path}"
+    if method == 'GET':
+        return method, f"{url}?{encoded}", None, api.headers
+    return method, url, encoded, api.headers
+
+
+def request_headers(compression=True):
+    """
+    Build the headers sent with every API call.
+
+    Args:
+        compression (bool or str, optional): True leaves content negotiation to the HTTP library,
+            which asks for every coding it can decode (gzip and deflate, plus br and zstd when
+            brotli and zstd support are installed). False asks for uncompressed responses. A
+            string is sent as the Accept-Encoding header, e.g. "gzip". Defaults to True.
+
+    Returns:
+        dict: The headers.
+    """
+    if compression is True:
+        return FORM_HEADERS
+    return dict(FORM_HEADERS, **{'Accept-Encoding': compression or 'identity'})
+
+
+def json_decoder(decoder='auto'):
+    """
+    Return the function used to decode JSON response bodies.
+
+    Args:
+        decoder (str or callable, optional): "orjson", "msgspec", "json" (the standard library),
+            "auto" for the fastest one installed, or a callable taking the body as bytes.
+            Defaults to "auto".
+
+    Returns:
+        callable: A function decoding a bytes body into Python objects.
+
+    Raises:
+        ImportError: If the requested backend is not installed.
+        ValueError: If the backend is unknown.
+    """
+    if callable(decoder):
+        return decoder
+    if decoder == 'auto':
+        for name in JSON_DECODERS:
+            try:
+                return json_decoder(name)
+            except ImportError:
+                continue
+    if decoder == 'orjson':
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError("The orjson decoder requires orjson: pip install tensordock[speedups]") from None
+        return orjson.loads
+    if decoder == 'msgspec':
+        try:
+            import msgspec
+        except ImportError:
+            raise ImportError("The msgspec decoder requires msgspec: pip install msgspec") from None
+        return msgspec.json.Decoder().decode
+    if decoder == 'json':
+        return json.loads
+    raise ValueError(f"Unknown JSON decoder {decoder!r}; expected one of {', '.join(JSON_DECODERS)} or 'auto'")
+
+
+def transfer_size(headers):
+    """
+    Return the size of a response body on the wire, before any content decoding,
+    from its Content-Length header, or None if the header is missing.
+    """
+    try:
+        return int(headers['Content-Length'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def endpoint_group(path):
+    """
+    Return the endpoint group ("auth", "client", "container" or "billing") a path belongs to.
+    """
+    if path.startswith('client/container/'):
+        return 'container'
+    return path.split('/', 1)[0]
+
+
+def endpoint_route(path):
+    """
+    Return `path` with embedded IDs replaced by placeholders, so calls to the
+    same endpoint share one route (e.g. for metric labels).
+    """
+    if path.startswith('client/deploy/hostnodes/'):
+        return 'client/deploy/hostnodes/{hostnode_uuid}'
+    if path.startswith('client/container/') and path.endswith('/replicas'):
+        return 'client/container/{container_id}/replicas'
+    return path
+
+
+def is_idempotent(path, method='post'):
+    """
+    Return whether a call can safely be repeated: every GET, plus the POST
+    endpoints that only read state.
+    """
+    return method.upper() == 'GET' or path in IDEMPOTENT_PATHS
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date) into seconds.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_response(path, status_code, body, headers=None, decode=json.loads):
+    """
+    Decode an API response body or raise for an error status.
+
+    Args:
+        path (str): Endpoint path the response belongs to, used in error messages.
+        status_code (int): HTTP status code of the response.
+        body (bytes): Raw response body.
+        headers (Mapping, optional): Response headers.
+        decode (callable, optional): JSON decoder for the body, see `json_decoder`.
+            Defaults to `json.loads`.
+
+    Returns:
+        dict: The decoded JSON response.
+
+    Raises:
+        TensorDockAPIException: If the status code is not 200.
+    """
+    if status_code == 200:
+        return decode(body)
+    text = body.decode('utf-8', errors='replace')
+    retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+    raise TensorDockAPIException(f"Error in {path}: {text}", status_code=status_code, response_text=text,
+                                 retry_after=retry_after)
@@ -0,0 +1,442 @@
+import asyncio
+import threading
+import time
+from collections import deque, namedtuple
+
+from .batch import run_many, run_many_async, DEFAULT_MAX_WORKERS
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+DEFAULT_BACKFILL = 3600.0
+
+# (resolution in seconds, buckets kept) per tier; resolution 0 keeps every fetched slice as is.
+DEFAULT_TIERS = (
+    (0, 720),       # raw slices: 12 hours at the default interval
+    (60, 2880),     # 1-minute buckets: 2 days
+    (3600, 2160),   # 1-hour buckets: 90 days
+)
+
+# Revenue record fields integrated over time (unit-seconds), and fields summed as amounts.
+CAPACITY_FIELDS = ('used_gpus', 'available_gpus', 'used_cpus', 'available_cpus', 'used_ram', 'available_ram',
+                   'used_storage', 'available_storage')
+REVENUE_FIELDS = ('revenue_compute', 'revenue_storage')
+FIELDS = CAPACITY_FIELDS + REVENUE_FIELDS
+
+RESOURCES = ('gpus', 'cpus', 'ram', 'storage')
+
+UtilizationPoint = namedtuple('UtilizationPoint', ['start', 'end', 'used_gpus', 'available_gpus', 'utilization',
+                                                   'revenue_compute', 'revenue_storage'])
+UtilizationPoint.__doc__ = """
+One bucket of a hostnode's utilization time series.
+
+Attributes:
+    start (float): Unix time the bucket starts at.
+    end (float): Unix time the bucket ends at.
+    used_gpus (float): Time-weighted average number of rented GPUs over the bucket.
+    available_gpus (float): Time-weighted average number of free GPUs over the bucket.
+    utilization (float): Fraction of GPU capacity rented, or None if there was none.
+    revenue_compute (float): Compute revenue earned in the bucket.
+    revenue_storage (float): Storage revenue earned in the bucket.
+"""
+
+
+def format_timestamp(timestamp):
+    """
+    Format a Unix time as the `start_timestamp`/`end_timestamp` of `get_revenue`.
+    """
+    return str(int(timestamp))
+
+
+class _Bucket:
+    """
+    Totals of one time bucket: covered seconds, the span [first, last) the data
+    actually covers, each capacity field integrated over time, and each revenue
+    field summed.
+    """
+    __slots__ = ('start', 'end', 'first', 'last', 'seconds', 'totals')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.first = end
+        self.last = start
+        self.seconds = 0.0
+        self.totals = [0.0] * len(FIELDS)
+
+    def add(self, start, end, values, fraction):
+        seconds = end - start
+        self.first = min(self.first, start)
+        self.last = max(self.last, end)
+        self.seconds += seconds
+        totals = self.totals
+        for index, value in enumerate(values):
+            totals[index] += value * (seconds if index < len(CAPACITY_FIELDS) else fraction)
+
+
+class _Tier:
+    """
+    Ring buffer of buckets at one resolution; the oldest bucket is dropped when full.
+    """
+    __slots__ = ('resolution', 'buckets')
+
+    def __init__(self, resolution, size):
+        self.resolution = resolution
+        self.buckets = deque(maxlen=size)
+
+    def add(self, start, end, values):
+        duration = end - start
+        if not self.resolution:
+            bucket = _Bucket(start, end)
+            bucket.add(start, end, values, 1.0)
+            self.buckets.append(bucket)
+            return
+        resolution = self.resolution
+        edge = start - start % resolution
+        while edge < end:
+            low, high = max(start, edge), min(end, edge + resolution)
+            buckets = self.buckets
+            if not buckets or buckets[-1].start < edge:
+                buckets.append(_Bucket(edge, edge + resolution))
+            buckets[-1].add(low, high, values, (high - low) / duration)
+            edge += resolution
+
+    @property
+    def oldest(self):
+        """
+        Unix time the oldest data held starts at, or None if the tier is empty.
+        """
+        return self.buckets[0].first if self.buckets else None
+
+
+class _Hostnode:
+    __slots__ = ('tiers', 'latest', 'updated')
+
+    def __init__(self, tiers):
+        self.tiers = [_Tier(resolution, size) for resolution, size in tiers]
+        self.latest = None
+        self.updated = None
+
+    def add(self, start, end, record):
+        values = [float(record.get(name) or 0) for name in FIELDS]
+        for tier in self.tiers:
+            tier.add(start, end, values)
+        self.latest = record
+        self.updated = end
+
+    def totals(self, start, end):
+        """
+        Sum the buckets overlapping [start, end), using the finest tier that still holds
+        each part of the window. A coarser tier only contributes data from before the
+        point where the finer tier's data starts. Buckets cut by the window or by that
+        point are prorated over the span their data covers, not their full resolution,
+        since a bucket's data may start or end partway through it.
+        """
+        totals = [0.0] * len(FIELDS)
+        until = end
+        for tier in self.tiers:
+            oldest = tier.oldest
+            if oldest is None or until <= start:
+                break
+            for bucket in reversed(tier.buckets):
+                if bucket.last <= start:
+                    break
+                if bucket.first >= until:
+                    continue
+                span = bucket.last - bucket.first
+                covered = min(until, bucket.last) - max(start, bucket.first)
+                fraction = covered / span if span > 0 else 1.0
+                for index, value in enumerate(bucket.totals):
+                    totals[index] += value * fraction
+            until = min(until, oldest)
+        return totals
+
+
+class UtilizationMonitor:
+    """
+    Incrementally collected hostnode utilization and revenue from `Billing.get_revenue`.
+
+    Each refresh asks `get_revenue` only for the slice of time since the
+    previous refresh (the watermark), then adds every hostnode's record for
+    that slice to its time series. Each hostnode keeps three ring buffers:
+    the raw slices, 1-minute buckets and 1-hour buckets. Every tier holds a
+    fixed number of entries and hostnodes that stop reporting are dropped
+    once they fall out of the longest tier, so memory stays bounded however
+    long the monitor runs. Utilization and revenue queries over any window
+    are answered from the buffers, using the finest tier that still covers
+    each part of the window, without API calls.
+
+    Capacity figures are integrated over time, so utilization over a window
+    is rented GPU-time divided by total GPU-time (rented plus free). Revenue
+    figures are treated as the amount earned in each slice.
+
+    Example:
+        with UtilizationMonitor(api, interval=60) as monitor:
+            ...
+            day_ago = time.time() - 86400
+            monitor.utilization(start=day_ago)                  # whole fleet, last 24 hours
+            monitor.revenue_per_gpu_hour(hostnode_id, start=day_ago)
+            points = monitor.series(hostnode_id, resolution=3600)
+
+    With AsyncTensorDockAPI, use `async with` or `await monitor.refresh_async()`.
+    """
+    def __init__(self, api, hostnode_id=None, interval=DEFAULT_REFRESH_INTERVAL, backfill=DEFAULT_BACKFILL,
+                 tiers=DEFAULT_TIERS, timestamp=format_timestamp, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            api (TensorDockAPI or AsyncTensorDockAPI): Client to fetch revenue with.
+            hostnode_id (str or iterable, optional): Only monitor this hostnode (or these hostnodes).
+                Defaults to every hostnode of the organization.
+            interval (float, optional): Seconds between background refreshes. Defaults to 60.
+            backfill (float, optional): Seconds of history the first refresh asks for. Defaults to 3600.
+            tiers (tuple, optional): `(resolution in seconds, buckets kept)` per tier, finest first;
+                resolution 0 keeps every fetched slice. Defaults to raw, 1-minute and 1-hour tiers.
+            timestamp (callable, optional): Formats a Unix time for `get_revenue`. Defaults to whole
+                seconds as a string.
+            max_workers (int, optional): Maximum concurrent calls when monitoring several hostnodes.
+                Defaults to 10.
+        """
+        self.api = api
+        if hostnode_id is None or isinstance(hostnode_id, str):
+            self.hostnode_ids = [hostnode_id]
+        else:
+            self.hostnode_ids = list(hostnode_id)
+        self.interval = interval
+        self.backfill = backfill
+        self.tiers = tuple(sorted(tiers))
+        self.timestamp = timestamp
+        self.max_workers = max_workers
+        self.watermark = None
+        self.last_error = None
+        self._hostnodes = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._task = None
+
+    # Collecting
+
+    def _slice(self):
+        end = time.time()
+        start = self.watermark if self.watermark is not None else end - self.backfill
+        return start, end
+
+    def _fetch(self, start, end):
+        def fetch(hostnode_id):
+            return self.api.billing.get_revenue(self.timestamp(start), self.timestamp(end), hostnode_id)
+        return fetch
+
+    def _install(self, start, end, responses):
+        errors = [response for response in responses.values() if isinstance(response, Exception)]
+        if errors:
+            self.last_error = errors[0]
+            raise errors[0]
+        retention = max(resolution * size for resolution, size in self.tiers)
+        with self._lock:
+            for response in responses.values():
+                for record in response.get('data') or ():
+                    hostnode = self._hostnodes.get(record.get('hostnode_id'))
+                    if hostnode is None:
+                        hostnode = self._hostnodes[record.get('hostnode_id')] = _Hostnode(self.tiers)
+                    hostnode.add(start, end, record)
+            if retention:
+                for hostnode_id in [key for key, value in self._hostnodes.items() if value.updated < end - retention]:
+                    del self._hostnodes[hostnode_id]
+            self.watermark = end
+        self.last_error = None
+
+    def refresh(self):
+        """
+        Fetch the slice since the watermark and add it to every hostnode's series.
+
+        Raises:
+            TensorDockAPIException: If a call failed; the watermark is kept, so the next
+                refresh asks for the missed time again.
+        """
+        start, end = self._slice()
+        if end <= start:
+            return
+        self._install(start, end, run_many(self._fetch(start, end), self.hostnode_ids, self.max_workers))
+
+    async def refresh_async(self):
+        """
+        Coroutine counterpart of `refresh` for AsyncTensorDockAPI.
+        """
+        start, end = self._slice()
+        if end <= start:
+            return
+        self._install(start, end, await run_many_async(self._fetch(start, end), self.hostnode_ids,
+                                                       self.max_workers))
+
+    # Queries
+
+    def hostnodes(self):
+        """
+        Return the IDs of the hostnodes with data.
+        """
+        return list(self._hostnodes)
+
+    def latest(self, hostnode_id):
+        """
+        Return a hostnode's record from the most recent slice, including its per-VM
+        `virtual_machines` usage, or None if it has no data.
+        """
+        hostnode = self._hostnodes.get(hostnode_id)
+        return None if hostnode is None else hostnode.latest
+
+    def _totals(self, hostnode_id, start, end):
+        start = float('-inf') if start is None else start
+        end = (self.watermark or time.time()) if end is None else end
+        totals = [0.0] * len(FIELDS)
+        with self._lock:
+            if hostnode_id is None:
+                hostnodes = list(self._hostnodes.values())
+            else:
+                hostnodes = [self._hostnodes[hostnode_id]] if hostnode_id in self._hostnodes else []
+            for hostnode in hostnodes:
+                totals = [total + value for total, value in zip(totals, hostnode.totals(start, end))]
+        return dict(zip(FIELDS, totals))
+
+    def utilization(self, hostnode_id=None, start=None, end=None, resource='gpus'):
+        """
+        Fraction of capacity rented over a window.
+
+        Args:
+            hostnode_id (str, optional): Hostnode to report on. Defaults to every hostnode.
+            start (float, optional): Unix time the window starts at. Defaults to the oldest data kept.
+            end (float, optional): Unix time the window ends at. Defaults to the watermark.
+            resource (str, optional): "gpus", "cpus", "ram" or "storage". Defaults to "gpus".
+
+        Returns:
+            float: Rented resource-time divided by total resource-time, or None if there is no
+            capacity in the window.
+        """
+        if resource not in RESOURCES:
+            raise ValueError(f"Unknown resource {resource!r}; expected one of {', '.join(RESOURCES)}")
+        totals = self._totals(hostnode_id, start, end)
+        used = totals[f'used_{resource}']
+        capacity = used + totals[f'available_{resource}']
+        return used / capacity if capacity else None
+
+    def revenue(self, hostnode_id=None, start=None, end=None):
+        """
+        Revenue earned over a window.
+
+        Returns:
+            dict: `compute`, `storage` and `total` revenue.
+        """
+        totals = self._totals(hostnode_id, start, end)
+        compute, storage = totals['revenue_compute'], totals['revenue_storage']
+        return {'compute': compute, 'storage': storage, 'total': compute + storage}
+
+    def revenue_per_gpu_hour(self, hostnode_id=None, start=None, end=None, rented=False):
+        """
+        Compute revenue per GPU-hour over a window.
+
+        Args:
+            hostnode_id, start, end: See `utilization`.
+            rented (bool, optional): Divide by rented GPU-hours instead of all GPU-hours. Defaults to False.
+
+        Returns:
+            float: Revenue per GPU-hour, or None if there were no GPU-hours.
+        """
+        totals = self._totals(hostnode_id, start, end)
+        gpu_seconds = totals['used_gpus'] + (0.0 if rented else totals['available_gpus'])
+        return totals['revenue_compute'] / (gpu_seconds / 3600.0) if gpu_seconds else None
+
+    def series(self, hostnode_id, start=None, end=None, resolution=0):
+        """
+        A hostnode's utilization time series, for charting.
+
+        Args:
+            hostnode_id (str): Hostnode to report on.
+            start (float, optional): Leave out buckets ending before this Unix time.
+            end (float, optional): Leave out buckets starting at or after this Unix time.
+            resolution (float, optional): Resolution of the tier to read, e.g. 0 (raw slices), 60 or 3600.
+                Defaults to 0.
+
+        Returns:
+            list: UtilizationPoint tuples, oldest first.
+        """
+        hostnode = self._hostnodes.get(hostnode_id)
+        if hostnode is None:
+            return []
+        for tier in hostnode.tiers:
+            if tier.resolution == resolution:
+                break
+        else:
+            raise ValueError(f"No tier with resolution {resolution}; resolutions: {[tier for tier, _ in self.tiers]}")
+        used, available = FIELDS.index('used_gpus'), FIELDS.index('available_gpus')
+        points = []
+        with self._lock:
+            buckets = list(tier.buckets)
+        for bucket in buckets:
+            if (start is not None and bucket.end <= start) or (end is not None and bucket.start >= end):
+                continue
+            seconds = bucket.seconds or 1.0
+            capacity = bucket.totals[used] + bucket.totals[available]
+            points.append(UtilizationPoint(
+                bucket.start, bucket.end, bucket.totals[used] / seconds, bucket.totals[available] / seconds,
+                bucket.totals[used] / capacity if capacity else None,
+                bucket.totals[FIELDS.index('revenue_compute')], bucket.totals[FIELDS.index('revenue_storage')],
+            ))
+        return points
+
+    # Background loop
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as error:
+                self.last_error = error
+            self._stopped.wait(self.interval)
+
+    async def _run_async(self):
+        while not self._stopped.is_set():
+            try:
+                await self.refresh_async()
+            except Exception as error:
+                self.last_error = error
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        Start refreshing on a background thread. Returns the monitor.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='tensordock-utilization-monitor', daemon=True)
+            self._thread.start()
+        return self
+
+    async def start_async(self):
+        """
+        Start refreshing in a task on the running event loop. Returns the monitor.
+        """
+        if self._task is None or self._task.done():
+            self._stopped.clear()
+            self._task = asyncio.ensure_future(self._run_async())
+        return self
+
+    def stop(self):
+        """
+        Stop the background thread or task after its current refresh.
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def __aenter__(self):
+        return await self.start_async()
+
+    async def __aexit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,201 @@
+import threading
+import time
+
+from .batch import run_many, run_many_async
+from .exceptions import TensorDockTimeoutError
+
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_WAIT_TIMEOUT = 600.0
+
+VM = 'vm'
+REPLICAS = 'replicas'
+
+
+class _Waiter:
+    __slots__ = ('kind', 'key', 'target', 'result', 'done', 'future')
+
+    def __init__(self, kind, key, target):
+        self.kind = kind
+        self.key = key
+        self.target = target
+        self.result = None
+        self.done = None
+        self.future = None
+
+
+def _vm_target(status):
+    """
+    Normalize the status argument: None waits for the VM to be deleted.
+    """
+    if status is None:
+        return None
+    if isinstance(status, str):
+        status = [status]
+    return frozenset(s.lower() for s in status)
+
+
+class _PollerBase:
+    """
+    Shared bookkeeping for the sync and async pollers: which calls a tick
+    needs, and which waiters a tick's responses satisfy.
+    """
+    def __init__(self, api, interval):
+        self.api = api
+        self.interval = interval
+        self.last_error = None
+        self._waiters = []
+
+    def _needs(self, waiters):
+        need_vms = any(waiter.kind == VM for waiter in waiters)
+        containers = {waiter.key for waiter in waiters if waiter.kind == REPLICAS}
+        return need_vms, containers
+
+    def _resolve(self, waiters, vms, replicas):
+        """
+        Return (waiter, result) pairs for the waiters whose target has been reached.
+        """
+        satisfied = []
+        for waiter in waiters:
+            if waiter.kind == VM:
+                if vms is None:
+                    continue
+                vm = vms.get(waiter.key)
+                if waiter.target is None:
+                    if vm is None:
+                        satisfied.append((waiter, None))
+                elif vm is not None and (vm.get('status') or '').lower() in waiter.target:
+                    satisfied.append((waiter, vm))
+            else:
+                result = replicas.get(waiter.key)
+                if isinstance(result, Exception) or result is None:
+                    continue
+                found = result.get('result') or []
+                if len(found) == waiter.target:
+                    satisfied.append((waiter, found))
+        return satisfied
+
+    def _timeout_error(self, waiter, timeout):
+        if waiter.kind == VM:
+            target = 'deleted' if waiter.target is None else '/'.join(sorted(waiter.target))
+            message = f"VM {waiter.key} did not reach status {target} within {timeout}s"
+        else:
+            message = f"Container {waiter.key} did not reach {waiter.target} replicas within {timeout}s"
+        if self.last_error is not None:
+            message += f" (last poll error: {self.last_error})"
+        return TensorDockTimeoutError(message)
+
+
+class StatusPoller(_PollerBase):
+    """
+    Shared poller behind `wait_for_vm_status` and `wait_for_replicas`.
+
+    A single background thread serves every waiter: each tick makes one
+    `list_vms` call for all VM waiters, plus one `get_container_replicas`
+    call per container being waited on. 500 threads waiting for 500 VMs
+    therefore cost one `list_vms` call per tick. The thread exits when no
+    one is waiting.
+    """
+    def __init__(self, api, interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(api, interval)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _wait(self, waiter, timeout):
+        waiter.done = threading.Event()
+        with self._lock:
+            self._waiters.append(waiter)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='tensordock-status-poller', daemon=True)
+                self._thread.start()
+        if not waiter.done.wait(timeout):
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if not waiter.done.is_set():
+                raise self._timeout_error(waiter, timeout)
+        return waiter.result
+
+    def _run(self):
+        while True:
+            with self._lock:
+                waiters = list(self._waiters)
+                if not waiters:
+                    self._thread = None
+                    return
+            need_vms, containers = self._needs(waiters)
+            vms = None
+            try:
+                if need_vms:
+                    vms = self.api.virtual_machines.list_vms().get('virtualmachines') or {}
+                self.last_error = None
+            except Exception as error:
+                self.last_error = error
+            replicas = run_many(self.api.containers.get_container_replicas, containers) if containers else {}
+
+            with self._lock:
+                for waiter, result in self._resolve(waiters, vms, replicas):
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    waiter.result = result
+                    waiter.done.set()
+            time.sleep(self.interval)
+
+    def wait_for_vm_status(self, server, status, timeout=DEFAULT_WAIT_TIMEOUT):
+        return self._wait(_Waiter(VM, server, _vm_target(status)), timeout)
+
+    def wait_for_replicas(self, container_id, count, timeout=DEFAULT_WAIT_TIMEOUT):
+        return self._wait(_Waiter(REPLICAS, container_id, count), timeout)
+
+
+class AsyncStatusPoller(_PollerBase):
+    """
+    asyncio counterpart of StatusPoller: one polling task on the event loop
+    serves every coroutine waiting on the client.
+    """
+    def __init__(self, api, interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(api, interval)
+        self._task = None
+
+    async def _wait(self, waiter, timeout):
+        import asyncio
+
+        waiter.future = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            raise self._timeout_error(waiter, timeout) from None
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def _run(self):
+        import asyncio
+
+        while self._waiters:
+            waiters = list(self._waiters)
+            need_vms, containers = self._needs(waiters)
+            vms = None
+            try:
+                if need_vms:
+                    vms = (await self.api.virtual_machines.list_vms()).get('virtualmachines') or {}
+                self.last_error = None
+            except Exception as error:
+                self.last_error = error
+            replicas = await run_many_async(self.api.containers.get_container_replicas, containers) if containers else {}
+
+            for waiter, result in self._resolve(waiters, vms, replicas):
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                if not waiter.future.done():
+                    waiter.future.set_result(result)
+            if self._waiters:
+                await asyncio.sleep(self.interval)
+
+    async def wait_for_vm_status(self, server, status, timeout=DEFAULT_WAIT_TIMEOUT):
+        return await self._wait(_Waiter(VM, server, _vm_target(status)), timeout)
+
+    async def wait_for_replicas(self, container_id, count, timeout=DEFAULT_WAIT_TIMEOUT):
+        return await self._wait(_Waiter(REPLICAS, container_id, count), timeout)
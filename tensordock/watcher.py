@@ -0,0 +1,191 @@
+import asyncio
+import threading
+from collections import namedtuple
+
+from .models import VM
+
+CREATED = 'created'
+STATUS_CHANGED = 'status_changed'
+PORT_FORWARDS_CHANGED = 'port_forwards_changed'
+DELETED = 'deleted'
+
+# Statuses a VM can stay in indefinitely; anything else is treated as a transition.
+STABLE_STATUSES = frozenset({'running', 'stopped', 'outbid', 'offline'})
+
+VMEvent = namedtuple('VMEvent', ['kind', 'server', 'vm', 'previous_status', 'previous_port_forwards'])
+VMEvent.__doc__ = """
+A change observed on one VM.
+
+Attributes:
+    kind (str): One of "created", "status_changed", "port_forwards_changed" or "deleted".
+    server (str): UUID of the VM.
+    vm (VM): The VM as currently listed, or None if it was deleted.
+    previous_status (str): Status before the change, or None for "created".
+    previous_port_forwards (dict): Port forwards before the change, or None for "created".
+"""
+
+
+class VMWatcher:
+    """
+    Polls `list_vms` and yields a VMEvent for every VM that was created,
+    deleted, or changed status or port forwards since the previous poll.
+
+    Only each VM's status and port forwards are remembered between polls, and
+    a VM model is only built for VMs that changed, so memory and CPU stay flat
+    with thousands of VMs. The poll interval adapts: it drops to
+    `min_interval` while any VM is in a transitional status (or just changed)
+    and backs off towards `max_interval` while the fleet is stable. A failed
+    poll does not end the watch: the error is kept in `last_error` and the
+    interval backs off as if the poll had been quiet.
+
+    Example:
+        watcher = VMWatcher(api)
+        for event in watcher.watch():
+            print(event.kind, event.server, event.vm.status if event.vm else None)
+
+    With AsyncTensorDockAPI, iterate with `async for event in watcher`.
+    """
+    def __init__(self, api, min_interval=2.0, max_interval=60.0, backoff=1.5, servers=None, emit_initial=True):
+        """
+        Args:
+            api (TensorDockAPI or AsyncTensorDockAPI): Client to poll with.
+            min_interval (float, optional): Poll interval in seconds while VMs are transitioning. Defaults to 2.
+            max_interval (float, optional): Longest poll interval in seconds while stable. Defaults to 60.
+            backoff (float, optional): Factor the interval grows by after each quiet poll. Defaults to 1.5.
+            servers (iterable, optional): Only report events for these VM UUIDs.
+            emit_initial (bool, optional): Emit "created" events for the VMs found by the first poll.
+                Defaults to True.
+        """
+        self.api = api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.servers = set(servers) if servers is not None else None
+        self.emit_initial = emit_initial
+        self.interval = min_interval
+        self.last_error = None
+        self._state = None
+        self._stopped = threading.Event()
+        self._wakeup = None
+
+    def _diff(self, response):
+        """
+        Compare a `list_vms` response against the previous one and return the events.
+        """
+        virtual_machines = response.get('virtualmachines') or {}
+        previous = self._state
+        state = {}
+        events = []
+        transitioning = False
+
+        for server, data in virtual_machines.items():
+            if self.servers is not None and server not in self.servers:
+                continue
+            status = data.get('status')
+            port_forwards = data.get('port_forwards') or {}
+            state[server] = (status, port_forwards)
+            if status is None or status.lower() not in STABLE_STATUSES:
+                transitioning = True
+
+            if previous is None:
+                if self.emit_initial:
+                    events.append(VMEvent(CREATED, server, VM(server, data), None, None))
+                continue
+            before = previous.get(server)
+            if before is None:
+                events.append(VMEvent(CREATED, server, VM(server, data), None, None))
+                continue
+            previous_status, previous_port_forwards = before
+            if previous_status != status:
+                events.append(VMEvent(STATUS_CHANGED, server, VM(server, data), previous_status,
+                                      previous_port_forwards))
+            if previous_port_forwards != port_forwards:
+                events.append(VMEvent(PORT_FORWARDS_CHANGED, server, VM(server, data), previous_status,
+                                      previous_port_forwards))
+
+        if previous is not None:
+            for server, (previous_status, previous_port_forwards) in previous.items():
+                if server not in state:
+                    events.append(VMEvent(DELETED, server, None, previous_status, previous_port_forwards))
+
+        self._state = state
+        if transitioning or (events and previous is not None):
+            self.interval = self.min_interval
+        else:
+            self._back_off()
+        return events
+
+    def _back_off(self):
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def poll(self):
+        """
+        Poll `list_vms` once and return the list of events since the previous poll.
+        """
+        return self._diff(self.api.virtual_machines.list_vms())
+
+    async def poll_async(self):
+        """
+        Coroutine counterpart of `poll` for AsyncTensorDockAPI.
+        """
+        return self._diff(await self.api.virtual_machines.list_vms())
+
+    def watch(self):
+        """
+        Poll until `stop()` is called, yielding events as they are observed.
+        """
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            try:
+                events = self.poll()
+            except Exception as error:
+                self.last_error = error
+                self._back_off()
+            else:
+                self.last_error = None
+                yield from events
+            self._stopped.wait(self.interval)
+
+    async def watch_async(self):
+        """
+        Async generator counterpart of `watch` for AsyncTensorDockAPI.
+        """
+        self._stopped.clear()
+        wakeup = asyncio.Event()
+        self._wakeup = (asyncio.get_running_loop(), wakeup)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    events = await self.poll_async()
+                except Exception as error:
+                    self.last_error = error
+                    self._back_off()
+                else:
+                    self.last_error = None
+                    for event in events:
+                        yield event
+                if self._stopped.is_set():
+                    break
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._wakeup = None
+
+    def __aiter__(self):
+        return self.watch_async()
+
+    def stop(self):
+        """
+        Stop a running `watch()` or `watch_async()` after its current poll. A watch
+        waiting for its next poll wakes up at once. Safe to call from any thread.
+        """
+        self._stopped.set()
+        if self._wakeup is not None:
+            loop, wakeup = self._wakeup
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # The loop has already closed; the watch cannot be waiting any more.
+                pass
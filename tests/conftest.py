@@ -0,0 +1,36 @@
+import pytest
+
+from tensordock.testing import MockServer
+
+
+@pytest.fixture
+def server():
+    with MockServer(hostnodes=20) as server:
+        yield server
+
+
+@pytest.fixture
+def api(server):
+    with server.client(retry=False) as api:
+        yield api
+
+
+@pytest.fixture
+def deploy(api):
+    """
+    Deploy CPU-only VMs on the mock server: `deploy(count)` returns their UUIDs.
+    """
+    def deploy(count=1):
+        servers = []
+        for hostnode_id, hostnode in api.virtual_machines.get_available_hostnodes()['hostnodes'].items():
+            for port in list(hostnode['networking']['ports'])[:count - len(servers)]:
+                response = api.virtual_machines.deploy_vm(
+                    name=f"test-{len(servers)}", gpu_count=0, vcpus=1, ram=1, storage=10, hostnode=hostnode_id,
+                    external_ports=f"{{{port}}}", internal_ports='{22}', operating_system='Ubuntu 22.04 LTS',
+                    password='test',
+                )
+                servers.append(response['server'])
+            if len(servers) >= count:
+                break
+        return servers
+    return deploy
@@ -0,0 +1,65 @@
+import pytest
+
+from tensordock.autoscaler import ContainerAutoscaler, ScalingPolicy
+
+
+def _replicas(count, rate):
+    return [{'rate_hourly': rate}] * count
+
+
+def test_limit_applies_bounds_and_cost_ceiling():
+    policy = ScalingPolicy(min_replicas=2, max_replicas=10, max_vm_rate_hourly=0.5, max_cost_hourly=4)
+    assert policy.limit(0, []) == 2
+    assert policy.limit(5, _replicas(5, 0.4)) == 5
+    assert policy.limit(50, []) == 8
+    assert policy.limit(50, _replicas(3, 1.0)) == 4
+
+
+def test_cost_ceiling_wins_over_min_replicas():
+    policy = ScalingPolicy(min_replicas=3, max_vm_rate_hourly=1.0, max_cost_hourly=3)
+    assert policy.limit(1, _replicas(3, 1.0)) == 3
+    assert policy.limit(1, _replicas(3, 2.0)) == 1
+
+
+def test_conflicting_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ScalingPolicy(min_replicas=4, max_vm_rate_hourly=1.0, max_cost_hourly=3)
+
+
+def test_tick_scales_to_the_cost_ceiling(server):
+    api = server.client(retry=False)
+    api.containers.deploy_container(project_id='web', replicas=1, max_vm_rate_hourly=0.5)
+    autoscaler = ContainerAutoscaler(api)
+    autoscaler.add('web', lambda container_id, replicas: 20, max_replicas=20, max_vm_rate_hourly=0.5,
+                   max_cost_hourly=2, cooldown=0)
+    event, = autoscaler.tick()
+    assert (event.observed, event.desired, event.delta, event.error) == (1, 4, 3, None)
+    assert len(server.containers['web']['replicas']) == 4
+
+
+def test_rising_rates_scale_down_past_the_window_and_cooldown(server):
+    api = server.client(retry=False)
+    api.containers.deploy_container(project_id='web', replicas=5, max_vm_rate_hourly=0.5)
+    autoscaler = ContainerAutoscaler(api)
+    autoscaler.add('web', lambda container_id, replicas: 5, max_vm_rate_hourly=0.5, max_cost_hourly=5,
+                   cooldown=300, scale_down_window=300)
+    event, = autoscaler.tick()
+    assert (event.observed, event.desired, event.delta) == (5, 5, 0)
+
+    for replica in server.containers['web']['replicas']:
+        replica['rate_hourly'] = 2.0
+    event, = autoscaler.tick()
+    assert (event.desired, event.delta, event.error) == (2, -3, None)
+    assert len(server.containers['web']['replicas']) == 2
+
+
+def test_window_still_damps_scale_downs_within_budget(server):
+    api = server.client(retry=False)
+    api.containers.deploy_container(project_id='web', replicas=4, max_vm_rate_hourly=0.5)
+    wanted = iter([4, 1])
+    autoscaler = ContainerAutoscaler(api)
+    autoscaler.add('web', lambda container_id, replicas: next(wanted), max_vm_rate_hourly=0.5,
+                   max_cost_hourly=5, cooldown=0, scale_down_window=300)
+    autoscaler.tick()
+    event, = autoscaler.tick()
+    assert (event.desired, event.delta) == (4, 0)
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+from tensordock.cache import ResponseCache, FOREVER
+
+
+def test_repeated_reads_are_served_from_cache(server, api):
+    cached = server.client(cache=True)
+    cached.virtual_machines.list_vms()
+    cached.virtual_machines.list_vms()
+    assert server.requests['client/list'] == 1
+    assert cached.cache.hits == 1
+
+
+def test_ttl_expiry(server):
+    api = server.client(cache=ResponseCache(ttls={'client/list': 0}))
+    api.virtual_machines.list_vms()
+    api.virtual_machines.list_vms()
+    assert server.requests['client/list'] == 2
+
+
+def test_mutation_invalidates_stale_reads(server, deploy):
+    api = server.client(cache=True)
+    server_id = deploy(1)[0]
+    assert api.virtual_machines.get_vm_details(server_id)['virtualmachine']['status'] == 'Running'
+    api.virtual_machines.stop_vm(server_id)
+    api.virtual_machines.get_vm_details(server_id)
+    assert server.requests['client/get/single'] == 2
+
+
+def test_concurrent_identical_calls_share_one_request(server):
+    server.faults['client/list'] = {'latency': 0.2}
+    api = server.client(cache=True)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(api.virtual_machines.list_vms())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 8
+    assert server.requests['client/list'] == 1
+
+
+def test_concurrent_identical_async_calls_share_one_request(server):
+    server.faults['client/list'] = {'latency': 0.2}
+
+    async def main():
+        async with server.async_client(cache=True) as api:
+            return await asyncio.gather(*(api.virtual_machines.list_vms() for _ in range(8)))
+
+    assert len(asyncio.run(main())) == 8
+    assert server.requests['client/list'] == 1
+
+
+def test_failed_call_is_not_cached(server):
+    api = server.client(cache=True, retry=False)
+    server.faults['client/list'] = {'error_rate': 1.0}
+    try:
+        api.virtual_machines.list_vms()
+    except Exception:
+        pass
+    del server.faults['client/list']
+    assert 'virtualmachines' in api.virtual_machines.list_vms()
+    assert server.requests['client/list'] == 2
+
+
+def test_closed_billing_periods_persist_to_disk(server, tmp_path):
+    cache = ResponseCache(disk_path=str(tmp_path))
+    assert cache.ttl_for('billing/summary', {'period': '2020-01'}) == FOREVER
+    server.client(cache=cache).billing.get_monthly_summary('2020-01')
+
+    fresh = server.client(cache=ResponseCache(disk_path=str(tmp_path)))
+    fresh.billing.get_monthly_summary('2020-01')
+    assert server.requests['billing/summary'] == 1
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+
+import pytest
+
+from tensordock import cli
+
+
+@pytest.fixture
+def run(server, capsys):
+    def run(*argv):
+        code = cli.main(['--api-key', server.api_key, '--api-token', server.api_token, '--base-url', server.url,
+                         *argv])
+        out, err = capsys.readouterr()
+        return code, out, err
+    return run
+
+
+def test_list_selects_by_name_regex_and_status(server, deploy, run):
+    servers = deploy(3)
+    server.set_vm_status(servers[2], 'Stopped')
+
+    code, out, _ = run('vms', 'list', '-o', 'json', '--name', 'test-[01]')
+    assert code == 0 and sorted(row['id'] for row in json.loads(out)) == sorted(servers[:2])
+    code, out, _ = run('vms', 'list', '-o', 'json', r'--regex=-2$')
+    assert [row['id'] for row in json.loads(out)] == [servers[2]]
+    code, out, _ = run('vms', 'list', '-o', 'json', '--status', 'stopped')
+    assert [row['name'] for row in json.loads(out)] == ['test-2']
+
+
+def test_csv_and_table_output(deploy, run):
+    servers = deploy(2)
+    code, out, _ = run('vms', 'list', '-o', 'csv')
+    rows = list(csv.DictReader(io.StringIO(out)))
+    assert code == 0 and sorted(row['id'] for row in rows) == sorted(servers)
+    assert list(rows[0]) == list(cli.VM_COLUMNS)
+
+    code, out, _ = run('billing', 'balance')
+    header, values = out.splitlines()
+    assert code == 0 and header.split() == ['BALANCE', 'HOURLY_COST'] and len(values.split()) == 2
+
+
+def test_empty_results_print_nothing(deploy, run):
+    deploy(1)
+    for output in ('table', 'csv'):
+        code, out, _ = run('vms', 'get', '--status', 'nomatch', '-o', output)
+        assert (code, out) == (0, '')
+    code, out, _ = run('vms', 'get', '--status', 'nomatch', '-o', 'json')
+    assert json.loads(out) == []
+
+
+def test_delete_requires_yes(server, deploy, run):
+    servers = deploy(2)
+    code, out, err = run('vms', 'delete', '--name', 'test-*')
+    assert code == 2 and 'without --yes' in err and len(server.vms) == 2
+
+    code, out, _ = run('vms', 'delete', '--name', 'test-*', '--dry-run', '-o', 'json')
+    assert code == 0 and sorted(row['id'] for row in json.loads(out)) == sorted(servers) and len(server.vms) == 2
+
+    code, out, _ = run('vms', 'delete', '--name', 'test-*', '--yes', '-o', 'json')
+    assert code == 0 and all(row['ok'] for row in json.loads(out)) and server.vms == {}
+
+
+def test_exit_codes(deploy, run, server):
+    vm, = deploy(1)
+    code, _, err = run('vms', 'stop')
+    assert code == 2 and 'Select VMs' in err
+
+    code, out, _ = run('vms', 'get', vm, 'no-such-vm', '-o', 'json')
+    rows = {row['id']: row for row in json.loads(out)}
+    assert code == 1 and rows['no-such-vm']['error'] and rows[vm]['status'] == 'Running'
+
+    server.faults['billing/balance'] = {'error_rate': 1.0}
+    code, _, err = run('billing', 'balance')
+    assert code == 1 and err.startswith('tensordock:')
+
+
+@pytest.mark.parametrize('value', ['0', '-3', 'many'])
+def test_parallel_must_be_positive(value, capsys):
+    for argv in (['-p', value, 'vms', 'list'], ['vms', 'list', '-p', value]):
+        with pytest.raises(SystemExit) as raised:
+            cli.main(argv)
+        assert raised.value.code == 2
+    assert '--parallel' in capsys.readouterr().err
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from tensordock.exceptions import TensorDockAPIException
+from tensordock.fleet import AsyncTensorDockFleet, TensorDockFleet, org_rate_limiter, ENDPOINT_GROUPS
+from tensordock.ratelimit import RateLimiter, TokenBucket
+from tensordock.transport import connect_time
+
+
+def _organizations(server):
+    return {'good': (server.api_key, server.api_token), 'bad': ('wrong-key', 'wrong-token')}
+
+
+def _point_at(fleet, server):
+    for api in fleet.clients.values():
+        api.base_url = server.url
+    return fleet
+
+
+@pytest.fixture
+def fleet(server):
+    with TensorDockFleet(_organizations(server), rate_limit=(1000, 100), retry=False) as fleet:
+        yield _point_at(fleet, server)
+
+
+def test_list_vms_tags_each_vm_with_its_org(fleet, deploy):
+    vms = deploy(2)
+    result = fleet.list_vms()
+    assert set(result['virtualmachines']) == set(vms)
+    assert {vm['org'] for vm in result['virtualmachines'].values()} == {'good'}
+    assert list(result['errors']) == ['bad']
+    assert isinstance(result['errors']['bad'], TensorDockAPIException)
+
+
+def test_get_balance_sums_answering_orgs_and_reports_errors(fleet, api):
+    expected = api.billing.get_balance()
+    result = fleet.get_balance()
+    assert result['balance'] == expected['balance']
+    assert result['hourly_cost'] == expected['hourly_cost']
+    assert list(result['organizations']) == ['good']
+    assert list(result['errors']) == ['bad']
+
+
+def test_call_maps_each_org_to_its_result_or_exception(fleet):
+    results = fleet.call('authorization.test_authorization')
+    assert results['good']['success']
+    assert isinstance(results['bad'], TensorDockAPIException)
+
+
+def test_clients_share_one_session(fleet):
+    assert all(api.session is fleet.session for api in fleet.clients.values())
+    fleet['good'].authorization.test_authorization()
+    connect_time()
+    with pytest.raises(TensorDockAPIException):
+        fleet['bad'].authorization.test_authorization()
+    assert connect_time() is None
+
+
+def test_org_rate_limiter_shares_one_bucket_across_groups():
+    limiter = org_rate_limiter((5, 10))
+    buckets = {limiter.buckets[group] for group in ENDPOINT_GROUPS}
+    assert len(buckets) == 1
+    bucket, = buckets
+    assert (bucket.rate, bucket.burst) == (5, 10)
+
+    shared = TokenBucket(1, 1)
+    assert all(b is shared for b in org_rate_limiter(shared).buckets.values())
+    custom = RateLimiter({'client': (1, 1)})
+    assert org_rate_limiter(custom) is custom
+    assert org_rate_limiter(None) is None
+
+
+def test_each_org_gets_its_own_rate_budget(server):
+    with TensorDockFleet(_organizations(server), rate_limit=(10, 1), retry=False) as fleet:
+        _point_at(fleet, server)
+        good, bad = fleet['good'].rate_limiter, fleet['bad'].rate_limiter
+        assert good.buckets['client'] is good.buckets['billing']
+        assert good.buckets['client'] is not bad.buckets['client']
+
+        start = time.monotonic()
+        for _ in range(2):
+            fleet['good'].virtual_machines.list_vms()
+            fleet['good'].billing.get_balance()
+        # One token up front, then 10 per second across both endpoint groups.
+        assert time.monotonic() - start >= 0.25
+
+        start = time.monotonic()
+        with pytest.raises(TensorDockAPIException):
+            fleet['bad'].authorization.test_authorization()
+        assert time.monotonic() - start < 0.08
+
+
+def test_rate_limit_dict_is_per_org(server):
+    fleet = TensorDockFleet(_organizations(server), rate_limit={'good': (5, 10)})
+    with fleet:
+        assert fleet['good'].rate_limiter.buckets['auth'].rate == 5
+        assert fleet['bad'].rate_limiter is None
+
+
+def test_async_fleet_shares_session_and_merges(server, deploy):
+    vms = deploy(2)
+
+    async def main():
+        async with AsyncTensorDockFleet(_organizations(server), rate_limit=(1000, 100), retry=False) as fleet:
+            _point_at(fleet, server)
+            result = await fleet.list_vms()
+            assert fleet.session is not None
+            assert all(api.session is fleet.session for api in fleet.clients.values())
+            balance = await fleet.get_balance()
+        assert fleet.session.closed
+        return result, balance
+
+    result, balance = asyncio.run(main())
+    assert set(result['virtualmachines']) == set(vms)
+    assert {vm['org'] for vm in result['virtualmachines'].values()} == {'good'}
+    assert isinstance(result['errors']['bad'], TensorDockAPIException)
+    assert list(balance['organizations']) == ['good']
+    assert list(balance['errors']) == ['bad']
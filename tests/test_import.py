@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ('requests', 'aiohttp', 'numpy', 'asyncio')
+ENDPOINTS = ('tensordock.endpoints.authorization', 'tensordock.endpoints.virtual_machines',
+             'tensordock.endpoints.containers', 'tensordock.endpoints.billing')
+
+
+def imported(statement):
+    """
+    Run `statement` in a fresh interpreter and return the modules it left in sys.modules.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    code = f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def _loaded(modules, names):
+    return sorted(name for name in names if any(module == name or module.startswith(name + '.')
+                                                for module in modules))
+
+
+def test_import_is_lazy():
+    modules = imported("import tensordock")
+    assert _loaded(modules, HEAVY + ENDPOINTS + ('tensordock.api',)) == []
+
+
+def test_client_creation_is_lazy():
+    modules = imported("import tensordock\ntensordock.TensorDockAPI('key', 'token')")
+    assert _loaded(modules, HEAVY + ENDPOINTS) == []
+
+
+@pytest.mark.parametrize('group, module', [
+    ('billing', 'tensordock.endpoints.billing'),
+    ('virtual_machines', 'tensordock.endpoints.virtual_machines'),
+])
+def test_endpoint_group_imports_only_its_module(group, module):
+    modules = imported(f"import tensordock\ntensordock.TensorDockAPI('key', 'token').{group}")
+    assert _loaded(modules, HEAVY + ENDPOINTS) == [module]
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from tensordock.ledger import BillingLedger, parse_gpu_details, period_range, PAYOUTS  # noqa: E402
+from tensordock.testing import generate_summary  # noqa: E402
+
+VM_A, VM_B, NODE = 'vm-a', 'vm-b', 'node-1'
+
+
+def _summaries():
+    return {
+        '2024-02': {
+            'previous_balance': '100.00',
+            'final_balance': '90.40',
+            'transactions': {
+                'vm_expenses': [
+                    {'virtual_machine_id': VM_A, 'hostnode_id': NODE, 'gpu_details': '2x L40 48 GB',
+                     'total_amount': '0.1'},
+                    {'virtual_machine_id': VM_B, 'hostnode_id': NODE, 'gpu_details': '1x A100 80 GB',
+                     'total_amount': '0.2'},
+                ],
+                'storage_expenses': [{'virtual_machine_id': VM_A, 'hostnode_id': NODE, 'total_amount': 9.3}],
+            },
+        },
+        '2024-01': {
+            'previous_balance': '50',
+            'final_balance': '100.00',
+            'transactions': {
+                'deposits': [{'amount': '60'}],
+                'vm_expenses': [{'virtual_machine_id': VM_A, 'hostnode_id': NODE, 'gpu_details': '2x L40 48 GB',
+                                 'total_amount': '10'}],
+            },
+        },
+    }
+
+
+def test_sums_are_exact_decimals():
+    ledger = BillingLedger(_summaries())
+    assert len(ledger) == 5
+    assert ledger.cost_by_vm() == {VM_A: Decimal('19.400000'), VM_B: Decimal('0.200000')}
+    assert ledger.cost_by_hostnode() == {NODE: Decimal('19.600000')}
+    assert ledger.cost_by_gpu() == {'L40 48 GB': Decimal('10.100000'), 'A100 80 GB': Decimal('0.200000'),
+                                    None: Decimal('9.300000')}
+    assert ledger.cost_by_month() == {'2024-01': Decimal('10.000000'), '2024-02': Decimal('9.600000')}
+    assert ledger.cost_by_vm(kinds=PAYOUTS) == {}
+
+
+def test_running_balance_reconciles_with_reported():
+    points = BillingLedger(_summaries()).running_balance()
+    assert [point.period for point in points] == ['2024-01', '2024-02']
+    assert [point.balance for point in points] == [Decimal('100.000000'), Decimal('90.400000')]
+    assert all(point.balance == point.reported for point in points)
+
+
+def test_from_api_matches_generated_summaries(server):
+    ledger = BillingLedger.from_api(server.client(), '2023-11', '2024-02')
+    assert ledger.periods == ['2023-11', '2023-12', '2024-01', '2024-02']
+    expected = sum(Decimal(str(row['total_amount'])) for period in ledger.periods
+                   for row in generate_summary(period)['transactions']['vm_expenses'])
+    assert sum(ledger.cost_by_month(kinds='vm_expenses').values()) == expected
+    for point in ledger.running_balance()[:1]:
+        assert abs(point.balance - point.reported) < Decimal('0.01')
+
+
+def test_helpers():
+    assert period_range('2023-11', '2024-02') == ['2023-11', '2023-12', '2024-01', '2024-02']
+    assert parse_gpu_details('4x RTX A6000 48 GB') == (4, 'RTX A6000 48 GB')
+    assert parse_gpu_details(None) == (0, None)
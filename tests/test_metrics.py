@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from tensordock.exceptions import TensorDockCircuitOpenError, TensorDockTimeoutError
+from tensordock.resilience import deadline, CircuitBreaker
+
+
+def _recorded(client):
+    calls = []
+    client.add_hook('after_request', calls.append)
+    return calls
+
+
+def test_sync_client_times_new_connections(server):
+    api = server.client(retry=False)
+    calls = _recorded(api)
+    api.virtual_machines.list_vms()
+    api.virtual_machines.list_vms()
+    first, second = calls
+    assert first.connect is not None and first.connect > 0
+    assert first.ttfb >= 0 and first.connect + first.ttfb <= first.total
+    assert second.connect is None
+
+
+def test_cache_hit_only_for_cached_calls(server):
+    api = server.client(cache=True, retry=False)
+    calls = _recorded(api)
+    api.virtual_machines.list_vms()
+    api.virtual_machines.list_vms()
+    assert [metrics.cache_hit for metrics in calls] == [False, True]
+    assert calls[1].attempts == 0
+
+
+def test_calls_failing_before_sending_are_not_cache_hits(server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    api = server.client(cache=True, retry=False, circuit_breaker=breaker)
+    calls = _recorded(api)
+    server.faults['client/list'] = {'error_rate': 1.0}
+    with pytest.raises(Exception):
+        api.virtual_machines.list_vms()
+    with pytest.raises(TensorDockCircuitOpenError):
+        api.virtual_machines.list_vms()
+    with pytest.raises(TensorDockTimeoutError), deadline(0):
+        api.billing.get_balance()
+    assert [metrics.attempts for metrics in calls] == [1, 0, 0]
+    assert not any(metrics.cache_hit for metrics in calls)
+
+
+def test_async_shared_inflight_call_is_a_cache_hit(server):
+    server.faults['client/list'] = {'latency': 0.1}
+
+    async def main():
+        async with server.async_client(cache=True, retry=False) as api:
+            calls = _recorded(api)
+            await asyncio.gather(api.virtual_machines.list_vms(), api.virtual_machines.list_vms())
+            return calls
+
+    calls = asyncio.run(main())
+    assert sorted(metrics.cache_hit for metrics in calls) == [False, True]
+    assert server.requests['client/list'] == 1
@@ -0,0 +1,51 @@
+import gc
+import json
+import tracemalloc
+
+from tensordock.models import Hostnode, GpuSpec, PortForward, VM, parse_hostnodes
+from tensordock.testing import generate_hostnodes
+
+
+def _retained(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return retained
+
+
+def test_hostnode_fields_and_round_trip():
+    hostnode_id, raw = next(iter(generate_hostnodes(1, seed=3).items()))
+    hostnode = Hostnode(hostnode_id, raw)
+    assert not hasattr(hostnode, '__dict__')
+    assert list(hostnode.ports) == raw['networking']['ports']
+    assert hostnode.cpu.amount == raw['specs']['cpu']['amount']
+    assert {gpu.model for gpu in hostnode.gpus} == set(raw['specs']['gpu'])
+    for model, spec in raw['specs']['gpu'].items():
+        assert hostnode.gpu(model) == GpuSpec(model, spec)
+    assert hostnode.gpu('no-such-gpu') is None
+    assert Hostnode(hostnode_id, hostnode.to_dict()) == hostnode
+
+
+def test_models_drop_the_response_dict():
+    body = json.dumps({'hostnodes': generate_hostnodes(2000)}).encode()
+    raw = _retained(lambda: json.loads(body))
+    typed = _retained(lambda: parse_hostnodes(json.loads(body)))
+    assert typed < raw / 2
+
+
+def test_typed_list_vms(server, api, deploy):
+    servers = deploy(2)
+    vms = api.virtual_machines.list_vms(typed=True)
+    assert set(vms) == set(servers)
+    for server_id, vm in vms.items():
+        assert isinstance(vm, VM) and vm.id == server_id
+        assert vm.vcpus == 1 and vm.gpu is None
+        assert all(isinstance(forward, PortForward) for forward in vm.port_forwards)
+    details = api.virtual_machines.get_vm_details(servers[0], typed=True)
+    assert details == vms[servers[0]]
@@ -0,0 +1,80 @@
+from collections import Counter, defaultdict
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from tensordock.exceptions import TensorDockDeployError  # noqa: E402
+from tensordock.placement import PlacementPlanner, VMRequest  # noqa: E402
+from tensordock.testing import generate_hostnodes  # noqa: E402
+
+OS = {'operating_system': 'Ubuntu 22.04 LTS', 'password': 'test'}
+
+
+def _used(plan):
+    used = defaultdict(Counter)
+    for placement in plan.placements:
+        request = placement.request
+        usage = used[placement.hostnode_id]
+        usage['vcpus'] += request.vcpus
+        usage['ram'] += request.ram
+        usage['storage'] += request.storage
+        if placement.gpu_model is not None:
+            usage[placement.gpu_model] += request.gpu_count
+    return used
+
+
+def test_plan_respects_capacity_and_ports():
+    hostnodes = generate_hostnodes(10, seed=1)
+    requests = [VMRequest(f'gpu-{i}', gpu_count=1, vcpus=4, ram=8, storage=50, **OS) for i in range(30)]
+    requests += [VMRequest(f'cpu-{i}', vcpus=8, ram=16, storage=100, internal_ports=(22, 80), **OS)
+                 for i in range(30)]
+    plan = PlacementPlanner(hostnodes).plan(requests)
+
+    assert len(plan.placements) + len(plan.unplaced) == len(requests)
+    for hostnode_id, usage in _used(plan).items():
+        specs = hostnodes[hostnode_id]['specs']
+        assert usage['vcpus'] <= specs['cpu']['amount']
+        assert usage['ram'] <= specs['ram']['amount']
+        assert usage['storage'] <= specs['storage']['amount']
+        for model, gpu in specs['gpu'].items():
+            assert usage[model] <= gpu['amount']
+    ports = [(placement.hostnode_id, port) for placement in plan.placements for port in placement.external_ports]
+    assert len(ports) == len(set(ports))
+    assert all(len(placement.external_ports) == len(placement.request.internal_ports)
+               for placement in plan.placements)
+
+
+def test_plan_prefers_cheapest_hostnode_and_respects_max_price():
+    hostnodes = generate_hostnodes(20, seed=2)
+    planner = PlacementPlanner(hostnodes)
+    single = planner.plan([VMRequest('one', vcpus=2, ram=4, storage=20)])
+    placement = single.placements[0]
+    cheapest = min(spec['cpu']['price'] * 2 + spec['ram']['price'] * 4 + spec['storage']['price'] * 20
+                   for spec in (hostnode['specs'] for hostnode in hostnodes.values()))
+    assert placement.price_hourly == pytest.approx(cheapest)
+
+    capped = planner.plan([VMRequest('capped', gpu_count=1, vcpus=2, ram=4, storage=20, max_price=0.0001)])
+    assert capped.placements == [] and len(capped.unplaced) == 1
+
+
+def test_execute_deploys_plan(server):
+    api = server.client()
+    planner = PlacementPlanner.from_api(api)
+    plan = planner.plan([VMRequest(f'vm-{i}', vcpus=1, ram=1, storage=10, **OS) for i in range(5)])
+    deployed = planner.execute(plan)
+    assert len(deployed) == 5
+    assert len(api.virtual_machines.list_vms()['virtualmachines']) == 5
+
+
+def test_execute_rolls_back_on_failure(server):
+    api = server.client(retry=False)
+    planner = PlacementPlanner.from_api(api)
+    plan = planner.plan([VMRequest(f'vm-{i}', vcpus=1, ram=1, storage=10, **OS) for i in range(10)])
+    server.faults['client/deploy/single'] = {'error_rate': 0.5}
+    with pytest.raises(TensorDockDeployError) as raised:
+        planner.execute(plan)
+    error = raised.value
+    assert error.errors and len(error.deployed) + len(error.errors) == 10
+    assert len(error.rolled_back) == len(error.deployed)
+    assert api.virtual_machines.list_vms()['virtualmachines'] == {}
@@ -0,0 +1,205 @@
+import asyncio
+import time
+
+import pytest
+
+from tensordock.exceptions import TensorDockAPIException, TensorDockCircuitOpenError, TensorDockTimeoutError
+from tensordock.resilience import deadline, remaining, CircuitBreaker, HedgingPolicy, CLOSED, HALF_OPEN, OPEN
+from tensordock.retry import RetryPolicy
+
+
+def test_half_open_probe_released_when_cancelled(server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+
+    async def main():
+        async with server.async_client(retry=False, circuit_breaker=breaker) as api:
+            server.faults['billing/balance'] = {'error_rate': 1.0}
+            with pytest.raises(Exception):
+                await api.billing.get_balance()
+            assert breaker.state('billing') == OPEN
+
+            server.faults['billing/balance'] = {'latency': 1.0}
+            await asyncio.sleep(0.15)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(api.billing.get_balance(), 0.2)
+            assert breaker.state('billing') == HALF_OPEN
+
+            del server.faults['billing/balance']
+            assert (await api.billing.get_balance())['success']
+            assert breaker.state('billing') == CLOSED
+
+    asyncio.run(main())
+
+
+def test_half_open_probe_released_when_stream_closed_early(server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    hostnodes = 'client/deploy/hostnodes'
+    with server.client(retry=False, circuit_breaker=breaker) as api:
+        server.faults[hostnodes] = {'error_rate': 1.0}
+        with pytest.raises(Exception):
+            next(api.virtual_machines.get_available_hostnodes(stream=True))
+        assert breaker.state('client') == OPEN
+
+        del server.faults[hostnodes]
+        time.sleep(0.15)
+        stream = api.virtual_machines.get_available_hostnodes(stream=True)
+        next(stream)
+        stream.close()
+        assert breaker.state('client') == HALF_OPEN
+
+        assert len(list(api.virtual_machines.get_available_hostnodes(stream=True))) == 20
+        assert breaker.state('client') == CLOSED
+
+
+def test_stale_probe_expires():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.allow('billing/balance')
+    breaker.record('billing/balance', TimeoutError(), (TimeoutError,))
+    time.sleep(0.06)
+    breaker.allow('billing/balance')  # probe that never reports back
+    with pytest.raises(TensorDockCircuitOpenError):
+        breaker.allow('billing/balance')
+    time.sleep(0.06)
+    breaker.allow('billing/balance')
+
+
+def test_release_frees_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.allow('billing/balance')
+    breaker.record('billing/balance', TimeoutError(), (TimeoutError,))
+    time.sleep(0.06)
+    breaker.allow('billing/balance')
+    breaker.release('billing/balance')
+    breaker.allow('billing/balance')
+
+
+def test_deadline_bounds_slow_call(server):
+    server.faults['billing/balance'] = {'latency': 1.0}
+    with server.client(retry=False) as api:
+        started = time.monotonic()
+        with pytest.raises(TensorDockTimeoutError):
+            with deadline(0.2):
+                api.billing.get_balance()
+        assert time.monotonic() - started < 0.5
+
+
+def test_client_deadline_applies_to_async_calls(server):
+    server.faults['billing/balance'] = {'latency': 1.0}
+
+    async def main():
+        async with server.async_client(retry=False, deadline=0.2) as api:
+            await api.billing.get_balance()
+
+    started = time.monotonic()
+    with pytest.raises(TensorDockTimeoutError):
+        asyncio.run(main())
+    assert time.monotonic() - started < 0.5
+
+
+def test_nested_deadline_only_shortens():
+    with deadline(10):
+        with deadline(0.5):
+            assert remaining() <= 0.5
+        with deadline(60):
+            assert remaining() <= 10
+    assert remaining() is None
+
+
+def test_retry_past_deadline_is_not_attempted(server):
+    server.faults['billing/balance'] = {'error_rate': 1.0}
+    with server.client(retry=RetryPolicy(backoff_base=5, backoff_max=5)) as api:
+        started = time.monotonic()
+        with pytest.raises(TensorDockAPIException) as raised:
+            with deadline(0.05):
+                api.billing.get_balance()
+        assert raised.value.status_code == 503
+        assert time.monotonic() - started < 0.05 + 0.1
+
+
+def test_hedging_cuts_stragglers(server):
+    server.faults['billing/balance'] = {'latency': 0.005, 'slow_rate': 0.1, 'slow_latency': 0.5}
+    hedging = HedgingPolicy(quantile=0.5, min_samples=10, max_ratio=0.5)
+    with server.client(retry=False, hedging=hedging) as api:
+        for _ in range(60):
+            api.billing.get_balance()
+        stats = api.resilience_stats()['hedging']['billing/balance']
+    assert stats['hedged'] > 0 and stats['hedge_wins'] > 0
+    assert stats['hedged'] <= 0.5 * stats['calls']
+
+
+def test_async_hedging(server):
+    server.faults['billing/balance'] = {'latency': 0.005, 'slow_rate': 0.2, 'slow_latency': 0.3}
+
+    async def main():
+        async with server.async_client(retry=False, hedging=HedgingPolicy(quantile=0.5, min_samples=10, max_ratio=0.5)) as api:
+            for _ in range(40):
+                assert (await api.billing.get_balance())['success']
+            return api.resilience_stats()['hedging']['billing/balance']
+
+    stats = asyncio.run(main())
+    assert stats['hedge_wins'] > 0
+
+
+def test_mutating_calls_are_never_hedged():
+    hedging = HedgingPolicy(min_samples=1)
+    hedging.observe('client/stop/single', 0.1)
+    hedging.observe('client/get/single', 0.1)
+    assert hedging.hedge_after('client/stop/single') is None
+    assert hedging.hedge_after('client/get/single') == pytest.approx(0.1)
+
+
+def test_breaker_fails_fast_and_recovers(server):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    server.faults['billing/balance'] = {'error_rate': 1.0}
+    with server.client(retry=False, circuit_breaker=breaker) as api:
+        for _ in range(2):
+            with pytest.raises(TensorDockAPIException):
+                api.billing.get_balance()
+        with pytest.raises(TensorDockCircuitOpenError):
+            api.billing.get_balance()
+        assert server.requests['billing/balance'] == 2
+        assert api.virtual_machines.list_vms()['success']
+
+        del server.faults['billing/balance']
+        time.sleep(0.15)
+        assert api.billing.get_balance()['success']
+        stats = api.resilience_stats()['circuit_breaker']['billing']
+    assert stats['state'] == CLOSED and stats['opened'] == 1 and stats['rejected'] == 1
+
+
+def test_client_errors_do_not_open_the_breaker(server):
+    breaker = CircuitBreaker(failure_threshold=1)
+    with server.client('wrong', 'credentials', retry=False, circuit_breaker=breaker) as api:
+        for _ in range(3):
+            with pytest.raises(TensorDockAPIException):
+                api.billing.get_balance()
+    assert breaker.state('billing') == CLOSED
+
+
+def test_expired_deadline_before_sending_does_not_open_the_breaker(server):
+    breaker = CircuitBreaker(failure_threshold=1)
+    with server.client(retry=False, circuit_breaker=breaker) as api:
+        for _ in range(3):
+            with pytest.raises(TensorDockTimeoutError), deadline(0):
+                api.billing.get_balance()
+        assert server.requests.get('billing/balance', 0) == 0
+        assert breaker.state('billing') == CLOSED
+
+        server.faults['billing/balance'] = {'latency': 0.5}
+        with pytest.raises(TensorDockTimeoutError), deadline(0.1):
+            api.billing.get_balance()
+    assert breaker.state('billing') == OPEN
+
+
+def test_expired_deadline_before_sending_does_not_open_the_async_breaker(server):
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    async def main():
+        async with server.async_client(retry=False, circuit_breaker=breaker) as api:
+            for _ in range(3):
+                with pytest.raises(TensorDockTimeoutError), deadline(0):
+                    await api.billing.get_balance()
+
+    asyncio.run(main())
+    assert server.requests.get('billing/balance', 0) == 0
+    assert breaker.state('billing') == CLOSED
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from tensordock.exceptions import TensorDockAPIException
+from tensordock.ratelimit import RateLimiter, TokenBucket
+from tensordock.retry import RetryPolicy
+
+FAST = RetryPolicy(max_retries=3, backoff_base=0.01, backoff_max=0.05)
+
+
+def test_transient_errors_are_retried(server):
+    server.faults['client/list'] = {'error_rate': 0.5}
+    api = server.client(retry=RetryPolicy(max_retries=10, backoff_base=0.001, backoff_max=0.01))
+    metrics = []
+    api.add_hook('after_request', metrics.append)
+    for _ in range(10):
+        api.virtual_machines.list_vms()
+    assert sum(m.retries for m in metrics) == server.requests['client/list'] - 10 > 0
+
+
+def test_gives_up_after_max_retries(server):
+    server.faults['client/list'] = {'error_rate': 1.0}
+    api = server.client(retry=FAST)
+    with pytest.raises(TensorDockAPIException) as raised:
+        api.virtual_machines.list_vms()
+    assert raised.value.status_code == 503
+    assert server.requests['client/list'] == 4
+
+
+def test_non_idempotent_calls_are_not_retried(server, deploy):
+    server_id = deploy(1)[0]
+    server.faults['client/stop/single'] = {'error_rate': 1.0}
+    api = server.client(retry=FAST)
+    with pytest.raises(TensorDockAPIException):
+        api.virtual_machines.stop_vm(server_id)
+    assert server.requests['client/stop/single'] == 1
+
+
+def test_client_errors_are_not_retried(server):
+    api = server.client('wrong', 'credentials', retry=FAST)
+    with pytest.raises(TensorDockAPIException):
+        api.virtual_machines.list_vms()
+    assert server.requests['client/list'] == 1
+
+
+def test_retry_after_is_honored(server):
+    server.faults['client/list'] = {'error_rate': 1.0, 'retry_after': 0.2}
+    api = server.client(retry=RetryPolicy(max_retries=1, backoff_max=1))
+    started = time.monotonic()
+    with pytest.raises(TensorDockAPIException):
+        api.virtual_machines.list_vms()
+    assert time.monotonic() - started >= 0.2
+
+
+def test_retry_after_longer_than_backoff_max_gives_up():
+    policy = RetryPolicy(backoff_max=1)
+    error = TensorDockAPIException('busy', status_code=429, retry_after=5)
+    assert policy.delay_for('client/list', 'post', 0, error) is None
+    assert policy.delay_for('client/list', 'post', 0, TensorDockAPIException('busy', 429, retry_after=0.5)) == 0.5
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(backoff_base=1, backoff_max=2)
+    assert all(0 <= policy.backoff(attempt) <= 2 for attempt in range(20))
+
+
+def test_transport_errors_are_retried_only_when_transient():
+    policy = RetryPolicy()
+    assert policy.delay_for('client/list', 'post', 0, ConnectionError(), (ConnectionError,)) is not None
+    assert policy.delay_for('client/list', 'post', 0, ValueError(), (ConnectionError,)) is None
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_rate_limiter_applies_per_endpoint_group(server):
+    api = server.client(rate_limiter=RateLimiter({'billing': (20, 1)}))
+    started = time.monotonic()
+    for _ in range(5):
+        api.virtual_machines.list_vms()
+    assert time.monotonic() - started < 0.15
+    started = time.monotonic()
+    for _ in range(5):
+        api.billing.get_balance()
+    assert time.monotonic() - started >= 0.19
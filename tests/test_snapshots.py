@@ -0,0 +1,92 @@
+import asyncio
+import copy
+import json
+import time
+
+import pytest
+
+from tensordock import snapshots
+from tensordock.cache import ResponseCache
+from tensordock.snapshots import SnapshotStore
+from tensordock.testing import generate_hostnodes
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    yield store
+    store.close()
+
+
+def test_client_records_responses(server, deploy, store):
+    servers = deploy(2)
+    api = server.client(retry=False, snapshots=store)
+    listing = api.virtual_machines.list_vms()
+    api.virtual_machines.get_available_hostnodes()
+    assert store.latest('client/list').data == listing
+    assert store.vm(servers[0]).data == listing['virtualmachines'][servers[0]]
+    assert sorted(store.vms_with_status('Running')) == sorted(servers)
+    assert store.hostnode(next(iter(server.hostnodes))) is not None
+
+
+def test_async_client_records_responses(server, deploy, store):
+    servers = deploy(1)
+
+    async def main():
+        async with server.async_client(retry=False, snapshots=store) as api:
+            return await api.virtual_machines.get_vm_details(servers[0])
+
+    details = asyncio.run(main())
+    assert store.vm(servers[0]).data == details['virtualmachine']
+
+
+def test_gpu_history_logs_changes_only(store):
+    hostnodes = generate_hostnodes(5, seed=4)
+    hostnode_id, model = next((hostnode_id, model) for hostnode_id, hostnode in hostnodes.items()
+                              for model in hostnode['specs']['gpu'])
+    store.record('client/deploy/hostnodes', {}, {'hostnodes': hostnodes}, fetched_at=100)
+    store.record('client/deploy/hostnodes', {}, {'hostnodes': hostnodes}, fetched_at=200)
+    changed = copy.deepcopy(hostnodes)
+    changed[hostnode_id]['specs']['gpu'][model]['amount'] = 0
+    store.record('client/deploy/hostnodes', {}, {'hostnodes': changed}, fetched_at=300)
+
+    history = store.gpu_history(model, hostnode_id=hostnode_id)
+    assert [(entry.fetched_at, entry.amount) for entry in history] == [
+        (100, hostnodes[hostnode_id]['specs']['gpu'][model]['amount']), (300, 0)]
+    before = store.gpu_availability(model, at=250)
+    after = store.gpu_availability(model, at=350)
+    assert after.amount == before.amount - hostnodes[hostnode_id]['specs']['gpu'][model]['amount']
+
+
+def test_failed_write_is_raised_by_flush(store):
+    store.record('client/list', {}, {'virtualmachines': {'bad': {'status': object()}}})
+    store.record('client/get/single', {'server': 'good'}, {'virtualmachine': {'status': 'Running'}})
+    with pytest.raises(TypeError):
+        store.flush()
+    assert store.vm('good').data == {'status': 'Running'}
+    assert store.latest('client/list') is None
+
+
+def test_warm_skips_expired_responses(store, monkeypatch):
+    now = time.time()
+    store.record('client/list', {}, {'virtualmachines': {}}, fetched_at=now - 3600)
+    store.record('client/deploy/hostnodes', {}, {'hostnodes': {}}, fetched_at=now)
+    store.flush()
+    decoded, loads = [], json.loads
+    monkeypatch.setattr(snapshots.json, 'loads', lambda body: decoded.append(body) or loads(body))
+    cache = ResponseCache()
+    assert store.warm(cache) == 1
+    assert len(decoded) == 1
+    assert cache.get(cache.key_for('client/deploy/hostnodes')) == {'hostnodes': {}}
+    assert cache.get(cache.key_for('client/list')) is None
+
+
+def test_warm_start_serves_first_call_from_cache(server, tmp_path):
+    path = str(tmp_path / 'warm.db')
+    with SnapshotStore(path) as store:
+        server.client(retry=False, snapshots=store).virtual_machines.get_available_hostnodes()
+    requests = server.requests['client/deploy/hostnodes']
+    with SnapshotStore(path) as store:
+        api = server.client(retry=False, cache=True, snapshots=store)
+        api.virtual_machines.get_available_hostnodes()
+    assert server.requests['client/deploy/hostnodes'] == requests
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from tensordock import streaming
+from tensordock.streaming import JSONItemStream
+
+DOCUMENT = {
+    'success': True,
+    'skipped': {'nested': [1, {'deep': '}]"'}], 'text': 'a "quoted" \\ value'},
+    'hostnodes': {
+        'a': {'ports': [1, 2, 3], 'name': 'café ☃', 'escaped': 'tab\t"quote" back\\slash {['},
+        'b': {'empty': {}, 'list': [], 'number': -12.5e3, 'flag': False, 'none': None},
+        'c': 'a string entry',
+        'd': 1234567,
+    },
+    'after': [1, 2, 3],
+}
+
+
+def _stream(body, size, path=('hostnodes',)):
+    stream = JSONItemStream(path)
+    items = []
+    for offset in range(0, len(body), size):
+        items.extend(stream.feed(body[offset:offset + size]))
+    items.extend(stream.close())
+    return items
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 1 << 20])
+def test_any_chunking_yields_the_same_items(size):
+    body = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    assert _stream(body, size) == list(DOCUMENT['hostnodes'].items())
+
+
+def test_streams_arrays_and_missing_paths():
+    body = json.dumps(DOCUMENT).encode()
+    assert _stream(body, 5, ('after',)) == [1, 2, 3]
+    assert _stream(body, 5, ('missing',)) == []
+    assert _stream(body, 5, ('success',)) == []
+
+
+def test_truncated_document_raises():
+    body = json.dumps(DOCUMENT).encode()
+    with pytest.raises(ValueError):
+        _stream(body[:body.index(b'"c"')], 4)
+
+
+def test_entry_spanning_chunks_is_decoded_once(monkeypatch):
+    entry = {'values': [{'index': i, 'text': f'value "{i}" \\'} for i in range(2000)]}
+    body = json.dumps({'hostnodes': {'big': entry}}).encode()
+    calls = []
+    decoder = streaming._decoder
+
+    class Counting:
+        def raw_decode(self, buffer, pos):
+            calls.append(pos)
+            return decoder.raw_decode(buffer, pos)
+
+    monkeypatch.setattr(streaming, '_decoder', Counting())
+    assert _stream(body, 256) == [('big', entry)]
+    # Two failed attempts before scanning, one once it is complete, plus the key.
+    assert len(calls) <= 5
+
+
+def test_streamed_hostnodes_match_the_full_listing(server):
+    api = server.client(retry=False)
+    full = api.virtual_machines.get_available_hostnodes()['hostnodes']
+    assert dict(api.virtual_machines.get_available_hostnodes(stream=True)) == full
+
+    async def main():
+        async with server.async_client(retry=False) as client:
+            return {key: value async for key, value in client.virtual_machines.get_available_hostnodes(stream=True)}
+
+    assert asyncio.run(main()) == full
+
+
+@pytest.mark.parametrize('document, marker', [
+    (b'{"data": [{"x":1}, 40605.25, 3]}', b'.'),
+    (b'{"data": {"a": 1.5e3, "b": 2}}', b'e'),
+    (b'{"data": {"a": 1.5e-3, "b": 2}}', b'-'),
+    (b'{"data": [1, -42, 3]}', b'-'),
+    (b'{"data": [1, 42]}', b'4'),
+])
+def test_number_split_at_target_level(document, marker):
+    expected = json.loads(document)['data']
+    expected = list(expected.items()) if isinstance(expected, dict) else expected
+    split = document.index(marker) + 1
+    assert list(streaming.iter_json_items([document[:split], document[split:]], ('data',))) == expected
+
+
+def test_every_two_chunk_split_of_target_level_scalars():
+    document = b'{"data": {"a": -0.5, "b": 1.25E+10, "c": true, "d": null, "e": "x", "f": 7}}'
+    expected = list(json.loads(document)['data'].items())
+    for split in range(len(document) + 1):
+        assert list(streaming.iter_json_items([document[:split], document[split:]], ('data',))) == expected
@@ -0,0 +1,53 @@
+import pytest
+
+from tensordock.utilization import _Hostnode, FIELDS, DEFAULT_TIERS, UtilizationMonitor
+
+RECORD = {'revenue_compute': 10.0, 'used_gpus': 1, 'available_gpus': 3}
+
+
+def _totals(hostnode, start=float('-inf'), end=float('inf')):
+    return dict(zip(FIELDS, hostnode.totals(start, end)))
+
+
+@pytest.mark.parametrize('t0', [1000000.0, 1000030.0, 1003590.0])
+def test_totals_do_not_double_count_coarse_tiers(t0):
+    hostnode = _Hostnode(DEFAULT_TIERS)
+    hostnode.add(t0, t0 + 90, RECORD)
+    hostnode.add(t0 + 90, t0 + 180, RECORD)
+
+    totals = _totals(hostnode, end=t0 + 180)
+    assert totals['revenue_compute'] == pytest.approx(20.0)
+    assert totals['used_gpus'] == pytest.approx(180.0)
+    assert totals['available_gpus'] == pytest.approx(540.0)
+
+
+def test_totals_across_tier_boundaries():
+    # Two raw slices and ten 1-minute buckets: most of the history is only left in coarser tiers.
+    hostnode = _Hostnode(((0, 2), (60, 10), (3600, 5)))
+    t0 = 1000020.0
+    for index in range(20):
+        hostnode.add(t0 + 90 * index, t0 + 90 * (index + 1), RECORD)
+    end = t0 + 90 * 20
+
+    totals = _totals(hostnode)
+    assert totals['revenue_compute'] == pytest.approx(200.0)
+    assert totals['used_gpus'] == pytest.approx(1800.0)
+
+    # Windows starting inside the hour tier, the minute tier and the raw tier.
+    for start in (t0 + 45, end - 700, end - 150):
+        totals = _totals(hostnode, start, end)
+        assert totals['revenue_compute'] == pytest.approx((end - start) / 90 * 10.0)
+        assert totals['used_gpus'] == pytest.approx(end - start)
+
+
+def test_monitor_revenue_matches_fetched_slices(api, deploy):
+    deploy(2)
+    slice_revenue = sum(record['revenue_compute'] for record in api.billing.get_revenue(
+        '0', '1')['data'])
+    assert slice_revenue > 0
+
+    monitor = UtilizationMonitor(api, backfill=150)
+    for _ in range(3):
+        monitor.refresh()
+    assert monitor.revenue()['compute'] == pytest.approx(3 * slice_revenue)
+    assert 0 < monitor.utilization(resource='cpus') < 1
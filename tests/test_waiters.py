@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import pytest
+
+from tensordock.exceptions import TensorDockTimeoutError
+from tensordock.testing import MockServer
+
+INTERVAL = 0.05
+
+
+@pytest.fixture
+def server():
+    with MockServer(hostnodes=20, transition_delay=0.3) as server:
+        yield server
+
+
+def _client(server):
+    api = server.client(retry=False)
+    api.status_poller.interval = INTERVAL
+    return api
+
+
+def test_waits_for_a_status(server, deploy):
+    vm, = deploy(1)
+    api = _client(server)
+    api.virtual_machines.stop_vm(vm)
+    assert api.virtual_machines.list_vms()['virtualmachines'][vm]['status'] != 'Stopped'
+    assert api.virtual_machines.wait_for_vm_status(vm, 'stopped', timeout=5)['status'] == 'Stopped'
+
+
+def test_waits_for_deletion_and_replicas(server, deploy):
+    vm, = deploy(1)
+    api = _client(server)
+    api.virtual_machines.delete_vm(vm)
+    assert api.virtual_machines.wait_for_vm_status(vm, None, timeout=5) is None
+
+    api.containers.deploy_container(project_id='web', replicas=1)
+    api.containers.scale_container('web', 2)
+    assert len(api.containers.wait_for_replicas('web', 3, timeout=5)) == 3
+
+
+def test_timeout_reports_the_last_poll_error(server, deploy):
+    vm, = deploy(1)
+    api = _client(server)
+    with pytest.raises(TensorDockTimeoutError, match='did not reach status outbid'):
+        api.virtual_machines.wait_for_vm_status(vm, 'Outbid', timeout=0.2)
+
+    server.faults['client/list'] = {'error_rate': 1.0}
+    with pytest.raises(TensorDockTimeoutError, match='last poll error'):
+        api.virtual_machines.wait_for_vm_status(vm, 'Running', timeout=0.2)
+
+
+def test_waiters_share_one_poll(server, deploy):
+    servers = deploy(8)
+    api = _client(server)
+    polls = []
+    api.add_hook('before_request', lambda path, data, method: path == 'client/list' and polls.append(path))
+    for vm in servers:
+        api.virtual_machines.stop_vm(vm)
+    results = {}
+
+    def wait(vm):
+        results[vm] = api.virtual_machines.wait_for_vm_status(vm, 'Stopped', timeout=5)['status']
+
+    threads = [threading.Thread(target=wait, args=(vm,)) for vm in servers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {vm: 'Stopped' for vm in servers}
+    # About 0.3s / INTERVAL ticks in total, rather than that many per waiter.
+    assert len(polls) < 2 * 0.3 / INTERVAL + 4 < len(servers) * 0.3 / INTERVAL
+
+
+def test_async_waiters_share_one_poll(server, deploy):
+    servers = deploy(4)
+
+    async def main():
+        async with server.async_client(retry=False) as api:
+            api.status_poller.interval = INTERVAL
+            polls = []
+            api.add_hook('before_request', lambda path, data, method: path == 'client/list' and polls.append(path))
+            for vm in servers:
+                await api.virtual_machines.stop_vm(vm)
+            results = await asyncio.gather(*(api.virtual_machines.wait_for_vm_status(vm, 'Stopped', timeout=5)
+                                             for vm in servers))
+            with pytest.raises(TensorDockTimeoutError):
+                await api.virtual_machines.wait_for_vm_status(servers[0], 'Outbid', timeout=0.2)
+            return results, polls
+
+    results, polls = asyncio.run(main())
+    assert [vm['status'] for vm in results] == ['Stopped'] * len(servers)
+    assert len(polls) < 2 * (0.3 + 0.2) / INTERVAL + 4
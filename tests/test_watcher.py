@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+from tensordock.exceptions import TensorDockAPIException
+from tensordock.watcher import VMWatcher, CREATED, DELETED, PORT_FORWARDS_CHANGED, STATUS_CHANGED
+
+
+def _kinds(events):
+    return sorted((event.kind, event.server) for event in events)
+
+
+def test_poll_reports_every_kind_of_change(server, api, deploy):
+    first, second = deploy(2)
+    watcher = VMWatcher(api)
+    assert _kinds(watcher.poll()) == sorted([(CREATED, first), (CREATED, second)])
+    assert watcher.poll() == []
+
+    server.set_vm_status(first, 'Stopped')
+    event, = watcher.poll()
+    assert (event.kind, event.server, event.previous_status, event.vm.status) == (
+        STATUS_CHANGED, first, 'Running', 'Stopped')
+
+    previous = dict(server.vms[second]['port_forwards'])
+    server.vms[second]['port_forwards'] = {'40000': '22'}
+    event, = watcher.poll()
+    assert (event.kind, event.previous_port_forwards) == (PORT_FORWARDS_CHANGED, previous)
+
+    api.virtual_machines.delete_vm(first)
+    event, = watcher.poll()
+    assert (event.kind, event.server, event.vm) == (DELETED, first, None)
+
+
+def test_servers_filter_and_emit_initial(server, api, deploy):
+    first, second = deploy(2)
+    watcher = VMWatcher(api, servers=[first], emit_initial=False)
+    assert watcher.poll() == []
+    server.set_vm_status(second, 'Stopped')
+    server.set_vm_status(first, 'Stopped')
+    assert _kinds(watcher.poll()) == [(STATUS_CHANGED, first)]
+
+
+def test_interval_adapts_to_transitions(server, api, deploy):
+    vm, = deploy(1)
+    watcher = VMWatcher(api, min_interval=1, max_interval=4, backoff=2)
+    watcher.poll()
+    watcher.poll()
+    assert watcher.interval == 4
+    watcher.poll()
+    assert watcher.interval == 4
+
+    server.set_vm_status(vm, 'Starting')
+    watcher.poll()
+    assert watcher.interval == 1
+    server.set_vm_status(vm, 'Running')
+    watcher.poll()
+    assert watcher.interval == 1
+    watcher.poll()
+    assert watcher.interval == 2
+
+
+def test_failed_poll_does_not_end_the_watch(server, api, deploy):
+    vm, = deploy(1)
+    server.faults['client/list'] = {'error_rate': 1.0}
+    watcher = VMWatcher(api, min_interval=0.01, max_interval=0.05)
+    events = []
+    thread = threading.Thread(target=lambda: events.extend(watcher.watch()))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while watcher.last_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert isinstance(watcher.last_error, TensorDockAPIException)
+        del server.faults['client/list']
+        while watcher.last_error is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert (CREATED, vm) in _kinds(events) and watcher.last_error is None
+
+
+def test_stop_wakes_an_async_watch(server, deploy):
+    deploy(1)
+
+    async def main():
+        async with server.async_client(retry=False) as api:
+            watcher = VMWatcher(api, min_interval=30, max_interval=60)
+            events = []
+
+            async def consume():
+                async for event in watcher:
+                    events.append(event)
+
+            task = asyncio.ensure_future(consume())
+            while not events:
+                await asyncio.sleep(0.01)
+            started = time.monotonic()
+            watcher.stop()
+            await asyncio.wait_for(task, 5)
+            return time.monotonic() - started, events
+
+    waited, events = asyncio.run(main())
+    assert waited < 1 and [event.kind for event in events] == [CREATED]